@@ -1,13 +1,27 @@
 from flask import Flask
-from flask_sqlalchemy import SQLAlchemy
-from flask_migrate import Migrate
 from config import config
-import markdown2
-import bleach
-from .extensions import db, migrate
-from .blueprints import auth, api, web
+from .extensions import db, init_migrate
+
+def create_worker_app(config_name):
+    """Create a minimal app for the cron workers: config, database and models only.
+
+    The blueprints, Jinja filters, CLI commands and Flask-Migrate are left out
+    because the workers only need the SQLAlchemy models and are started often.
+    """
+    app = Flask(__name__)
+    app.config.from_object(config[config_name])
+    db.init_app(app)
+    
+    # Import models
+    from . import models
+    
+    return app
 
 def create_app(config_name):
+    import markdown2
+    import bleach
+    from .blueprints import auth, api, web
+
     app = Flask(__name__)
     
     # Load config
@@ -17,7 +31,7 @@ def create_app(config_name):
     
     # Initialize Flask extensions
     db.init_app(app)
-    migrate.init_app(app, db)
+    init_migrate(app)
     
     # Import models
     from .models import Feed, Article, DailySummary
@@ -68,7 +82,4 @@ def create_app(config_name):
     from app import commands
     commands.init_app(app)
     
-    return app
-
-# Import utils after create_app to avoid circular imports
-from .utils import from_json
\ No newline at end of file
+    return app
\ No newline at end of file
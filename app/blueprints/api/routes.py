@@ -1,21 +1,24 @@
 from flask import Blueprint, jsonify, current_app, request
 import os
+from datetime import datetime, timezone, timedelta
 from app.extensions import db
-from app.models import Article, DailySummary
-from app.utils.process import run_script_async
+from app.models import Article, DailySummary, WebSubSubscription, WebSubDelivery
+from app.utils.process import run_script_async, start_script
 from app.utils.database import get_latest_summary, get_summary_by_id
 from app.utils.json import parse_double_encoded_json
 from app.utils.auth import requires_auth_or_token
+from app.utils.websub import verify_signature
 import logging
 import json
-import re
 
 
 logger = logging.getLogger(__name__)
 api = Blueprint('api', __name__, url_prefix='/api')
 
-def strip_html(text):
-    return re.sub('<[^<]+?>', '', text)
+# Collector process this web worker started to ingest pushed content, so a
+# burst of pushes starts one per worker rather than one per push. Collectors
+# started by different workers claim different deliveries.
+_push_ingest = None
 
 @api.route('/collect-feeds', methods=['POST'])
 @requires_auth_or_token
@@ -32,6 +35,10 @@ def collect_feeds():
         logger.error(f"Failed to start feed collection: {str(e)}")
         return jsonify({'status': 'error', 'message': str(e)}), 500
 
+def _cache_args():
+    """``?bypass_cache=1`` makes a summary run ask the API again instead of reusing cached responses."""
+    return ['--bypass-cache'] if request.args.get('bypass_cache', type=int) else []
+
 @api.route('/generate-summary', methods=['POST'])
 @requires_auth_or_token
 def generate_summary():
@@ -40,7 +47,7 @@ def generate_summary():
             return jsonify({'status': 'error', 'message': 'Required env vars not set'}), 500
             
         script_path = os.path.join(current_app.root_path, '..', 'cron', 'feed_summary.py')
-        pid = run_script_async(script_path, ['--cron'])
+        pid = run_script_async(script_path, ['--cron'] + _cache_args())
         return jsonify({'status': 'success', 'process_id': pid}), 202
         
     except Exception as e:
@@ -55,7 +62,7 @@ def generate_weekly():
             return jsonify({'status': 'error', 'message': 'Required env vars not set'}), 500
             
         script_path = os.path.join(current_app.root_path, '..', 'cron', 'feed_summary.py')
-        pid = run_script_async(script_path, ['--cron', '--summary_period', '7'])
+        pid = run_script_async(script_path, ['--cron', '--summary_period', '7'] + _cache_args())
         return jsonify({'status': 'success', 'process_id': pid}), 202
         
     except Exception as e:
@@ -200,4 +207,110 @@ def markdown_preview():
         
     except Exception as e:
         logger.error(f"Error generating markdown preview: {str(e)}")
-        return jsonify({"error": str(e)}), 500
\ No newline at end of file
+        return jsonify({"error": str(e)}), 500
+
+
+@api.route('/websub/<int:feed_id>', methods=['GET'])
+def websub_verify(feed_id):
+    """Verification of intent: the hub confirms a subscription request we made."""
+    subscription = db.session.get(WebSubSubscription, feed_id)
+    mode = request.args.get('hub.mode')
+    if subscription is None or request.args.get('hub.topic') != subscription.topic_url:
+        return '', 404
+
+    if mode == 'denied':
+        subscription.state = 'denied'
+        subscription.last_error = request.args.get('hub.reason') or 'denied by hub'
+        db.session.commit()
+        logger.warning(f"WebSub subscription for feed {feed_id} denied: {subscription.last_error}")
+        return '', 200
+
+    challenge = request.args.get('hub.challenge')
+    if mode != 'subscribe' or not challenge or not subscription.awaiting_verification():
+        return '', 404
+    now = datetime.now(timezone.utc)
+    # A hub that does not say how long the lease is gets the one we asked for
+    lease_seconds = request.args.get('hub.lease_seconds', type=int)
+    if not lease_seconds or lease_seconds <= 0:
+        lease_seconds = current_app.config['WEBSUB_LEASE_SECONDS']
+    subscription.state = 'verified'
+    subscription.last_error = None
+    subscription.verified_at = now
+    subscription.expires_at = now + timedelta(seconds=lease_seconds)
+    db.session.commit()
+    return challenge, 200, {'Content-Type': 'text/plain'}
+
+
+def _read_body(max_bytes):
+    """The request body, or None if it is longer than ``max_bytes``."""
+    chunks = []
+    size = 0
+    while size <= max_bytes:
+        chunk = request.stream.read(max_bytes + 1 - size)
+        if not chunk:
+            break
+        chunks.append(chunk)
+        size += len(chunk)
+    return b''.join(chunks) if size <= max_bytes else None
+
+
+@api.route('/websub/<int:feed_id>', methods=['POST'])
+def websub_push(feed_id):
+    """Content distribution: the hub pushes new feed content.
+
+    The body is checked against the subscription secret, queued for the
+    collector and a collector run is started to ingest it. Content with a
+    bad signature is acknowledged but dropped, as WebSub requires.
+    """
+    subscription = db.session.get(WebSubSubscription, feed_id)
+    if subscription is None or subscription.state != 'verified':
+        return '', 404
+    max_bytes = current_app.config['WEBSUB_MAX_PUSH_BYTES']
+    if (request.content_length or 0) > max_bytes:
+        return '', 413
+    # A chunked body has no Content-Length, so the limit is enforced while reading too
+    body = _read_body(max_bytes)
+    if body is None:
+        return '', 413
+    if not verify_signature(subscription.secret, request.headers.get('X-Hub-Signature'), body):
+        logger.warning(f"Dropping WebSub push for feed {feed_id} with a missing or bad signature")
+        return '', 202
+
+    now = datetime.now(timezone.utc)
+    db.session.add(WebSubDelivery(feed_id=feed_id, received_at=now, body=body,
+                                  content_type=request.headers.get('Content-Type')))
+    subscription.last_push_at = now
+    db.session.commit()
+
+    if _push_ingest is None or _push_ingest.poll() is not None:
+        _start_push_ingest(current_app._get_current_object())
+    # Otherwise the running collector keeps going until the queue is empty
+    return '', 202
+
+
+def _start_push_ingest(app):
+    global _push_ingest
+    started_at = datetime.now(timezone.utc)
+
+    def on_exit(process):
+        # A push queued after the collector's last look at the queue, but
+        # before it exited, would otherwise wait for the next scheduled run.
+        # Only pushes received since it started count, so one that keeps
+        # failing to ingest does not restart it in a loop.
+        if process.returncode != 0:
+            return
+        try:
+            with app.app_context():
+                waiting = db.session.query(WebSubDelivery.id)\
+                    .filter(WebSubDelivery.received_at >= started_at).first()
+                if waiting is not None:
+                    _start_push_ingest(app)
+        except Exception as e:
+            logger.error(f"Failed to check the push queue: {str(e)}")
+
+    try:
+        script_path = os.path.join(app.root_path, '..', 'cron', 'feed_collector.py')
+        _push_ingest = start_script(script_path, ['--pushed', '--parse-workers', '0'], on_exit)
+    except Exception as e:
+        # The delivery stays queued for the next collector run
+        logger.error(f"Failed to start push ingestion: {str(e)}")
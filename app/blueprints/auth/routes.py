@@ -4,14 +4,11 @@ from app.models import User, UserSession
 from datetime import datetime
 import jwt
 from functools import wraps
-import re
 from app.utils.database import get_all_summary_dates, get_recent_articles
+from app.utils.metrics import get_run_metrics, get_feed_costs, get_feed_metric_history
 
 auth = Blueprint('auth', __name__)
 
-def strip_html(text):
-    return re.sub('<[^<]+?>', '', text)
-
 def admin_required(f):
     @wraps(f)
     def decorated(*args, **kwargs):
@@ -99,7 +96,7 @@ def logout():
 @admin_required
 def admin_dashboard():
     """Admin dashboard showing system overview."""
-    from app.models import Article, DailySummary
+    from app.models import Article, DailySummary, Feed, FeedHealth, LLMResponse
     from datetime import datetime, timedelta
     
     # Get recent collection stats
@@ -113,12 +110,57 @@ def admin_dashboard():
     latest_summary = DailySummary.query.filter_by(status='complete')\
         .order_by(DailySummary.generated_at.desc()).first()
     last_summary_time = latest_summary.generated_at if latest_summary else None
+    # Responses in the LLM cache, and how often summary runs were served from it
+    cached_responses, cache_hits = db.session.query(
+        db.func.count(LLMResponse.key), db.func.coalesce(db.func.sum(LLMResponse.hits), 0)
+    ).one()
+
+    # Feeds that failed their last fetch, worst first
+    unhealthy_feeds = FeedHealth.query.join(Feed)\
+        .filter(FeedHealth.consecutive_failures > 0)\
+        .order_by(FeedHealth.consecutive_failures.desc(), Feed.name)\
+        .all()
+
+    # Collector runs of the last day, and the feeds that took longest in them
+    run_metrics = get_run_metrics(recent_time)
+    costly_feeds = get_feed_costs(recent_time, limit=5)
     
     return render_template('admin/dashboard.html',
         articles_count=articles_count,
         last_collection_time=last_collection_time,
         summaries_count=summaries_count,
-        last_summary_time=last_summary_time
+        last_summary_time=last_summary_time,
+        cached_responses=cached_responses,
+        cache_hits=cache_hits,
+        unhealthy_feeds=unhealthy_feeds,
+        run_metrics=run_metrics,
+        costly_feeds=costly_feeds
+    )
+
+@auth.route('/admin/feed-metrics')
+@admin_required
+def feed_metrics():
+    """Collector cost and yield over time: per run, per feed, or for one feed."""
+    from app.models import Feed
+    from datetime import timedelta
+
+    days = request.args.get('days', 7, type=int)
+    days = max(1, min(days, current_app.config['FEED_METRICS_RETENTION_DAYS']))
+    since = datetime.utcnow() - timedelta(days=days)
+
+    feed = None
+    history = []
+    feed_id = request.args.get('feed_id', type=int)
+    if feed_id is not None:
+        feed = Feed.query.get_or_404(feed_id)
+        history = get_feed_metric_history(feed_id, since)
+
+    return render_template('admin/feed_metrics.html',
+        days=days,
+        feed=feed,
+        history=history,
+        run_metrics=get_run_metrics(since, feed_id=feed_id),
+        feed_costs=get_feed_costs(since) if feed is None else []
     )
 
 @auth.route('/admin/users')
@@ -274,7 +316,7 @@ def manage_content():
         return render_template(
             'admin/manage_content.html',
             summaries=formatted_summaries,
-            articles=[(article[0], article[1], article[2], strip_html(article[3]), 
+            articles=[(article[0], article[1], article[2], article[3] or '', 
                       datetime.fromisoformat(str(article[4])).strftime('%B %d, %Y'))
                      for article in articles]
         )
@@ -3,15 +3,11 @@ from datetime import datetime
 from app.utils.database import get_all_summary_dates, get_latest_summary, get_summary_by_id, get_recent_articles
 from app.utils.auth import requires_auth
 import logging
-import re
 import json
 
 logger = logging.getLogger(__name__)
 web = Blueprint('web', __name__)
 
-def strip_html(text):
-    return re.sub('<[^<]+?>', '', text)
-
 def get_formatted_summary(summary_id=None):
     """Helper function to get and format summary data.
     
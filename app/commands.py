@@ -1,7 +1,7 @@
 import click
 from flask.cli import with_appcontext
 from app.extensions import db
-from app.models import User, APIToken
+from app.models import User, APIToken, Feed
 
 @click.command('create-admin')
 @click.option('--username', prompt=True, help='Admin username')
@@ -75,7 +75,45 @@ def revoke_api_token(name):
     else:
         click.echo(f"Token not found: {name}")
 
+@click.group('feed')
+def feed_cli():
+    """Manage feeds."""
+    pass
+
+@feed_cli.command('priority')
+@click.argument('name')
+@click.option('--off', is_flag=True, help='Remove the priority flag')
+@with_appcontext
+def set_feed_priority(name, off):
+    """Flag a feed for more frequent polling."""
+    feed = Feed.query.filter_by(name=name).first()
+    if feed:
+        feed.priority = not off
+        # Let the collector pick up the new schedule on its next run
+        feed.next_poll_at = None
+        db.session.commit()
+        click.echo(f"{name}: priority {'off' if off else 'on'}")
+    else:
+        click.echo(f"Feed not found: {name}")
+
+@feed_cli.command('reset')
+@click.argument('name')
+@with_appcontext
+def reset_feed_health(name):
+    """Close a feed's circuit breaker so it is fetched on the next run."""
+    feed = Feed.query.filter_by(name=name).first()
+    if feed:
+        if feed.health:
+            feed.health.consecutive_failures = 0
+            feed.health.open_until = None
+        feed.next_poll_at = None
+        db.session.commit()
+        click.echo(f"{name}: circuit closed")
+    else:
+        click.echo(f"Feed not found: {name}")
+
 def init_app(app):
     """Register CLI commands with the app."""
     app.cli.add_command(create_admin_command)
-    app.cli.add_command(api_token_cli)
\ No newline at end of file
+    app.cli.add_command(api_token_cli)
+    app.cli.add_command(feed_cli)
\ No newline at end of file
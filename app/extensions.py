@@ -1,5 +1,12 @@
 from flask_sqlalchemy import SQLAlchemy
-from flask_migrate import Migrate
 
 db = SQLAlchemy()
-migrate = Migrate()
\ No newline at end of file
+
+def init_migrate(app):
+    """Attach Flask-Migrate to the web app.
+
+    Imported here rather than at module level because alembic is slow to import
+    and the cron workers never run migrations.
+    """
+    from flask_migrate import Migrate
+    Migrate(app, db)
@@ -1,7 +1,6 @@
 from .extensions import db
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from werkzeug.security import generate_password_hash, check_password_hash
-import jwt
 from flask import current_app
 import uuid
 import secrets
@@ -32,20 +31,206 @@ class Feed(db.Model):
     name = db.Column(db.String)
     category = db.Column(db.String)
     active = db.Column(db.Boolean, default=True)
+    # HTTP validators from the last successful fetch, used for conditional GETs
+    etag = db.Column(db.String)
+    last_modified = db.Column(db.String)
+    content_hash = db.Column(db.String(64))
+    # Newest entry ingested so far; entries older than this have already been seen
+    cursor_published = db.Column(db.DateTime)
+    cursor_guid = db.Column(db.String)
+    # Adaptive polling schedule; priority feeds are polled more often
+    priority = db.Column(db.Boolean, default=False)
+    poll_interval = db.Column(db.Integer)
+    next_poll_at = db.Column(db.DateTime)
+    # Collector currently fetching this feed, when collectors share the feed list
+    lease_owner = db.Column(db.String)
+    lease_expires_at = db.Column(db.DateTime)
     articles = db.relationship('Article', backref='feed', lazy=True)
 
+class FeedHealth(db.Model):
+    """Recent fetch outcomes of a feed, driving the collector's circuit breaker."""
+    __tablename__ = 'feed_health'
+
+    feed_id = db.Column(db.Integer, db.ForeignKey('feeds.id'), primary_key=True)
+    consecutive_failures = db.Column(db.Integer, nullable=False, default=0)
+    last_status = db.Column(db.Integer)
+    last_error = db.Column(db.String)
+    # Seconds taken by the last fetch
+    last_latency = db.Column(db.Float)
+    last_attempt_at = db.Column(db.DateTime)
+    last_success_at = db.Column(db.DateTime)
+    # While set in the future the feed is not fetched
+    open_until = db.Column(db.DateTime)
+
+    feed = db.relationship('Feed', backref=db.backref('health', uselist=False, cascade='all, delete-orphan'))
+
+class FeedRunMetric(db.Model):
+    """What fetching and storing one feed cost, and what it yielded, in one collector run."""
+    __tablename__ = 'feed_run_metrics'
+
+    id = db.Column(db.Integer, primary_key=True)
+    # Start of the collector run; rows of one run share it
+    run_started_at = db.Column(db.DateTime, nullable=False, index=True)
+    feed_id = db.Column(db.Integer, db.ForeignKey('feeds.id', ondelete='CASCADE'), nullable=False)
+    # poll, push (WebSub delivery) or replay (archived response)
+    source = db.Column(db.String(8), nullable=False, default='poll')
+    worker = db.Column(db.String)
+    status = db.Column(db.Integer)
+    error = db.Column(db.String)
+    not_modified = db.Column(db.Boolean, nullable=False, default=False)
+    unchanged = db.Column(db.Boolean, nullable=False, default=False)
+    # Seconds spent downloading, parsing, and deduplicating and inserting
+    fetch_time = db.Column(db.Float, nullable=False, default=0)
+    parse_time = db.Column(db.Float, nullable=False, default=0)
+    store_time = db.Column(db.Float, nullable=False, default=0)
+    bytes = db.Column(db.Integer, nullable=False, default=0)
+    entries_parsed = db.Column(db.Integer, nullable=False, default=0)
+    inserted = db.Column(db.Integer, nullable=False, default=0)
+    # Already stored, or seen earlier in the same run
+    duplicates = db.Column(db.Integer, nullable=False, default=0)
+    # Older than the feed's cutoff or cursor
+    stale = db.Column(db.Integer, nullable=False, default=0)
+    malformed = db.Column(db.Integer, nullable=False, default=0)
+    # Could not be inserted; the feed's cursor stays before them so they are retried
+    failed = db.Column(db.Integer, nullable=False, default=0)
+
+    feed = db.relationship('Feed')
+
+    __table_args__ = (
+        db.Index('ix_feed_run_metrics_feed_run', 'feed_id', 'run_started_at'),
+    )
+
+class WebSubSubscription(db.Model):
+    """A feed's subscription to its WebSub hub. While verified, updates are pushed to us."""
+    __tablename__ = 'websub_subscriptions'
+
+    feed_id = db.Column(db.Integer, db.ForeignKey('feeds.id'), primary_key=True)
+    hub_url = db.Column(db.String, nullable=False)
+    topic_url = db.Column(db.String, nullable=False)
+    # Key the hub signs pushed content with
+    secret = db.Column(db.String(64), nullable=False)
+    # pending until the hub verifies our intent, then verified; denied if the hub refuses
+    state = db.Column(db.String(16), nullable=False, default='pending')
+    last_error = db.Column(db.String)
+    requested_at = db.Column(db.DateTime)
+    verified_at = db.Column(db.DateTime)
+    expires_at = db.Column(db.DateTime)
+    last_push_at = db.Column(db.DateTime)
+
+    feed = db.relationship('Feed', backref=db.backref('websub', uselist=False, cascade='all, delete-orphan'))
+
+    def is_active(self, now):
+        """True while the hub is pushing updates for this feed."""
+        if self.state != 'verified':
+            return False
+        expires_at = self.expires_at
+        if expires_at is not None and expires_at.tzinfo is None:
+            expires_at = expires_at.replace(tzinfo=timezone.utc)
+        return expires_at is None or expires_at > now
+
+    def awaiting_verification(self):
+        """True while a subscription request of ours is waiting for the hub to verify it.
+
+        That is a new or retried subscription, or a renewal requested since the
+        last verification. A hub calling back at any other time is not answering us.
+        """
+        if self.state == 'pending':
+            return True
+        if self.state != 'verified' or self.requested_at is None:
+            return False
+        if self.verified_at is None:
+            return True
+        # All times are UTC; only those loaded back from the database are naive
+        return self.requested_at.replace(tzinfo=None) > self.verified_at.replace(tzinfo=None)
+
+class WebSubDelivery(db.Model):
+    """Feed content pushed by a hub, waiting for the collector to ingest it."""
+    __tablename__ = 'websub_deliveries'
+
+    id = db.Column(db.Integer, primary_key=True)
+    feed_id = db.Column(db.Integer, db.ForeignKey('feeds.id', ondelete='CASCADE'), nullable=False, index=True)
+    received_at = db.Column(db.DateTime, nullable=False)
+    content_type = db.Column(db.String)
+    body = db.Column(db.LargeBinary, nullable=False)
+
+    feed = db.relationship('Feed')
+
 class Article(db.Model):
     __tablename__ = 'articles'
     
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     feed_id = db.Column(db.Integer, db.ForeignKey('feeds.id'))
     title = db.Column(db.String)
-    url = db.Column(db.String, unique=True)
+    url = db.Column(db.String)
+    # Identity keys: hash of the canonical URL, and of the entry GUID within its feed
+    url_hash = db.Column(db.String(32), unique=True, index=True)
+    guid = db.Column(db.String)
+    guid_hash = db.Column(db.String(32), unique=True, index=True)
     published = db.Column(db.DateTime)
-    summary = db.Column(db.Text)
-    content = db.Column(db.Text)
+    # Inline bodies; NULL when they are stored compressed in article_bodies.
+    # Deferred so listings and summary queries do not read them.
+    summary = db.deferred(db.Column(db.Text))
+    content = db.deferred(db.Column(db.Text))
     author = db.Column(db.String)
+    # Derived at ingest from the summary (or content): tag-free text for prompts and listings
+    plaintext = db.Column(db.Text)
+    word_count = db.Column(db.Integer)
+    excerpt = db.Column(db.String)
+    # SimHash of title and summary, for near-duplicate detection
+    simhash = db.Column(db.BigInteger)
+
+    body = db.relationship('ArticleBody', uselist=False, cascade='all, delete-orphan')
+
+    def body_text(self, field):
+        """The summary or content as collected, wherever it is stored.
+
+        Both the inline column and the compressed body are loaded on first
+        access only; read bodies through this rather than the columns.
+        """
+        if self.body is not None:
+            return self.body.text(field)
+        return getattr(self, field) or ''
+
+class ArticleBody(db.Model):
+    """An article's summary and content, compressed and kept out of the articles table."""
+    __tablename__ = 'article_bodies'
+
+    article_id = db.Column(db.Integer, db.ForeignKey('articles.id', ondelete='CASCADE'), primary_key=True)
+    codec = db.Column(db.String(8), nullable=False)
+    summary = db.Column(db.LargeBinary)
+    content = db.Column(db.LargeBinary)
+
+    def text(self, field):
+        # Imported here: app.utils imports the models
+        from app.utils.compression import decompress_text
+        return decompress_text(getattr(self, field), self.codec)
+
+class ArticleSimhashBand(db.Model):
+    """LSH index over article SimHashes: one row per band of each fingerprint."""
+    __tablename__ = 'article_simhash_bands'
+
+    article_id = db.Column(db.Integer, db.ForeignKey('articles.id', ondelete='CASCADE'), primary_key=True)
+    band = db.Column(db.SmallInteger, primary_key=True)
+    bucket = db.Column(db.Integer, nullable=False)
+
+    __table_args__ = (
+        db.Index('ix_article_simhash_bands_band_bucket', 'band', 'bucket'),
+    )
     
+class ArticleDigest(db.Model):
+    """A compact digest of one article, made by the LLM once and reused by every summary it appears in."""
+    __tablename__ = 'article_digests'
+
+    article_id = db.Column(db.Integer, db.ForeignKey('articles.id', ondelete='CASCADE'), primary_key=True)
+    # One or two sentences on what happened
+    digest = db.Column(db.Text, nullable=False)
+    key_facts = db.Column(db.JSON, nullable=False)
+    entities = db.Column(db.JSON, nullable=False)
+    # A task for a security team, if the article suggests one
+    action = db.Column(db.Text)
+    model = db.Column(db.String, nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False)
+
 class DailySummary(db.Model):
     __tablename__ = 'daily_summaries'
     
@@ -57,6 +242,51 @@ class DailySummary(db.Model):
     commentary = db.Column(db.Text)
     summary_type = db.Column(db.String, nullable=False, default='daily')
 
+    covered_articles = db.relationship('DailySummaryArticle', cascade='all, delete-orphan')
+
+class DailySummaryArticle(db.Model):
+    """An article a summary covered, so the weekly summary only reads the articles no daily did."""
+    __tablename__ = 'daily_summary_articles'
+
+    summary_id = db.Column(db.Integer, db.ForeignKey('daily_summaries.id', ondelete='CASCADE'), primary_key=True)
+    article_id = db.Column(db.Integer, db.ForeignKey('articles.id', ondelete='CASCADE'), primary_key=True)
+
+class SummaryBatch(db.Model):
+    """A summary submitted as a Message Batch, from submission until its results are stored."""
+    __tablename__ = 'summary_batches'
+
+    id = db.Column(db.Integer, primary_key=True)
+    batch_id = db.Column(db.String, unique=True)
+    date = db.Column(db.String, nullable=False)
+    summary_type = db.Column(db.String, nullable=False)
+    # submitted, collected or failed
+    status = db.Column(db.String, nullable=False, default='submitted', index=True)
+    # custom_id -> {category, cache key, covered article ids}
+    requests = db.Column(db.JSON, nullable=False)
+    # Categories answered without the batch (cached or empty), by category
+    presets = db.Column(db.JSON, nullable=False)
+    request_counts = db.Column(db.JSON)
+    error = db.Column(db.Text)
+    submitted_at = db.Column(db.DateTime, nullable=False)
+    collected_at = db.Column(db.DateTime)
+    summary_id = db.Column(db.Integer, db.ForeignKey('daily_summaries.id', ondelete='SET NULL'))
+
+class LLMResponse(db.Model):
+    """A cached Messages API response, keyed by a hash of the request that produced it."""
+    __tablename__ = 'llm_responses'
+
+    # SHA-256 of the model, system prompt, messages and parameters
+    key = db.Column(db.String(64), primary_key=True)
+    model = db.Column(db.String, nullable=False)
+    response = db.Column(db.Text, nullable=False)
+    input_tokens = db.Column(db.Integer)
+    output_tokens = db.Column(db.Integer)
+    # Bytes of the response, for size-based eviction
+    size = db.Column(db.Integer, nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, index=True)
+    last_used_at = db.Column(db.DateTime, nullable=False)
+    hits = db.Column(db.Integer, nullable=False, default=0)
+
 class User(db.Model):
     __tablename__ = 'users'
     
@@ -82,6 +312,8 @@ class User(db.Model):
         return check_password_hash(self.password_hash, password)
     
     def generate_auth_token(self, expires_in=86400):
+        # Imported here to keep jwt out of the cron workers' start-up path
+        import jwt
         return jwt.encode(
             {
                 'user_id': self.id,
@@ -1,7 +1,12 @@
 from .database import get_all_summary_dates, get_latest_summary, get_summary_by_id, get_recent_articles
 from .json import from_json, normalize_json_string, parse_double_encoded_json
 from .auth import requires_auth
-from .process import run_script_async
+from .process import run_script_async, start_script
+from .urls import canonicalize_url, url_hash, guid_hash
+from .text import html_to_text, normalize_article
+from .compression import compress_text, decompress_text
+from .websub import verify_signature
+from .metrics import get_run_metrics, get_feed_costs, get_feed_metric_history
 
 __all__ = [
     'from_json',
@@ -12,5 +17,17 @@ __all__ = [
     'normalize_json_string',
     'parse_double_encoded_json',
     'run_script_async',
-    'get_recent_articles'
+    'start_script',
+    'get_recent_articles',
+    'canonicalize_url',
+    'url_hash',
+    'guid_hash',
+    'html_to_text',
+    'normalize_article',
+    'compress_text',
+    'decompress_text',
+    'verify_signature',
+    'get_run_metrics',
+    'get_feed_costs',
+    'get_feed_metric_history'
 ]
\ No newline at end of file
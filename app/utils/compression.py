@@ -0,0 +1,69 @@
+import logging
+import zlib
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+ZLIB_LEVEL = 6
+ZSTD_LEVEL = 9
+# Codec names accepted for ARTICLE_BODY_CODEC; 'none' keeps bodies inline
+CODECS = ('zlib', 'zstd')
+
+
+def resolve_codec(name):
+    """The codec to store article bodies with, or None to keep them inline.
+
+    zstd needs the optional ``zstandard`` package; without it zlib is used.
+    """
+    name = (name or 'none').lower()
+    if name == 'none':
+        return None
+    if name not in CODECS:
+        raise ValueError(f"Unknown article body codec: {name}")
+    if name == 'zstd' and zstandard is None:
+        logger.warning("zstandard is not installed, compressing article bodies with zlib")
+        return 'zlib'
+    return name
+
+
+def compress_text(text, codec):
+    """Compress ``text`` with ``codec``. Empty text is stored as NULL."""
+    if not text:
+        return None
+    data = text.encode('utf-8')
+    if codec == 'zstd':
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    if codec == 'zlib':
+        return zlib.compress(data, ZLIB_LEVEL)
+    raise ValueError(f"Unknown article body codec: {codec}")
+
+
+def compress_body(summary, content, codec):
+    """Compressed (summary, content), or None if compressing would not save space.
+
+    Short summaries often come out of the compressor larger than they went
+    in; those articles are better kept inline.
+    """
+    blobs = (compress_text(summary, codec), compress_text(content, codec))
+    raw_size = len((summary or '').encode('utf-8')) + len((content or '').encode('utf-8'))
+    if sum(len(blob) for blob in blobs if blob) >= raw_size:
+        return None
+    return blobs
+
+
+def decompress_text(blob, codec):
+    if blob is None:
+        return ''
+    if codec == 'zstd':
+        if zstandard is None:
+            raise RuntimeError("zstandard is required to read zstd-compressed article bodies")
+        data = zstandard.ZstdDecompressor().decompress(blob)
+    elif codec == 'zlib':
+        data = zlib.decompress(blob)
+    else:
+        raise ValueError(f"Unknown article body codec: {codec}")
+    return data.decode('utf-8')
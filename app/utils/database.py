@@ -83,6 +83,6 @@ def get_recent_articles(limit=50):
         article.id,
         article.title,
         article.url,
-        article.summary,
+        article.excerpt,
         article.published
     ) for article in articles]
\ No newline at end of file
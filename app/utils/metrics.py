@@ -0,0 +1,94 @@
+from sqlalchemy import case, func, or_
+from ..extensions import db
+from ..models import Feed, FeedRunMetric
+
+
+def _failed():
+    return case((or_(FeedRunMetric.error.isnot(None), FeedRunMetric.status >= 400), 1), else_=0)
+
+
+def get_run_metrics(since, feed_id=None):
+    """Per-run totals since ``since``, oldest first, optionally for a single feed."""
+    query = db.session.query(
+        FeedRunMetric.run_started_at,
+        func.count(FeedRunMetric.id),
+        func.sum(FeedRunMetric.fetch_time),
+        func.sum(FeedRunMetric.parse_time),
+        func.sum(FeedRunMetric.store_time),
+        func.sum(FeedRunMetric.bytes),
+        func.sum(FeedRunMetric.entries_parsed),
+        func.sum(FeedRunMetric.inserted),
+        func.sum(FeedRunMetric.duplicates),
+        func.sum(FeedRunMetric.stale),
+        func.sum(_failed()),
+        func.sum(case((or_(FeedRunMetric.not_modified, FeedRunMetric.unchanged), 1), else_=0))
+    ).filter(FeedRunMetric.run_started_at >= since)
+    if feed_id is not None:
+        query = query.filter(FeedRunMetric.feed_id == feed_id)
+    rows = query.group_by(FeedRunMetric.run_started_at)\
+        .order_by(FeedRunMetric.run_started_at)\
+        .all()
+
+    return [{
+        'run_started_at': run_started_at,
+        'feeds': feeds,
+        'fetch_time': fetch_time or 0.0,
+        'parse_time': parse_time or 0.0,
+        'store_time': store_time or 0.0,
+        'bytes': total_bytes or 0,
+        'entries_parsed': entries_parsed or 0,
+        'inserted': inserted or 0,
+        'duplicates': duplicates or 0,
+        'stale': stale or 0,
+        'failed': failed or 0,
+        'unchanged': unchanged or 0
+    } for (run_started_at, feeds, fetch_time, parse_time, store_time, total_bytes,
+           entries_parsed, inserted, duplicates, stale, failed, unchanged) in rows]
+
+
+def get_feed_costs(since, limit=25):
+    """Feeds ranked by the time they took since ``since``, most expensive first."""
+    total_time = func.sum(FeedRunMetric.fetch_time + FeedRunMetric.parse_time + FeedRunMetric.store_time)
+    rows = db.session.query(
+        Feed.id,
+        Feed.name,
+        func.count(FeedRunMetric.id),
+        total_time,
+        func.avg(FeedRunMetric.fetch_time),
+        func.max(FeedRunMetric.fetch_time),
+        func.avg(FeedRunMetric.bytes),
+        func.sum(FeedRunMetric.entries_parsed),
+        func.sum(FeedRunMetric.inserted),
+        func.sum(FeedRunMetric.duplicates),
+        func.sum(FeedRunMetric.stale),
+        func.sum(_failed())
+    ).join(FeedRunMetric, FeedRunMetric.feed_id == Feed.id)\
+        .filter(FeedRunMetric.run_started_at >= since)\
+        .group_by(Feed.id, Feed.name)\
+        .order_by(total_time.desc())\
+        .limit(limit)\
+        .all()
+
+    return [{
+        'feed_id': feed_id,
+        'name': name,
+        'fetches': fetches,
+        'total_time': total or 0.0,
+        'avg_fetch_time': avg_fetch or 0.0,
+        'max_fetch_time': max_fetch or 0.0,
+        'avg_bytes': int(avg_bytes or 0),
+        'entries_parsed': entries_parsed or 0,
+        'inserted': inserted or 0,
+        'duplicates': duplicates or 0,
+        'stale': stale or 0,
+        'failed': failed or 0
+    } for (feed_id, name, fetches, total, avg_fetch, max_fetch, avg_bytes,
+           entries_parsed, inserted, duplicates, stale, failed) in rows]
+
+
+def get_feed_metric_history(feed_id, since):
+    """Every metrics row of one feed since ``since``, oldest first."""
+    return FeedRunMetric.query.filter(
+        FeedRunMetric.feed_id == feed_id,
+        FeedRunMetric.run_started_at >= since
+    ).order_by(FeedRunMetric.run_started_at).all()
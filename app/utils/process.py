@@ -6,7 +6,12 @@ import logging
 
 logger = logging.getLogger(__name__)
 
-def run_script_async(script_path, args):
+def start_script(script_path, args, on_exit=None):
+    """Start a script in the background and return its Popen handle.
+
+    Its output is logged once it exits, after which ``on_exit`` is called
+    with the handle.
+    """
     try:
         cmd = [sys.executable, script_path] + args
         process = subprocess.Popen(
@@ -22,10 +27,15 @@ def run_script_async(script_path, args):
                 logger.error(f"Script failed with error: {stderr.decode()}")
             else:
                 logger.info(f"Script completed successfully: {stdout.decode()}")
+            if on_exit is not None:
+                on_exit(process)
                 
         Thread(target=monitor_process).start()
-        return process.pid
+        return process
         
     except Exception as e:
         logger.error(f"Failed to start script: {str(e)}")
-        raise
\ No newline at end of file
+        raise
+
+def run_script_async(script_path, args):
+    return start_script(script_path, args).pid
@@ -0,0 +1,68 @@
+import re
+
+import lxml.etree
+import lxml.html
+
+EXCERPT_LENGTH = 300
+
+# Elements whose text is never part of the article
+DROP_TAGS = ('script', 'style', 'noscript', 'template', 'iframe', 'object', 'embed')
+# Elements that separate words, so their text must not run into the next
+BLOCK_TAGS = {
+    'address', 'article', 'aside', 'blockquote', 'br', 'dd', 'div', 'dl', 'dt',
+    'figcaption', 'figure', 'footer', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'header',
+    'hr', 'li', 'ol', 'p', 'pre', 'section', 'table', 'td', 'th', 'tr', 'ul',
+}
+
+_WHITESPACE_RE = re.compile(r'\s+')
+_TAG_RE = re.compile(r'<[^>]+>')
+
+
+def html_to_text(markup):
+    """Plain text of an HTML fragment, with whitespace collapsed.
+
+    Scripts, styles and embedded objects are removed and block elements are
+    kept apart by a space. Entities are decoded by the parser. Markup lxml
+    cannot parse falls back to stripping tags.
+    """
+    if not markup or not markup.strip():
+        return ''
+    try:
+        root = lxml.html.fragment_fromstring(markup, create_parent='div')
+    except (lxml.etree.ParserError, ValueError):
+        return _WHITESPACE_RE.sub(' ', _TAG_RE.sub(' ', markup)).strip()
+
+    for element in list(root.iter(*DROP_TAGS)):
+        element.drop_tree()
+    for element in root.iter():
+        if isinstance(element.tag, str) and element.tag in BLOCK_TAGS:
+            element.tail = ' ' + (element.tail or '')
+    return _WHITESPACE_RE.sub(' ', root.text_content()).strip()
+
+
+def word_count(text):
+    return len(text.split()) if text else 0
+
+
+def excerpt(text, length=EXCERPT_LENGTH):
+    """``text`` cut to at most ``length`` characters at a word boundary."""
+    if not text or len(text) <= length:
+        return text or ''
+    cut = text[:length - 1]
+    if ' ' in cut:
+        cut = cut.rsplit(' ', 1)[0]
+    return cut.rstrip(' .,;:-') + '…'
+
+
+def normalize_article(summary, content=''):
+    """The plaintext, word count and excerpt stored with an article.
+
+    The plaintext is taken from the summary, or from the content when a feed
+    only publishes the full body.
+    """
+    text = html_to_text(summary) or html_to_text(content)
+    return {
+        'plaintext': text,
+        'word_count': word_count(text),
+        'excerpt': excerpt(text),
+    }
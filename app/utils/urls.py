@@ -0,0 +1,65 @@
+import hashlib
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# Query parameters that only identify the campaign or click, never the article
+TRACKING_PARAMS = {
+    'fbclid', 'gclid', 'dclid', 'msclkid', 'yclid', 'igshid', 'mc_cid', 'mc_eid',
+    '_hsenc', '_hsmi', 'mkt_tok', 'ref_src', 'cmpid', 'ncid', 'sr_share',
+}
+TRACKING_PREFIXES = ('utm_',)
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+HASH_SIZE = 16  # bytes, stored as 32 hex characters
+
+
+def canonicalize_url(url):
+    """Normalise an article URL so trivially different links compare equal.
+
+    http and https are treated alike, the host is lower-cased with any
+    ``www.`` prefix and default port removed, tracking parameters and the
+    fragment are dropped, the remaining query is sorted and trailing slashes
+    are stripped from the path. The result identifies an article; it is not
+    meant to be fetched.
+    """
+    url = (url or '').strip()
+    if not url:
+        return ''
+    try:
+        parts = urlsplit(url)
+        port = parts.port
+    except ValueError:
+        return url
+
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').rstrip('.')
+    if host.startswith('www.'):
+        host = host[4:]
+    if port and port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{port}"
+    if scheme in DEFAULT_PORTS:
+        scheme = 'https'
+
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS and not key.lower().startswith(TRACKING_PREFIXES)
+    )
+    return urlunsplit((scheme, host, parts.path.rstrip('/'), urlencode(query), ''))
+
+
+def identity_hash(value):
+    """Fixed-width hex digest used as a compact index key."""
+    return hashlib.blake2b(value.encode('utf-8'), digest_size=HASH_SIZE).hexdigest()
+
+
+def url_hash(url):
+    """Identity hash of an article URL, after canonicalisation."""
+    canonical = canonicalize_url(url)
+    if not canonical:
+        return None
+    return identity_hash(canonical)
+
+
+def guid_hash(feed_id, guid):
+    """Identity hash of an entry GUID. GUIDs are only unique within their feed."""
+    if not guid:
+        return None
+    return identity_hash(f"{feed_id}\n{guid.strip()}")
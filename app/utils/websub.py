@@ -0,0 +1,22 @@
+import hashlib
+import hmac
+
+# X-Hub-Signature algorithms a hub may use, strongest first
+SIGNATURE_ALGORITHMS = ('sha512', 'sha384', 'sha256', 'sha1')
+
+
+def sign(secret, body, algorithm='sha256'):
+    """The X-Hub-Signature header value for ``body``."""
+    digest = hmac.new(secret.encode('utf-8'), body, getattr(hashlib, algorithm)).hexdigest()
+    return f"{algorithm}={digest}"
+
+
+def verify_signature(secret, header, body):
+    """Check an X-Hub-Signature header against the body and the subscription secret."""
+    if not secret or not header or '=' not in header:
+        return False
+    algorithm, digest = header.split('=', 1)
+    algorithm = algorithm.strip().lower()
+    if algorithm not in SIGNATURE_ALGORITHMS:
+        return False
+    return hmac.compare_digest(sign(secret, body, algorithm), f"{algorithm}={digest.strip().lower()}")
@@ -26,6 +26,57 @@ class Config:
     # App settings
     ITEMS_PER_PAGE = int(os.environ.get('ITEMS_PER_PAGE', 10))
 
+    # Feed collection
+    # Oldest entry the collector will ingest, however far behind a feed's cursor is
+    FEED_MAX_LOOKBACK_HOURS = int(os.environ.get('FEED_MAX_LOOKBACK_HOURS', 72))
+    # How far before a feed's cursor to re-check, to catch backdated entries
+    FEED_CURSOR_OVERLAP_HOURS = int(os.environ.get('FEED_CURSOR_OVERLAP_HOURS', 6))
+    # Bounds for the adaptive per-feed polling interval
+    FEED_MIN_POLL_MINUTES = int(os.environ.get('FEED_MIN_POLL_MINUTES', 5))
+    FEED_MAX_POLL_MINUTES = int(os.environ.get('FEED_MAX_POLL_MINUTES', 1440))
+    # Priority feeds are polled this many times more often
+    FEED_PRIORITY_FACTOR = int(os.environ.get('FEED_PRIORITY_FACTOR', 4))
+    # Days of article history used to learn each feed's publication rate
+    FEED_SCHEDULE_HISTORY_DAYS = int(os.environ.get('FEED_SCHEDULE_HISTORY_DAYS', 7))
+    # Consecutive failures before a feed's circuit opens, and the backoff that follows
+    FEED_FAILURE_THRESHOLD = int(os.environ.get('FEED_FAILURE_THRESHOLD', 3))
+    FEED_BACKOFF_MINUTES = int(os.environ.get('FEED_BACKOFF_MINUTES', 30))
+    FEED_MAX_BACKOFF_HOURS = int(os.environ.get('FEED_MAX_BACKOFF_HOURS', 24))
+    # Articles whose SimHashes differ in at most this many bits are summarised as one story
+    NEAR_DUPLICATE_MAX_DISTANCE = int(os.environ.get('NEAR_DUPLICATE_MAX_DISTANCE', 10))
+    # Feed leases of collectors sharing the feed list: lease length, and feeds claimed at a time
+    FEED_LEASE_SECONDS = int(os.environ.get('FEED_LEASE_SECONDS', 600))
+    FEED_LEASE_BATCH = int(os.environ.get('FEED_LEASE_BATCH', 25))
+    # Days of per-feed collector run metrics kept for the admin dashboard
+    FEED_METRICS_RETENTION_DAYS = int(os.environ.get('FEED_METRICS_RETENTION_DAYS', 30))
+    # WebSub: public base URL hubs push to (unset disables subscribing), and the lease we ask for
+    WEBSUB_CALLBACK_URL = os.environ.get('WEBSUB_CALLBACK_URL')
+    WEBSUB_LEASE_SECONDS = int(os.environ.get('WEBSUB_LEASE_SECONDS', 10 * 24 * 3600))
+    # Subscriptions are renewed this close to expiry; keep it above the safety-net poll interval
+    WEBSUB_RENEW_BEFORE_HOURS = int(os.environ.get('WEBSUB_RENEW_BEFORE_HOURS', 48))
+    # Feeds whose updates are pushed are still polled this often, in case a push goes missing
+    WEBSUB_POLL_HOURS = int(os.environ.get('WEBSUB_POLL_HOURS', 12))
+    # Largest pushed body accepted
+    WEBSUB_MAX_PUSH_BYTES = int(os.environ.get('WEBSUB_MAX_PUSH_BYTES', 5 * 1024 * 1024))
+    # How new article summaries and content are stored: none (inline text), zlib or zstd (needs zstandard)
+    ARTICLE_BODY_CODEC = os.environ.get('ARTICLE_BODY_CODEC', 'none')
+
+    # Summarisation: Messages API base URL (unset for Anthropic's), and categories summarised at once
+    ANTHROPIC_BASE_URL = os.environ.get('ANTHROPIC_BASE_URL')
+    SUMMARY_CONCURRENCY = int(os.environ.get('SUMMARY_CONCURRENCY', 4))
+    # Client-side limits matching the account's rate limits; 0 relies on the rate-limit headers alone
+    SUMMARY_REQUESTS_PER_MINUTE = int(os.environ.get('SUMMARY_REQUESTS_PER_MINUTE', 50))
+    SUMMARY_INPUT_TOKENS_PER_MINUTE = int(os.environ.get('SUMMARY_INPUT_TOKENS_PER_MINUTE', 40000))
+    # Retries of a request answered 429 (rate limited) or 529 (overloaded)
+    SUMMARY_MAX_RETRIES = int(os.environ.get('SUMMARY_MAX_RETRIES', 5))
+    # Cached summary responses are reused for this long, and the cache is kept under this size
+    LLM_CACHE_TTL_HOURS = int(os.environ.get('LLM_CACHE_TTL_HOURS', 72))
+    LLM_CACHE_MAX_MB = int(os.environ.get('LLM_CACHE_MAX_MB', 50))
+    # Articles digested per request; each article is digested once and its digest reused by every summary
+    SUMMARY_DIGEST_BATCH_SIZE = int(os.environ.get('SUMMARY_DIGEST_BATCH_SIZE', 10))
+    # Estimated input tokens of each category's summary prompt; the most relevant articles are packed to fit
+    SUMMARY_PROMPT_TOKEN_BUDGET = int(os.environ.get('SUMMARY_PROMPT_TOKEN_BUDGET', 8000))
+
     # Authentication settings
     AUTH_USERNAME = os.environ.get('AUTH_USERNAME', 'admin')
     AUTH_PASSWORD = os.environ.get('AUTH_PASSWORD', 'We22TvkW9Loiqs7KZ8Fa')
@@ -0,0 +1,412 @@
+"""Measure collector throughput against a local fixture server.
+
+A throwaway HTTP server (in its own process) serves synthetic RSS 2.0 and
+Atom feeds with configurable size, latency, error rate and conditional GET
+support. ``FeedCollector`` is run against it for a few rounds on a fresh
+database and each round's feeds/sec, entries/sec, database round-trips and
+the collector's peak RSS are reported as JSON, so results can be compared
+across commits:
+
+    python benchmark_collector.py --feeds 200 --entries 30 --latency 50 --output bench.json
+
+The first round ingests everything; later rounds measure the steady state
+where most feeds answer 304 or return an unchanged body. ``--database`` runs
+against another database, such as a local PostgreSQL; all of its tables are
+dropped and recreated.
+
+With ``--workers N`` each round is run by N collector processes sharing the
+feed list through leases. Every feed is made due at the start of a round,
+and the fixture server counts requests per feed, so the report shows any
+feed fetched more than once:
+
+    python benchmark_collector.py --workers 4 --database postgresql://localhost/bench
+"""
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from datetime import datetime, timezone, timedelta
+from email.utils import format_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from xml.sax.saxutils import escape
+
+WORDS = ('threat actor ransomware patch exploit vulnerability advisory botnet phishing malware '
+         'zero-day credential supply chain intrusion campaign loader backdoor firmware cloud '
+         'identity disclosure researchers attackers vendor update critical severity').split()
+
+
+def _text(rng, size):
+    words = []
+    length = 0
+    while length < size:
+        word = rng.choice(WORDS)
+        words.append(word)
+        length += len(word) + 1
+    return ' '.join(words)
+
+
+def build_feed(n, options, generation=0):
+    """Synthetic feed ``n``: RSS 2.0 for even feeds, Atom for odd ones when ``mixed``."""
+    rng = random.Random(n)
+    now = options['epoch']
+    atom = options['format'] == 'atom' or (options['format'] == 'mixed' and n % 2)
+    base = f"http://fixture.invalid/{n}"
+    entries = []
+    for k in range(options['entries']):
+        # Churning feeds gain a new entry on every request
+        k_id = k + generation
+        published = now - timedelta(minutes=20 * k)
+        title = escape(f"Feed {n} story {k_id}: {_text(rng, 40)}")
+        body = escape(f"<p>{_text(rng, options['entry_bytes'])}</p>")
+        if atom:
+            entries.append(
+                f"<entry><title>{title}</title><link href=\"{base}/{k_id}\"/>"
+                f"<id>tag:fixture,2026:{n}:{k_id}</id><updated>{published.isoformat()}</updated>"
+                f"<summary type=\"html\">{body}</summary><author><name>Fixture</name></author></entry>")
+        else:
+            entries.append(
+                f"<item><title>{title}</title><link>{base}/{k_id}</link>"
+                f"<guid isPermaLink=\"false\">fixture-{n}-{k_id}</guid>"
+                f"<pubDate>{format_datetime(published)}</pubDate><description>{body}</description></item>")
+
+    if atom:
+        document = (f"<?xml version=\"1.0\" encoding=\"utf-8\"?>"
+                    f"<feed xmlns=\"http://www.w3.org/2005/Atom\"><title>Fixture {n}</title>"
+                    f"<id>tag:fixture,2026:{n}</id><updated>{now.isoformat()}</updated>"
+                    f"{''.join(entries)}</feed>")
+    else:
+        document = (f"<?xml version=\"1.0\" encoding=\"utf-8\"?><rss version=\"2.0\"><channel>"
+                    f"<title>Fixture {n}</title><link>{base}</link>{''.join(entries)}</channel></rss>")
+    return document.encode('utf-8'), atom
+
+
+def serve(port_queue, options):
+    """Run the fixture server until terminated; reports its port through ``port_queue``."""
+    rng = random.Random(options['seed'])
+    generations = {}
+    requests = {}
+    requests_lock = threading.Lock()
+
+    class FixtureHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            if self.path == '/stats':
+                # Requests per feed since the last call
+                with requests_lock:
+                    body = json.dumps(requests).encode('utf-8')
+                    requests.clear()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                return
+            try:
+                n = int(self.path.rstrip('/').rsplit('/', 1)[-1])
+            except ValueError:
+                self._empty(404)
+                return
+            with requests_lock:
+                requests[n] = requests.get(n, 0) + 1
+            time.sleep(options['latency'] / 1000 * (0.5 + rng.random()))
+            if rng.random() < options['error_rate']:
+                self._empty(rng.choice((500, 502, 503)))
+                return
+
+            generation = 0
+            if n % 100 < options['churn'] * 100:
+                generation = generations[n] = generations.get(n, -1) + 1
+            body, atom = build_feed(n, options, generation)
+            conditional = n % 100 < options['conditional'] * 100
+            etag = f'"{hashlib.md5(body).hexdigest()}"'
+            if conditional and self.headers.get('If-None-Match') == etag:
+                self._empty(304)
+                return
+
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/atom+xml' if atom else 'application/rss+xml')
+            self.send_header('Content-Length', str(len(body)))
+            if conditional:
+                self.send_header('ETag', etag)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _empty(self, status):
+            self.send_response(status)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FixtureHandler)
+    server.daemon_threads = True
+    port_queue.put(server.server_address[1])
+    server.serve_forever()
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, cwd=Path(__file__).resolve().parent).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def _fetcher(args):
+    from feed_fetcher import FeedFetcher
+
+    return FeedFetcher(
+        concurrency=args.concurrency,
+        # Every fixture feed is on one host, so the per-host cap would otherwise be the bottleneck
+        per_host=args.per_host or args.concurrency,
+        timeout=args.timeout,
+        parse_workers=args.parse_workers,
+        stream_parse=args.stream_parse
+    )
+
+
+def _count_statements(engine):
+    """Start counting the statements sent to ``engine``; returns the live counter."""
+    from sqlalchemy import event
+
+    round_trips = [0]
+
+    def count_statement(*args):
+        round_trips[0] += 1
+
+    event.listen(engine, 'before_cursor_execute', count_statement)
+    return round_trips
+
+
+def run_benchmark(args, port):
+    # The worker app reads its database from the environment when first created
+    os.environ['DATABASE_URL'] = args.database
+    from feed_collector import FeedCollector
+    from db_helper import Feed
+    from worker import peak_rss_mb
+
+    fetcher = _fetcher(args)
+    collector = FeedCollector(fetcher=fetcher)
+    db = collector.db
+    try:
+        db.drop_all()
+        db.create_all()
+        for n in range(args.feeds):
+            db.session.add(Feed(url=f"http://127.0.0.1:{port}/feed/{n}", name=f"Fixture {n}",
+                                category=('News', 'Research', 'Vulnerabilities')[n % 3], active=True))
+        db.session.commit()
+        db.session.remove()
+        if args.workers > 1:
+            # Free the pool before the worker processes connect
+            db.engine.dispose()
+            return run_workers(args, port), round(peak_rss_mb(), 1)
+
+        round_trips = _count_statements(db.engine)
+        rounds = []
+        for number in range(1, args.rounds + 1):
+            round_trips[0] = 0
+            collector.collect_articles(all_feeds=True)
+            stats = collector.last_run_stats
+            entries = sum(result.entry_count for result in collector.timings)
+            duration = stats['duration'] or 1e-9
+            rounds.append({
+                'round': number,
+                'duration': stats['duration'],
+                'feeds': stats['feeds_fetched'],
+                'feeds_per_sec': round(stats['feeds_fetched'] / duration, 1),
+                'entries_parsed': entries,
+                'entries_per_sec': round(entries / duration, 1),
+                'added': stats['added'],
+                'skipped': stats['skipped'],
+                'not_modified': stats['not_modified'],
+                'unchanged': stats['unchanged'],
+                'errors': stats['fetch_errors'],
+                'db_round_trips': round_trips[0],
+            })
+        return rounds, round(peak_rss_mb(), 1)
+    finally:
+        collector.close()
+        fetcher.close()
+
+
+def worker_round(args, index, results):
+    """One leased collector run in its own process; its stats go to ``results``."""
+    from feed_collector import FeedCollector
+    from worker import peak_rss_mb
+
+    fetcher = _fetcher(args)
+    collector = FeedCollector(fetcher=fetcher, lease=True, worker_id=f"bench-{index}")
+    try:
+        round_trips = _count_statements(collector.db.engine)
+        collector.collect_articles()
+        stats = collector.last_run_stats
+        results.put({
+            'worker': stats['worker'],
+            'duration': stats['duration'],
+            'feeds': stats['feeds_fetched'],
+            'entries_parsed': sum(result.entry_count for result in collector.timings),
+            'added': stats['added'],
+            'errors': stats['fetch_errors'],
+            'db_round_trips': round_trips[0],
+            'peak_rss_mb': round(peak_rss_mb(), 1),
+        })
+    finally:
+        collector.close()
+        fetcher.close()
+
+
+def run_workers(args, port):
+    """Rounds of ``args.workers`` collector processes claiming feeds from one database."""
+    from sqlalchemy import create_engine, text
+
+    engine = create_engine(args.database)
+    context = multiprocessing.get_context('spawn')
+    rounds = []
+    try:
+        for number in range(1, args.rounds + 1):
+            # Make every feed due, so the workers have the whole list to split
+            with engine.begin() as connection:
+                connection.execute(text('UPDATE feeds SET next_poll_at = NULL, '
+                                        'lease_owner = NULL, lease_expires_at = NULL'))
+            _server_requests(port)
+
+            results = context.Queue()
+            start = time.monotonic()
+            workers = [context.Process(target=worker_round, args=(args, index, results))
+                       for index in range(args.workers)]
+            for process in workers:
+                process.start()
+            per_worker = [results.get() for _ in workers]
+            for process in workers:
+                process.join()
+            duration = time.monotonic() - start
+
+            requests = _server_requests(port)
+            feeds = sum(worker['feeds'] for worker in per_worker)
+            entries = sum(worker['entries_parsed'] for worker in per_worker)
+            rounds.append({
+                'round': number,
+                'duration': round(duration, 3),
+                'feeds': feeds,
+                'feeds_per_sec': round(feeds / duration, 1),
+                'entries_parsed': entries,
+                'entries_per_sec': round(entries / duration, 1),
+                'added': sum(worker['added'] for worker in per_worker),
+                'errors': sum(worker['errors'] for worker in per_worker),
+                'feeds_requested': len(requests),
+                'double_fetches': sum(count - 1 for count in requests.values() if count > 1),
+                'workers': sorted(per_worker, key=lambda worker: worker['worker']),
+            })
+    finally:
+        engine.dispose()
+    return rounds
+
+
+def _server_requests(port):
+    """Requests per feed the fixture server has answered since the last call."""
+    with urllib.request.urlopen(f"http://127.0.0.1:{port}/stats", timeout=10) as response:
+        return json.loads(response.read())
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Feed collector throughput benchmark')
+    parser.add_argument('--feeds', type=int, default=100,
+                       help='Number of fixture feeds (default: 100)')
+    parser.add_argument('--entries', type=int, default=20,
+                       help='Entries per feed (default: 20)')
+    parser.add_argument('--entry-bytes', type=int, default=500,
+                       help='Approximate size of each entry description (default: 500)')
+    parser.add_argument('--format', choices=('rss', 'atom', 'mixed'), default='mixed',
+                       help='Feed format served (default: mixed)')
+    parser.add_argument('--latency', type=float, default=50,
+                       help='Mean response latency in milliseconds (default: 50)')
+    parser.add_argument('--error-rate', type=float, default=0.02,
+                       help='Fraction of requests answered with a 5xx (default: 0.02)')
+    parser.add_argument('--conditional', type=float, default=0.5,
+                       help='Fraction of feeds sending ETags and answering 304 (default: 0.5)')
+    parser.add_argument('--churn', type=float, default=0.1,
+                       help='Fraction of feeds that gain an entry on every request (default: 0.1)')
+    parser.add_argument('--rounds', type=int, default=3,
+                       help='Collector runs against the same database (default: 3)')
+    parser.add_argument('--workers', type=int, default=1,
+                       help='Collector processes sharing the feeds through leases (default: 1)')
+    parser.add_argument('--database',
+                       help='Database URL; all tables are dropped (default: a temporary SQLite file)')
+    parser.add_argument('--concurrency', type=int, default=16,
+                       help='Collector download concurrency (default: 16)')
+    parser.add_argument('--per-host', type=int, default=None,
+                       help='Per-host connection cap (default: same as --concurrency)')
+    parser.add_argument('--timeout', type=int, default=30,
+                       help='Per-feed timeout in seconds (default: 30)')
+    parser.add_argument('--parse-workers', type=int, default=None,
+                       help='Parse processes, 0 to parse in-thread (default: up to 4)')
+    parser.add_argument('--stream-parse', action='store_true',
+                       help='Use the streaming parser')
+    parser.add_argument('--seed', type=int, default=1,
+                       help='Seed for latency and error injection (default: 1)')
+    parser.add_argument('--output',
+                       help='Also write the JSON report to this file')
+
+    args = parser.parse_args()
+    tmp_dir = None
+    if not args.database:
+        tmp_dir = tempfile.TemporaryDirectory()
+        args.database = f"sqlite:///{Path(tmp_dir.name) / 'benchmark.db'}"
+
+    options = {
+        'entries': args.entries,
+        'entry_bytes': args.entry_bytes,
+        'format': args.format,
+        'latency': args.latency,
+        'error_rate': args.error_rate,
+        'conditional': args.conditional,
+        'churn': args.churn,
+        'seed': args.seed,
+        'epoch': datetime.now(timezone.utc).replace(microsecond=0),
+    }
+    port_queue = multiprocessing.Queue()
+    server = multiprocessing.Process(target=serve, args=(port_queue, options), daemon=True)
+    server.start()
+    try:
+        rounds, peak_rss = run_benchmark(args, port_queue.get(timeout=10))
+    finally:
+        server.terminate()
+        server.join()
+        if tmp_dir:
+            tmp_dir.cleanup()
+
+    report = {
+        'revision': git_revision(),
+        'created_at': datetime.now(timezone.utc).isoformat(),
+        'database': args.database.split(':', 1)[0] if tmp_dir is None else 'sqlite',
+        'config': {key: value for key, value in options.items() if key != 'epoch'} | {
+            'feeds': args.feeds,
+            'workers': args.workers,
+            'concurrency': args.concurrency,
+            'per_host': args.per_host or args.concurrency,
+            'parse_workers': args.parse_workers,
+            'stream_parse': args.stream_parse,
+        },
+        'rounds': rounds,
+        'peak_rss_mb': peak_rss,
+    }
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+
+
+if __name__ == '__main__':
+    main()
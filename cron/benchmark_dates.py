@@ -0,0 +1,108 @@
+"""Micro-benchmark of feed timestamp parsing.
+
+Parses a corpus of real-world date strings (``fixtures/date_strings.txt``)
+with dateutil, as the collector used to, and with ``date_parser`` cold and
+warm. Every result is checked against dateutil first; the script exits
+non-zero if any string parses differently.
+
+    python benchmark_dates.py --repeat 2000
+"""
+import argparse
+import json
+import sys
+import time
+import warnings
+from datetime import timezone
+from pathlib import Path
+
+from dateutil import parser as dateutil_parser
+
+from date_parser import TIMEZONE_INFO, TimestampParser
+
+CORPUS = Path(__file__).resolve().parent / 'fixtures' / 'date_strings.txt'
+
+
+def load_corpus(path):
+    with open(path) as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith('#')]
+
+
+def reference(value):
+    """The collector's original parse: dateutil, normalised to UTC."""
+    try:
+        with warnings.catch_warnings():
+            # dateutil warns about zone names it reads as UTC, such as 'UT'
+            warnings.simplefilter('ignore')
+            parsed = dateutil_parser.parse(value, tzinfos=TIMEZONE_INFO)
+    except (ValueError, OverflowError):
+        return None
+    if parsed.tzinfo is None:
+        return parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc)
+
+
+def time_per_call(func, values, repeat):
+    """Mean microseconds per call over ``repeat`` passes of the corpus."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for value in values:
+            func(value)
+    return (time.perf_counter() - start) / (repeat * len(values)) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Feed timestamp parsing benchmark')
+    parser.add_argument('--corpus', default=str(CORPUS),
+                       help='File of date strings, one per line (default: fixtures/date_strings.txt)')
+    parser.add_argument('--repeat', type=int, default=1000,
+                       help='Passes over the corpus per measurement (default: 1000)')
+    parser.add_argument('--json', action='store_true',
+                       help='Print results as JSON')
+
+    args = parser.parse_args()
+    values = load_corpus(args.corpus)
+
+    checker = TimestampParser()
+    mismatches = [
+        (value, expected, actual)
+        for value in values
+        for expected, actual in [(reference(value), checker.parse(value))]
+        if expected != actual
+    ]
+    paths = checker.stats()
+
+    # Cold: a fresh cache each pass, so every call takes a parse path
+    cold = TimestampParser()
+
+    def parse_cold(value):
+        return cold._parse(value)
+
+    warm = TimestampParser()
+    results = {
+        'strings': len(values),
+        'paths': {k: v for k, v in paths.items() if not k.startswith('cache_')},
+        'mismatches': len(mismatches),
+        'dateutil_us': round(time_per_call(reference, values, args.repeat), 2),
+        'fast_cold_us': round(time_per_call(parse_cold, values, args.repeat), 2),
+        'fast_warm_us': round(time_per_call(warm.parse, values, args.repeat), 2),
+    }
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"{results['strings']} date strings, parse paths: "
+              + ', '.join(f"{path} {count}" for path, count in sorted(results['paths'].items())))
+        print(f"  dateutil     {results['dateutil_us']:8.2f} us/parse")
+        print(f"  fast (cold)  {results['fast_cold_us']:8.2f} us/parse  "
+              f"({results['dateutil_us'] / results['fast_cold_us']:.1f}x)")
+        print(f"  fast (warm)  {results['fast_warm_us']:8.2f} us/parse  "
+              f"({results['dateutil_us'] / results['fast_warm_us']:.1f}x)")
+
+    for value, expected, actual in mismatches:
+        print(f"MISMATCH {value!r}: dateutil {expected}, fast path {actual}", file=sys.stderr)
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
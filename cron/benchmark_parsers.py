@@ -0,0 +1,160 @@
+"""Compare feedparser with the streaming parser on recorded fixture feeds.
+
+Each fixture is inflated to ``--items`` entries (copies of its own entries with
+older dates, the shape of a large archive feed) and parsed by:
+
+  feedparser   the existing parse path
+  stream       the streaming parser reading the whole document
+  stream+cut   the streaming parser stopping at a recency cutoff
+
+    python benchmark_parsers.py --items 500 --cutoff-hours 24 --gzip
+"""
+import argparse
+import copy
+import gzip
+import json
+import statistics
+import time
+from datetime import timedelta
+from email.utils import format_datetime
+from pathlib import Path
+
+from lxml import etree
+
+from date_parser import parse_timestamp
+from feed_fetcher import parse_feed_body
+from feed_stream_parser import ENTRY_TAGS, StreamParseError, stream_parse_feed, local_name
+
+FIXTURE_DIR = Path(__file__).resolve().parent / 'fixtures' / 'feeds'
+RFC822_TAGS = {'pubDate'}
+ISO_TAGS = {'published', 'updated', 'date', 'issued', 'modified'}
+
+
+def inflate(body, items):
+    """Repeat a feed's entries, each copy an hour older, until it has ``items`` entries.
+
+    Malformed fixtures are returned unchanged; they exist to exercise the fallback.
+    """
+    try:
+        root = etree.fromstring(body)
+    except etree.XMLSyntaxError:
+        return body
+    entries = [el for el in root.iter() if local_name(el.tag) in ENTRY_TAGS]
+    if not entries:
+        return body
+    parent = entries[-1].getparent()
+
+    for n in range(len(entries), items):
+        clone = copy.deepcopy(entries[n % len(entries)])
+        shift = timedelta(hours=n)
+        for child in clone.iter():
+            name = local_name(child.tag)
+            if name in ('link', 'guid', 'id') and child.text:
+                child.text = f"{child.text.strip()}#copy{n}"
+            elif name == 'link' and child.get('href'):
+                child.set('href', f"{child.get('href')}#copy{n}")
+            elif name in RFC822_TAGS | ISO_TAGS and child.text:
+                moved = parse_timestamp(child.text.strip())
+                if moved:
+                    moved -= shift
+                    child.text = format_datetime(moved) if name in RFC822_TAGS else moved.isoformat()
+        about = '{http://www.w3.org/1999/02/22-rdf-syntax-ns#}about'
+        if clone.get(about):
+            clone.set(about, f"{clone.get(about)}#copy{n}")
+        parent.append(clone)
+
+    return etree.tostring(root, xml_declaration=True, encoding='utf-8')
+
+
+def newest_timestamp(entries):
+    stamps = [parse_timestamp(e.get('published') or e.get('updated')) for e in entries]
+    return max((s for s in stamps if s), default=None)
+
+
+def time_parser(func, repeat):
+    timings = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings), result
+
+
+def benchmark_fixture(path, items, cutoff_hours, use_gzip, repeat):
+    body = inflate(path.read_bytes(), items)
+    plain_size = len(body)
+    if use_gzip:
+        body = gzip.compress(body)
+
+    feedparser_ms, baseline = time_parser(
+        lambda: parse_feed_body(gzip.decompress(body) if use_gzip else body, 'https://fixture.invalid/'),
+        repeat)
+    row = {
+        'fixture': path.name,
+        'bytes': plain_size,
+        'entries': len(baseline['entries']),
+        'feedparser_ms': round(feedparser_ms, 2),
+    }
+
+    try:
+        stream_ms, streamed = time_parser(lambda: stream_parse_feed(body), repeat)
+    except StreamParseError as e:
+        row['stream'] = f"fallback: {e}"
+        return row
+
+    newest = newest_timestamp(streamed['entries'])
+    cutoff = newest - timedelta(hours=cutoff_hours) if newest else None
+    cut_ms, cut = time_parser(lambda: stream_parse_feed(body, cutoff=cutoff), repeat)
+
+    baseline_links = [e.get('link') for e in baseline['entries']]
+    row.update({
+        'stream_ms': round(stream_ms, 2),
+        'stream_matches_feedparser': [e.get('link') for e in streamed['entries']] == baseline_links,
+        'stream_cut_ms': round(cut_ms, 2),
+        'stream_cut_entries': len(cut['entries']),
+        'speedup': round(feedparser_ms / cut_ms, 1) if cut_ms else None,
+    })
+    return row
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Feed parser benchmark')
+    parser.add_argument('--fixtures', default=str(FIXTURE_DIR),
+                       help='Directory of recorded feed documents (default: fixtures/feeds)')
+    parser.add_argument('--items', type=int, default=300,
+                       help='Inflate each fixture to this many entries (default: 300)')
+    parser.add_argument('--cutoff-hours', type=int, default=24,
+                       help='Recency cutoff for the early-terminating run (default: 24)')
+    parser.add_argument('--gzip', action='store_true',
+                       help='Gzip the documents to exercise incremental decompression')
+    parser.add_argument('--repeat', type=int, default=5,
+                       help='Runs per parser, the median is reported (default: 5)')
+    parser.add_argument('--json', action='store_true',
+                       help='Print results as JSON')
+
+    args = parser.parse_args()
+
+    rows = [
+        benchmark_fixture(path, args.items, args.cutoff_hours, args.gzip, args.repeat)
+        for path in sorted(Path(args.fixtures).glob('*.xml'))
+    ]
+
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return
+
+    for row in rows:
+        print(f"{row['fixture']}: {row['entries']} entries, {row['bytes']} bytes")
+        print(f"  feedparser   {row['feedparser_ms']:9.2f} ms")
+        if 'stream' in row:
+            print(f"  stream       {row['stream']}")
+            continue
+        match = 'same entries' if row['stream_matches_feedparser'] else 'ENTRIES DIFFER'
+        print(f"  stream       {row['stream_ms']:9.2f} ms  ({match})")
+        print(f"  stream+cut   {row['stream_cut_ms']:9.2f} ms  "
+              f"({row['stream_cut_entries']} entries, {row['speedup']}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+"""Measure cold-start import time of the web app and the cron workers.
+
+Each target is started in a fresh interpreter under ``python -X importtime``
+and the total import time is read from its report. The script exits non-zero
+when a target's median exceeds its budget, so it can guard start-up in CI:
+
+    python benchmark_startup.py --runs 5 --worker-budget 400 --web-budget 900
+
+``worker`` is the shared database set-up every cron job starts with;
+``collector`` and ``summary`` are the imports of the two cron entry points.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+CRON_DIR = Path(__file__).resolve().parent
+ROOT_DIR = CRON_DIR.parent
+
+TARGETS = {
+    'web': (ROOT_DIR, "from app import create_app; create_app('testing')"),
+    'worker': (CRON_DIR, "import db_helper; db_helper.get_db()"),
+    'collector': (CRON_DIR, "import feed_collector"),
+    'summary': (CRON_DIR, "import feed_summary"),
+}
+
+
+def parse_importtime(stderr):
+    """Total import time in milliseconds from ``-X importtime`` output.
+
+    Top-level imports are the lines whose module name is indented by a single
+    space; their cumulative times add up to the whole import phase.
+    """
+    total_us = 0
+    for line in stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        parts = line.split('|')
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue
+        name = parts[2]
+        if name.startswith(' ') and not name.startswith('  '):
+            total_us += int(parts[1])
+    return total_us / 1000
+
+
+def measure(target, runs):
+    cwd, code = TARGETS[target]
+    env = dict(os.environ)
+    env.setdefault('FLASK_ENV', 'testing')
+    env.setdefault('DATABASE_URL', 'sqlite:///:memory:')
+
+    import_ms, wall_ms = [], []
+    for _ in range(runs):
+        start = time.perf_counter()
+        proc = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', code],
+            cwd=cwd, env=env, capture_output=True, text=True
+        )
+        wall_ms.append((time.perf_counter() - start) * 1000)
+        if proc.returncode != 0:
+            raise RuntimeError(f"{target} failed to start:\n{proc.stderr[-2000:]}")
+        import_ms.append(parse_importtime(proc.stderr))
+
+    return {
+        'import_ms': round(statistics.median(import_ms), 1),
+        'wall_ms': round(statistics.median(wall_ms), 1),
+        'runs': runs,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Start-up time benchmark')
+    parser.add_argument('--runs', type=int, default=5,
+                       help='Fresh interpreters to start per target (default: 5)')
+    parser.add_argument('--web-budget', type=float, default=None,
+                       help='Fail if the web app median import time exceeds this many ms')
+    parser.add_argument('--worker-budget', type=float, default=None,
+                       help='Fail if the worker median import time exceeds this many ms')
+    parser.add_argument('--collector-budget', type=float, default=None,
+                       help='Fail if the feed collector median import time exceeds this many ms')
+    parser.add_argument('--summary-budget', type=float, default=None,
+                       help='Fail if the feed summary median import time exceeds this many ms')
+    parser.add_argument('--json', action='store_true',
+                       help='Print results as JSON')
+
+    args = parser.parse_args()
+    budgets = {'web': args.web_budget, 'worker': args.worker_budget,
+               'collector': args.collector_budget, 'summary': args.summary_budget}
+
+    results = {target: measure(target, args.runs) for target in TARGETS}
+    failed = [
+        target for target, result in results.items()
+        if budgets[target] is not None and result['import_ms'] > budgets[target]
+    ]
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for target, result in results.items():
+            budget = f" (budget {budgets[target]:.0f} ms)" if budgets[target] is not None else ''
+            print(f"{target:<9} imports {result['import_ms']:8.1f} ms  "
+                  f"process {result['wall_ms']:8.1f} ms{budget}")
+
+    if failed:
+        print(f"Start-up budget exceeded: {', '.join(failed)}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
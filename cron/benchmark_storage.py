@@ -0,0 +1,180 @@
+"""Size and throughput of article body storage, inline versus compressed.
+
+Bodies are taken from a real corpus: the articles of a database, or the
+entries of a feed archive written by ``feed_collector.py --archive``. For each
+storage mode the script reports the stored size and compression ratio,
+compress and decompress throughput, and, on a scratch SQLite database laid
+out like the app's, the file size, the time of a listing scan that never
+touches bodies and the time to read every body back:
+
+    python benchmark_storage.py --archive /var/lib/feeds/archive
+    python benchmark_storage.py --database postgresql://... --json
+"""
+import argparse
+import json
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.utils.compression import CODECS, compress_body, decompress_text, zstandard
+from app.utils.text import normalize_article
+
+
+def corpus_from_archive(root):
+    from feed_archive import FeedArchive
+    from feed_fetcher import parse_feed_body
+
+    archive = FeedArchive(root)
+    seen = set()
+    bodies = []
+    for _, records in archive.runs():
+        for record in records:
+            if not record['body'] or record['body'] in seen:
+                continue
+            seen.add(record['body'])
+            parsed = parse_feed_body(archive.read_body(record['body']), record['url'])
+            for entry in parsed.get('entries', []):
+                bodies.append((entry.get('title', ''), entry.get('summary') or entry.get('description', ''),
+                               entry.get('content', '')))
+    return bodies
+
+
+def corpus_from_database(url):
+    from sqlalchemy import create_engine, inspect, text
+
+    engine = create_engine(url)
+    with engine.connect() as connection:
+        rows = connection.execute(text('SELECT id, title, summary, content FROM articles')).fetchall()
+        compressed = {}
+        if inspect(connection).has_table('article_bodies'):
+            compressed = {
+                row[0]: (decompress_text(row[2], row[1]), decompress_text(row[3], row[1]))
+                for row in connection.execute(
+                    text('SELECT article_id, codec, summary, content FROM article_bodies'))
+            }
+    engine.dispose()
+    return [(title or '', *compressed.get(article_id, (summary or '', content or '')))
+            for article_id, title, summary, content in rows]
+
+
+def build_table(path, corpus, codec):
+    """A scratch database shaped like ``articles`` (and ``article_bodies`` when compressed)."""
+    connection = sqlite3.connect(path)
+    connection.execute('CREATE TABLE articles (id INTEGER PRIMARY KEY, title TEXT, excerpt TEXT, '
+                       'summary TEXT, content TEXT)')
+    connection.execute('CREATE TABLE article_bodies (article_id INTEGER PRIMARY KEY, codec TEXT, '
+                       'summary BLOB, content BLOB)')
+    articles, article_bodies = [], []
+    for article_id, (title, summary, content) in enumerate(corpus, start=1):
+        excerpt = normalize_article(summary, content)['excerpt']
+        blobs = compress_body(summary, content, codec) if codec else None
+        if blobs:
+            articles.append((article_id, title, excerpt, None, None))
+            article_bodies.append((article_id, codec, *blobs))
+        else:
+            articles.append((article_id, title, excerpt, summary, content))
+    connection.executemany('INSERT INTO articles VALUES (?, ?, ?, ?, ?)', articles)
+    connection.executemany('INSERT INTO article_bodies VALUES (?, ?, ?, ?)', article_bodies)
+    connection.commit()
+    connection.execute('VACUUM')
+    return connection
+
+
+def _size(value):
+    return len(value.encode('utf-8')) if value else 0
+
+
+def measure(corpus, codec, scratch_dir):
+    raw_sizes = [_size(summary) + _size(content) for _, summary, content in corpus]
+    raw_bytes = sum(raw_sizes)
+    result = {'codec': codec or 'none', 'raw_mb': round(raw_bytes / 1e6, 2)}
+
+    if codec:
+        start = time.perf_counter()
+        bodies = [compress_body(summary, content, codec) for _, summary, content in corpus]
+        compress_time = time.perf_counter() - start
+        start = time.perf_counter()
+        for blobs in bodies:
+            for blob in blobs or ():
+                decompress_text(blob, codec)
+        decompress_time = time.perf_counter() - start
+        # Bodies that would not shrink are stored inline, as the collector does
+        stored = sum(sum(len(blob) for blob in blobs if blob) if blobs else raw_size
+                     for blobs, raw_size in zip(bodies, raw_sizes))
+        compressed_mb = sum(raw_size for blobs, raw_size in zip(bodies, raw_sizes) if blobs) / 1e6
+        result.update({
+            'stored_mb': round(stored / 1e6, 2),
+            'ratio': round(raw_bytes / stored, 2) if stored else None,
+            'inline_articles': sum(1 for blobs in bodies if not blobs),
+            'compress_mb_per_sec': round(raw_bytes / 1e6 / compress_time, 1),
+            'decompress_mb_per_sec': round(compressed_mb / decompress_time, 1) if compressed_mb else None,
+        })
+    else:
+        result.update({'stored_mb': result['raw_mb'], 'ratio': 1.0, 'inline_articles': len(corpus)})
+
+    path = Path(scratch_dir) / f"{codec or 'none'}.db"
+    connection = build_table(path, corpus, codec)
+    try:
+        start = time.perf_counter()
+        connection.execute('SELECT id, title, excerpt FROM articles ORDER BY id DESC').fetchall()
+        listing_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        if codec:
+            for _, row_codec, summary, content in connection.execute('SELECT * FROM article_bodies'):
+                decompress_text(summary, row_codec)
+                decompress_text(content, row_codec)
+        else:
+            connection.execute('SELECT summary, content FROM articles').fetchall()
+        body_time = time.perf_counter() - start
+    finally:
+        connection.close()
+
+    result.update({
+        'sqlite_file_mb': round(path.stat().st_size / 1e6, 2),
+        'listing_scan_ms': round(listing_time * 1000, 1),
+        'read_all_bodies_ms': round(body_time * 1000, 1),
+    })
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Article body storage benchmark')
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--archive', metavar='DIR',
+                       help='Feed archive to take entry bodies from')
+    source.add_argument('--database', metavar='URL',
+                       help='Database to take article bodies from')
+    parser.add_argument('--json', action='store_true',
+                       help='Print results as JSON')
+    args = parser.parse_args()
+
+    corpus = corpus_from_archive(args.archive) if args.archive else corpus_from_database(args.database)
+    if not corpus:
+        print("No article bodies found")
+        return 1
+
+    codecs = [None] + [codec for codec in CODECS if codec != 'zstd' or zstandard is not None]
+    with tempfile.TemporaryDirectory() as scratch_dir:
+        results = [measure(corpus, codec, scratch_dir) for codec in codecs]
+
+    if args.json:
+        print(json.dumps({'articles': len(corpus), 'results': results}, indent=2))
+        return 0
+
+    print(f"{len(corpus)} articles, {results[0]['raw_mb']} MB of summary and content")
+    print(f"{'codec':<6} {'stored MB':>10} {'ratio':>6} {'inline':>7} {'comp MB/s':>10} {'decomp MB/s':>12} "
+          f"{'sqlite MB':>10} {'listing ms':>11} {'bodies ms':>10}")
+    for result in results:
+        print(f"{result['codec']:<6} {result['stored_mb']:>10} {result['ratio']:>6} {result['inline_articles']:>7} "
+              f"{result.get('compress_mb_per_sec') or '-':>10} {result.get('decompress_mb_per_sec') or '-':>12} "
+              f"{result['sqlite_file_mb']:>10} {result['listing_scan_ms']:>11} {result['read_all_bodies_ms']:>10}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,118 @@
+"""Wall time of per-category summarisation, sequential versus concurrent.
+
+The summariser is pointed at the fake Messages API in
+``fake_messages_api.py``, run in-process, and asked to summarise synthetic
+categories once with one request at a time and once at each given
+concurrency. For each run the report gives the wall time, the slowest
+single response, the requests and retries made, the time spent waiting on
+the client-side rate limits and the peak number of requests the server saw
+in flight:
+
+    python benchmark_summary.py --categories 12 --latency 3000 --jitter 1000
+    python benchmark_summary.py --categories 12 --rpm 20 --overload-rate 0.2 --json
+
+No database or API key is needed.
+"""
+import argparse
+import json
+import time
+import urllib.request
+from types import SimpleNamespace
+
+from fake_messages_api import FakeMessagesAPI, serve
+from feed_summary import ArticleSummarizer
+
+
+def synthetic_categories(categories, articles):
+    return {
+        f"Category {c}": [
+            SimpleNamespace(id=c * 1000 + a, title=f"Story {a} of category {c}",
+                            url=f"https://example.com/{c}/{a}", author=None,
+                            plaintext="Researchers disclosed a critical vulnerability in a widely used "
+                                      "VPN appliance that is being exploited in the wild. " * 4)
+            for a in range(articles)
+        ]
+        for c in range(categories)
+    }
+
+
+def measure(args, concurrency, categorized):
+    api = FakeMessagesAPI(args.latency / 1000, args.jitter / 1000, args.rpm,
+                          args.rate_limit_rate, args.overload_rate, seed=args.seed)
+    server = serve(api)
+    try:
+        summarizer = ArticleSummarizer(
+            'benchmark',
+            base_url=f"http://127.0.0.1:{server.server_port}",
+            concurrency=concurrency,
+            requests_per_minute=args.client_rpm,
+            max_retries=args.max_retries
+        )
+        start = time.perf_counter()
+        summaries = summarizer.generate_summaries(categorized)
+        wall = time.perf_counter() - start
+        with urllib.request.urlopen(f"http://127.0.0.1:{server.server_port}/stats") as response:
+            server_stats = json.load(response)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    return {
+        'concurrency': concurrency,
+        'wall_seconds': round(wall, 2),
+        'slowest_response_seconds': server_stats['slowest_seconds'],
+        'failed_categories': sum(1 for summary in summaries.values()
+                                 if summary.get('section_title', '').startswith('Error')),
+        **summarizer.last_stats,
+        'server_rate_limited': server_stats['rate_limited'],
+        'server_overloaded': server_stats['overloaded'],
+        'peak_in_flight': server_stats['peak_in_flight'],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Summary concurrency benchmark')
+    parser.add_argument('--categories', type=int, default=12,
+                       help='Categories to summarise (default: 12)')
+    parser.add_argument('--articles', type=int, default=20,
+                       help='Articles per category (default: 20)')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[4, 12],
+                       help='Concurrency levels to compare with the sequential run (default: 4 12)')
+    parser.add_argument('--latency', type=int, default=2000,
+                       help='Fake API response time in milliseconds (default: 2000)')
+    parser.add_argument('--jitter', type=int, default=500,
+                       help='Random spread of the response time in milliseconds (default: 500)')
+    parser.add_argument('--rpm', type=int, default=0,
+                       help='Requests per minute the fake API allows, 0 for no limit')
+    parser.add_argument('--client-rpm', type=int, default=None,
+                       help='Client-side requests per minute (default: follow the rate-limit headers only)')
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0,
+                       help='Share of requests the fake API answers 429 at random')
+    parser.add_argument('--overload-rate', type=float, default=0.0,
+                       help='Share of requests the fake API answers 529 at random')
+    parser.add_argument('--max-retries', type=int, default=5,
+                       help='Retries of 429 and 529 answers (default: 5)')
+    parser.add_argument('--seed', type=int, default=1,
+                       help='Seed for the fake API latencies and errors')
+    parser.add_argument('--json', action='store_true',
+                       help='Print results as JSON')
+    args = parser.parse_args()
+
+    categorized = synthetic_categories(args.categories, args.articles)
+    results = [measure(args, concurrency, categorized) for concurrency in [1] + args.concurrency]
+
+    if args.json:
+        print(json.dumps({'categories': args.categories, 'results': results}, indent=2))
+        return
+
+    print(f"{args.categories} categories, {args.latency} ms ± {args.jitter} ms per response")
+    print(f"{'concurrency':>11} {'wall s':>7} {'slowest s':>10} {'requests':>9} {'retries':>8} "
+          f"{'throttled s':>12} {'in flight':>10} {'failed':>7}")
+    for result in results:
+        print(f"{result['concurrency']:>11} {result['wall_seconds']:>7} {result['slowest_response_seconds']:>10} "
+              f"{result['requests']:>9} {result['retries']:>8} {result['throttled_seconds']:>12} "
+              f"{result['peak_in_flight']:>10} {result['failed_categories']:>7}")
+
+
+if __name__ == '__main__':
+    main()
@@ -5,10 +5,40 @@ from pathlib import Path
 # Add the parent directory to Python path so we can import app
 sys.path.append(str(Path(__file__).parent.parent))
 
-from app import create_app
+from app import create_worker_app
 from app.extensions import db
-from app.models import Feed, Article, DailySummary
+from app.models import Feed, FeedHealth, FeedRunMetric, WebSubSubscription, WebSubDelivery, Article, ArticleBody, ArticleSimhashBand, ArticleDigest, DailySummary, DailySummaryArticle, SummaryBatch, LLMResponse
+
+_app = None
 
 def get_db():
-    app = create_app(os.getenv('FLASK_ENV', 'development'))
-    return app, db
\ No newline at end of file
+    """Return the worker's Flask app and db, creating the app once per process."""
+    global _app
+    if _app is None:
+        _app = create_worker_app(os.getenv('FLASK_ENV', 'development'))
+    return _app, db
+
+def insert_ignore_duplicates(session, model, rows, index_elements=None, returning=()):
+    """Insert ``rows`` in one statement, silently skipping conflicting keys.
+
+    Uses ``INSERT ... ON CONFLICT DO NOTHING`` on PostgreSQL and SQLite and
+    returns the primary keys of the rows that were actually inserted, or
+    ``(primary key, *returning)`` tuples when extra columns are requested.
+    Without ``index_elements`` a conflict on any unique index skips the row.
+    """
+    dialect = session.get_bind().dialect.name
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise NotImplementedError(f"Bulk upsert is not supported on {dialect}")
+
+    primary_key = model.__table__.primary_key.columns.values()[0]
+    columns = [model.__table__.c[name] for name in returning]
+    stmt = insert(model).values(rows)\
+        .on_conflict_do_nothing(index_elements=index_elements)\
+        .returning(primary_key, *columns)
+    if columns:
+        return [tuple(row) for row in session.execute(stmt)]
+    return [row[0] for row in session.execute(stmt)]
@@ -0,0 +1,265 @@
+"""A local stand-in for the Anthropic Messages API, for exercising the summariser.
+
+``POST /v1/messages`` answers after a configurable latency with a canned
+summary in the JSON shape the summary prompts ask for (or, for a digest
+prompt, a digest of each ``Article ID``), and with the
+``anthropic-ratelimit-*`` headers of a real response. It enforces a
+requests-per-minute limit with 429s (and ``retry-after``), and can answer a
+share of requests 429 or 529 at random. ``GET /stats`` reports the requests
+served, the errors returned, the peak number of requests in flight and the
+slowest response.
+
+``POST /v1/messages/batches`` accepts a Message Batch that ends
+``--batch-seconds`` later with every request answered as above; it can be
+retrieved, and its JSONL results read, like a real batch. The batches
+live as long as the server does. Point the summariser at it with:
+
+    python fake_messages_api.py --port 8792 --latency 2000 --rpm 30 --overload-rate 0.1
+    python feed_summary.py --cron --api-key test --base-url http://127.0.0.1:8792
+    python feed_summary.py --cron --batch --api-key test --base-url http://127.0.0.1:8792
+"""
+import argparse
+import json
+import random
+import re
+import secrets
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeMessagesAPI:
+    """Shared state and behaviour of the fake server."""
+
+    def __init__(self, latency=1.0, jitter=0.0, rpm=0, rate_limit_rate=0.0, overload_rate=0.0, seed=None,
+                 batch_seconds=5.0):
+        self.latency = latency
+        self.jitter = jitter
+        self.rpm = rpm
+        self.rate_limit_rate = rate_limit_rate
+        self.overload_rate = overload_rate
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.window = deque()
+        self.in_flight = 0
+        self.batch_seconds = batch_seconds
+        self.batches = {}
+        self.stats = {'requests': 0, 'completed': 0, 'rate_limited': 0, 'overloaded': 0,
+                      'peak_in_flight': 0, 'slowest_seconds': 0.0}
+
+    def admit(self):
+        """Decide how to answer a request: None to serve it, else (status, retry_after)."""
+        now = time.monotonic()
+        with self.lock:
+            self.stats['requests'] += 1
+            while self.window and now - self.window[0] >= 60:
+                self.window.popleft()
+            if self.rpm and len(self.window) >= self.rpm:
+                self.stats['rate_limited'] += 1
+                return 429, max(1, int(60 - (now - self.window[0])) + 1)
+            roll = self.random.random()
+            if roll < self.rate_limit_rate:
+                self.stats['rate_limited'] += 1
+                return 429, 1
+            if roll < self.rate_limit_rate + self.overload_rate:
+                self.stats['overloaded'] += 1
+                return 529, None
+            self.window.append(now)
+            self.in_flight += 1
+            self.stats['peak_in_flight'] = max(self.stats['peak_in_flight'], self.in_flight)
+            return None
+
+    def finish(self, elapsed):
+        with self.lock:
+            self.in_flight -= 1
+            self.stats['completed'] += 1
+            self.stats['slowest_seconds'] = max(self.stats['slowest_seconds'], round(elapsed, 3))
+
+    def rate_limit_headers(self):
+        with self.lock:
+            remaining = max(0, self.rpm - len(self.window)) if self.rpm else 1000
+            # The window is full again once its oldest request is a minute old
+            full_in = 60 - (time.monotonic() - self.window[0]) if self.window else 0
+        reset = (datetime.now(timezone.utc) + timedelta(seconds=max(0, full_in))).isoformat().replace('+00:00', 'Z')
+        return {
+            'anthropic-ratelimit-requests-limit': str(self.rpm or 1000),
+            'anthropic-ratelimit-requests-remaining': str(remaining),
+            'anthropic-ratelimit-requests-reset': reset,
+        }
+
+    def delay(self):
+        with self.lock:
+            return max(0.0, self.latency + self.random.uniform(-self.jitter, self.jitter))
+
+    @staticmethod
+    def answer(request):
+        """The canned message for a request."""
+        prompt = ''.join(message.get('content', '') for message in request.get('messages', [])
+                         if isinstance(message.get('content'), str))
+        article_ids = re.findall(r'^Article ID: (\d+)$', prompt, re.MULTILINE)
+        if article_ids:
+            text = json.dumps([{
+                'id': int(article_id),
+                'digest': f"A digest of article {article_id}.",
+                'key_facts': ['A fact'],
+                'entities': ['An organisation'],
+                'action': None
+            } for article_id in article_ids])
+        else:
+            text = json.dumps({
+                'section_title': 'Fake summary',
+                'summary': f"A summary of {len(prompt)} characters of articles.",
+                'actionable_tasks': []
+            })
+        return {
+            'type': 'message',
+            'role': 'assistant',
+            'model': request.get('model', 'fake'),
+            'content': [{'type': 'text', 'text': text}],
+            'stop_reason': 'end_turn',
+            'stop_sequence': None,
+            'usage': {'input_tokens': len(prompt) // 4, 'output_tokens': len(text) // 4},
+        }
+
+    def create_batch(self, requests):
+        with self.lock:
+            # Unique across restarts, as the summariser keeps batch ids
+            batch_id = f"msgbatch_fake{secrets.token_hex(6)}"
+            self.batches[batch_id] = {'requests': requests, 'created': datetime.now(timezone.utc)}
+        return batch_id
+
+    def batch(self, batch_id, base_url):
+        """A batch as the API describes it, or None if there is no such batch."""
+        with self.lock:
+            batch = self.batches.get(batch_id)
+        if batch is None:
+            return None
+        ends = batch['created'] + timedelta(seconds=self.batch_seconds)
+        ended = datetime.now(timezone.utc) >= ends
+        count = len(batch['requests'])
+        timestamp = lambda moment: moment.isoformat().replace('+00:00', 'Z')
+        return {
+            'id': batch_id,
+            'type': 'message_batch',
+            'processing_status': 'ended' if ended else 'in_progress',
+            'request_counts': {'processing': 0 if ended else count, 'succeeded': count if ended else 0,
+                               'errored': 0, 'canceled': 0, 'expired': 0},
+            'created_at': timestamp(batch['created']),
+            'ended_at': timestamp(ends) if ended else None,
+            'expires_at': timestamp(batch['created'] + timedelta(hours=24)),
+            'archived_at': None,
+            'cancel_initiated_at': None,
+            'results_url': f"{base_url}/v1/messages/batches/{batch_id}/results" if ended else None,
+        }
+
+    def batch_results(self, batch_id):
+        with self.lock:
+            requests = self.batches[batch_id]['requests']
+        return [{
+            'custom_id': item['custom_id'],
+            'result': {'type': 'succeeded',
+                       'message': {'id': f"msg_fake_{batch_id}_{index}", **self.answer(item['params'])}}
+        } for index, item in enumerate(requests)]
+
+
+def make_handler(api):
+    class MessagesHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def _reply(self, status, payload, headers=None):
+            body = json.dumps(payload).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            path = self.path.split('?')[0].rstrip('/')
+            if path == '/stats':
+                with api.lock:
+                    return self._reply(200, dict(api.stats))
+            match = re.fullmatch(r'/v1/messages/batches/([\w-]+)(/results)?', path)
+            batch = match and api.batch(match.group(1), f"http://{self.headers.get('Host')}")
+            if not batch or (match.group(2) and batch['processing_status'] != 'ended'):
+                return self._reply(404, {'type': 'error', 'error': {'type': 'not_found_error'}})
+            if not match.group(2):
+                return self._reply(200, batch)
+            body = ''.join(json.dumps(line) + '\n' for line in api.batch_results(match.group(1))).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/binary')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self):
+            request = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+            if self.path.rstrip('/') == '/v1/messages/batches':
+                batch_id = api.create_batch(request.get('requests', []))
+                return self._reply(200, api.batch(batch_id, f"http://{self.headers.get('Host')}"))
+            if self.path.rstrip('/') != '/v1/messages':
+                return self._reply(404, {'type': 'error', 'error': {'type': 'not_found_error'}})
+
+            refusal = api.admit()
+            if refusal is not None:
+                status, retry_after = refusal
+                headers = api.rate_limit_headers()
+                if retry_after:
+                    headers['retry-after'] = str(retry_after)
+                kind = 'rate_limit_error' if status == 429 else 'overloaded_error'
+                return self._reply(status, {'type': 'error', 'error': {'type': kind, 'message': kind}}, headers)
+
+            start = time.monotonic()
+            time.sleep(api.delay())
+            message = api.answer(request)
+            api.finish(time.monotonic() - start)
+            self._reply(200, {'id': f"msg_fake{api.stats['completed']}", **message}, api.rate_limit_headers())
+
+        def log_message(self, format, *args):
+            pass
+
+    return MessagesHandler
+
+
+def serve(api, port=0):
+    """Start the fake API on a background thread; returns the server (``server_port`` is the port)."""
+    server = ThreadingHTTPServer(('127.0.0.1', port), make_handler(api))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fake Anthropic Messages API for local testing')
+    parser.add_argument('--port', type=int, default=8792,
+                       help='Port to listen on')
+    parser.add_argument('--latency', type=int, default=1000,
+                       help='Response time in milliseconds (default: 1000)')
+    parser.add_argument('--jitter', type=int, default=0,
+                       help='Random spread of the response time in milliseconds')
+    parser.add_argument('--rpm', type=int, default=0,
+                       help='Requests per minute before answering 429, 0 for no limit')
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0,
+                       help='Share of requests answered 429 at random')
+    parser.add_argument('--overload-rate', type=float, default=0.0,
+                       help='Share of requests answered 529 at random')
+    parser.add_argument('--batch-seconds', type=float, default=5.0,
+                       help='Seconds until a Message Batch ends (default: 5)')
+    args = parser.parse_args()
+
+    api = FakeMessagesAPI(args.latency / 1000, args.jitter / 1000, args.rpm,
+                          args.rate_limit_rate, args.overload_rate, batch_seconds=args.batch_seconds)
+    server = ThreadingHTTPServer(('127.0.0.1', args.port), make_handler(api))
+    print(f"Fake Messages API on http://127.0.0.1:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+"""On-disk archive of raw feed responses, and a fetcher that replays it.
+
+The archive is content-addressed: each distinct body is stored once,
+gzip-compressed, under its SHA-256. Every fetch appends a line to
+``responses.jsonl`` recording the run, the feed URL, the status, the headers
+and the body hash, so unchanged feeds cost a manifest line rather than a copy.
+
+    <root>/objects/ab/abcdef....gz
+    <root>/responses.jsonl
+"""
+import gzip
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from pathlib import Path
+
+from feed_fetcher import FeedFetcher, FeedRequest, FetchResult
+
+MANIFEST = 'responses.jsonl'
+
+
+class FeedArchive:
+    """Records fetch results and reads them back."""
+
+    def __init__(self, root):
+        self.root = Path(root)
+        self.run_id = None
+        self._lock = threading.Lock()
+
+    def begin_run(self, started_at):
+        """Tag the responses that follow with the run that fetched them."""
+        self.run_id = started_at.isoformat()
+
+    def _object_path(self, body_hash):
+        return self.root / 'objects' / body_hash[:2] / f"{body_hash}.gz"
+
+    def store(self, result):
+        """Archive one fetch result. Safe to call from the fetcher's threads."""
+        body_hash = result.content_hash if result.ok and result.body else None
+        if body_hash:
+            path = self._object_path(body_hash)
+            if not path.exists():
+                path.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = path.with_suffix(f".{threading.get_ident()}.tmp")
+                with open(tmp_path, 'wb') as f:
+                    f.write(gzip.compress(result.body, compresslevel=6))
+                os.replace(tmp_path, path)
+
+        record = {
+            'run': self.run_id,
+            'url': result.url,
+            'fetched_at': datetime.now(timezone.utc).isoformat(),
+            'status': result.status,
+            'headers': dict(result.headers or {}),
+            'body': body_hash,
+            'error': result.error,
+            'fetch_time': round(result.fetch_time, 3),
+        }
+        line = json.dumps(record) + '\n'
+        with self._lock:
+            self.root.mkdir(parents=True, exist_ok=True)
+            with open(self.root / MANIFEST, 'a') as f:
+                f.write(line)
+
+    def runs(self):
+        """Archived responses grouped by run, oldest run first."""
+        runs = OrderedDict()
+        with open(self.root / MANIFEST) as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    runs.setdefault(record['run'], []).append(record)
+        return list(runs.items())
+
+    def read_body(self, body_hash):
+        with open(self._object_path(body_hash), 'rb') as f:
+            return gzip.decompress(f.read())
+
+
+class ReplayRequest(FeedRequest):
+    """A FeedRequest answered from an archived response instead of the network."""
+
+    def __init__(self, feed_id, record, content_hash=None, cutoff=None):
+        super().__init__(feed_id, record['url'], content_hash=content_hash, cutoff=cutoff)
+        self.record = record
+
+
+class ReplayFetcher(FeedFetcher):
+    """FeedFetcher that reads responses from a FeedArchive.
+
+    Bodies go through the same parse pool and parsers as a live fetch, so a
+    replay exercises everything but the network. ``fetch_time`` is the time
+    taken to read and decompress the archived body.
+    """
+
+    def __init__(self, archive, **kwargs):
+        super().__init__(**kwargs)
+        self.replay_archive = archive
+
+    @staticmethod
+    def _host(url):
+        # Nothing is downloaded, so there is no server to spare
+        return url
+
+    def _get(self, request, deadline):
+        from requests.structures import CaseInsensitiveDict
+
+        record = request.record
+        result = FetchResult(request.feed_id, request.url)
+        start = time.monotonic()
+        result.status = record['status']
+        result.headers = CaseInsensitiveDict(record['headers'])
+        result.error = record['error']
+        if record['body']:
+            try:
+                result.body = self.replay_archive.read_body(record['body'])
+                result.bytes = len(result.body)
+            except OSError as e:
+                result.error = f"archive: {e}"
+        result.fetch_time = time.monotonic() - start
+        return result
@@ -1,4 +1,3 @@
-import feedparser
 from datetime import datetime, timezone, timedelta
 import time
 import html
@@ -6,9 +5,21 @@ import logging
 import os
 from pathlib import Path
 import argparse
-from db_helper import get_db, Feed, Article
-from dateutil import parser as date_parser
-from dateutil import tz
+from sqlalchemy import delete, or_, select
+from sqlalchemy.orm import joinedload
+from db_helper import get_db, insert_ignore_duplicates, Feed, FeedRunMetric, WebSubDelivery, Article, ArticleBody, ArticleSimhashBand
+from app.utils.urls import url_hash, guid_hash
+from app.utils.text import normalize_article
+from app.utils.compression import resolve_codec, compress_body
+from near_duplicates import article_simhash, bands
+from feed_fetcher import FeedFetcher, FeedRequest
+from feed_archive import FeedArchive, ReplayFetcher, ReplayRequest
+from feed_scheduler import FeedScheduler
+from feed_health import CircuitBreaker
+from feed_leases import FeedLeases
+from websub import WebSubSubscriber
+from worker import install_stop_handlers, peak_rss_mb, write_stats
+from date_parser import default_parser as timestamp_parser
 
 # Set up logging
 logging.basicConfig(
@@ -21,52 +32,86 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Define timezone information for common US timezones
-TIMEZONE_INFO = {
-    'EST': tz.gettz('America/New_York'),
-    'EDT': tz.gettz('America/New_York'),
-    'CST': tz.gettz('America/Chicago'),
-    'CDT': tz.gettz('America/Chicago'),
-    'MST': tz.gettz('America/Denver'),
-    'MDT': tz.gettz('America/Denver'),
-    'PST': tz.gettz('America/Los_Angeles'),
-    'PDT': tz.gettz('America/Los_Angeles'),
-}
-
 class FeedCollector:
     """Handles fetching and storing RSS feeds in the database."""
+
+    INSERT_BATCH_SIZE = 500
+    PUSH_BATCH_SIZE = 50
     
-    def __init__(self):
-        """Initialize the feed collector."""
+    def __init__(self, fetcher=None, max_lookback_hours=None, lease=False, worker_id=None):
+        """Initialize the feed collector.
+
+        A collector is meant to live for the whole process: it pushes one app
+        context and reuses the app's engine and connection pool for every run.
+        With ``lease`` it claims feeds through FeedLeases, so several
+        collectors can run against the same database.
+        """
         self.app, self.db = get_db()
-        self.app.app_context().push()
+        self._app_context = self.app.app_context()
+        self._app_context.push()
+        # Feeds are loaded once per run and committed one at a time. Expiring
+        # them on every commit would reload each of them after every commit.
+        self.db.session.remove()
+        self.db.session.configure(expire_on_commit=False)
+        self._owns_fetcher = fetcher is None
+        self.fetcher = fetcher or FeedFetcher()
+        self.max_lookback = timedelta(
+            hours=max_lookback_hours or self.app.config['FEED_MAX_LOOKBACK_HOURS'])
+        self.cursor_overlap = timedelta(hours=self.app.config['FEED_CURSOR_OVERLAP_HOURS'])
+        self.scheduler = FeedScheduler.from_config(self.db, self.app.config)
+        self.breaker = CircuitBreaker.from_config(self.app.config)
+        self.body_codec = resolve_codec(self.app.config['ARTICLE_BODY_CODEC'])
+        self.metrics_retention = timedelta(days=self.app.config['FEED_METRICS_RETENTION_DAYS'])
+        self.leases = FeedLeases.from_config(self.db, self.app.config, worker_id) if lease else None
+        self.websub = WebSubSubscriber.from_config(self.db, self.app.config)
+        self.next_due = None
+        self.runs = 0
+        self.last_run_stats = {}
+        self._reset_run()
+
+    def _reset_run(self):
+        """Clear per-run state so memory stays flat however many runs a daemon does."""
+        self.run_started_at = datetime.now(timezone.utc)
         self.total_added = 0
         self.total_skipped = 0
+        self.total_failed = 0
+        self.total_not_modified = 0
+        self.total_unchanged = 0
+        self.total_circuit_open = 0
+        self.total_claimed = 0
+        self.total_pushed = 0
+        self.timings = []
+        # One feed_run_metrics row per fetch result, written when the run is recorded
+        self.metrics = []
+        # Identity hashes already handled in this run, so syndicated entries skip the database
+        self._seen_keys = set()
+
+    def close(self):
+        """Release the fetcher and pop the app context."""
+        if self._owns_fetcher:
+            self.fetcher.close()
+        if self.websub is not None:
+            self.websub.close()
+        self.db.session.remove()
+        self._app_context.pop()
 
     def _parse_date(self, entry):
-        """Extract and parse the publication date from a feed entry."""
+        """Extract and parse the publication date from a feed entry.
+
+        Returns None when the entry carries no usable date.
+        """
         current_time = datetime.now(timezone.utc)
         
         # Try getting the raw date strings first
         for date_field in ['published', 'updated', 'created']:
             if date_field in entry:
-                try:
-                    # Use dateutil parser with timezone information
-                    parsed_time = date_parser.parse(entry[date_field], tzinfos=TIMEZONE_INFO)
-                    if parsed_time:
-                        # Convert to UTC if it's timezone-aware
-                        if parsed_time.tzinfo:
-                            parsed_time = parsed_time.astimezone(timezone.utc)
-                        else:
-                            parsed_time = parsed_time.replace(tzinfo=timezone.utc)
-                        
-                        # Skip future dates
-                        if parsed_time > current_time:
-                            return current_time
-                            
-                        return parsed_time
-                except Exception:
-                    continue
+                parsed_time = timestamp_parser.parse(entry[date_field])
+                if parsed_time:
+                    # Skip future dates
+                    if parsed_time > current_time:
+                        return current_time
+
+                    return parsed_time
         
         # Fallback to parsed tuples
         for date_field in ['published_parsed', 'updated_parsed', 'created_parsed']:
@@ -82,119 +127,677 @@ class FeedCollector:
                 except Exception:
                     continue
         
-        # If all else fails, use current time
-        return current_time
+        return None
 
-    def _is_recent_article(self, published_dt, current_time):
-        """Check if the article was published within the last 2 hours."""
-        time_threshold = current_time - timedelta(hours=2)
-        return published_dt >= time_threshold
+    def _cutoff(self, feed, current_time):
+        """Oldest publication time still worth ingesting for this feed.
 
-    def collect_articles(self):
-        """Fetch articles from all active feeds and store them in the database."""
+        Entries newer than the feed's cursor are always taken, less a small
+        overlap for backdated entries, but never further back than the
+        configured maximum lookback.
+        """
+        cutoff = current_time - self.max_lookback
+        if feed.cursor_published:
+            cursor = feed.cursor_published
+            if cursor.tzinfo is None:
+                cursor = cursor.replace(tzinfo=timezone.utc)
+            cutoff = max(cutoff, cursor - self.cursor_overlap)
+        return cutoff
+
+    def collect_articles(self, all_feeds=False):
+        """Fetch articles from active feeds that are due and store them in the database.
+
+        With ``all_feeds`` every active feed is fetched regardless of its schedule,
+        including feeds whose circuit breaker is open.
+        """
+        self._reset_run()
+        started_at = self.run_started_at
+        if self.fetcher.archive is not None:
+            self.fetcher.archive.begin_run(started_at)
         try:
+            # Content pushed since the last run goes in first
+            self.ingest_pushes()
+
             # Get all active feeds from the database
-            feeds = Feed.query.filter_by(active=True).all()
-            
-            for feed in feeds:
-                current_time = datetime.now(timezone.utc)
-                
-                try:
-                    # Add If-Modified-Since header to only get new content
-                    time_threshold = current_time - timedelta(hours=2)
-                    headers = {'date': current_time.strftime("%a, %d %b %Y %H:%M:%S GMT")}
-                    
-                    feed_data = feedparser.parse(feed.url, response_headers=headers)
-                    
-                    if hasattr(feed_data, 'status'):
-                        if feed_data.status >= 400:
-                            logger.warning(f"Error fetching {feed.name}: HTTP {feed_data.status}")
-                            continue
-                    
-                    for entry in feed_data.entries:
-                        try:
-                            title = html.unescape(entry.get('title', 'No title'))
-                            url = entry.get('link', '')
-                            
-                            # Skip if article already exists
-                            if Article.query.filter_by(url=url).first():
-                                self.total_skipped += 1
-                                continue
-                                
-                            author = entry.get('author', None)
-                            published_dt = self._parse_date(entry)
-                            
-                            # Skip if article is not recent enough
-                            if not self._is_recent_article(published_dt, current_time):
-                                self.total_skipped += 1
-                                continue
-                            
-                            # Get summary and content
-                            summary = html.unescape(entry.get('summary', ''))
-                            if not summary and 'description' in entry:
-                                summary = html.unescape(entry.description)
-                            
-                            content = ''
-                            if 'content' in entry:
-                                content = html.unescape(entry.content[0].value)
-                            elif hasattr(entry, 'content_encoded'):
-                                content = html.unescape(entry.content_encoded)
-                            
-                            article = Article(
-                                feed_id=feed.id,
-                                title=title,
-                                url=url,
-                                published=published_dt,
-                                summary=summary,
-                                content=content,
-                                author=author
-                            )
-                            
-                            self.db.session.add(article)
-                            self.db.session.commit()
-                            self.total_added += 1
-                            
-                        except Exception as entry_error:
-                            self.db.session.rollback()
-                            continue
-                    
-                except Exception:
-                    continue
-                    
+            active_feeds = Feed.query.options(joinedload(Feed.health), joinedload(Feed.websub))\
+                .filter_by(active=True).all()
+            run_start = time.monotonic()
+            if self.leases is not None:
+                self._collect_leased(all_feeds)
+            else:
+                self._collect(active_feeds, datetime.now(timezone.utc), all_feeds)
+            self.next_due = self.scheduler.next_due(active_feeds)
+
         except Exception as e:
             logger.error(f"Database error while processing feeds: {str(e)}")
+            self.db.session.rollback()
+            raise
+        finally:
+            # Return the connection to the pool and drop the identity map between runs
+            self.db.session.remove()
+
+        extra = {}
+        if self.leases is not None:
+            extra = {'worker': self.leases.worker_id, 'feeds_claimed': self.total_claimed}
+        self._record_run(started_at, time.monotonic() - run_start, len(active_feeds),
+                         circuit_open=self.total_circuit_open,
+                         pushed=self.total_pushed,
+                         next_due=self.next_due.isoformat() if self.next_due else None,
+                         **extra)
+
+    def _collect(self, feeds, now, all_feeds=False):
+        """Fetch the feeds that are due, or all of them, and store their new entries."""
+        if not all_feeds:
+            due_feeds = self.scheduler.due_feeds(feeds, now)
+            feeds = self.breaker.closed_feeds(due_feeds, now)
+            self.total_circuit_open += len(due_feeds) - len(feeds)
+        feeds = {feed.id: feed for feed in feeds}
+
+        # Feeds are downloaded and parsed concurrently; results arrive in
+        # completion order and are stored here on the main thread.
+        feed_requests = [self._feed_request(feed, now) for feed in feeds.values()]
+        for result in self.fetcher.fetch(feed_requests):
+            feed = feeds[result.feed_id]
+            self.breaker.record(feed, result, datetime.now(timezone.utc))
+            counts = self._handle_result(feed, result, datetime.now(timezone.utc))
+            subscribe = False
+            if result.ok:
+                if counts.get('failed', 0):
+                    # A 304 or unchanged hash next time would skip the entries that failed
+                    self._clear_validators(feed)
+                else:
+                    self._save_validators(feed, result)
+                if self.websub is not None:
+                    subscribe = self.websub.observe(feed, result, datetime.now(timezone.utc))
+            self._commit_feed(feed)
+            if subscribe and feed.websub is not None:
+                # The hub verifies straight back, so the pending subscription is committed first
+                self.websub.request(feed)
+                self._commit_feed(feed)
+
+        self._reschedule(feeds.values())
+
+    def _collect_leased(self, all_feeds=False):
+        """Claim batches of due feeds and collect them until none are left.
+
+        Each batch is rescheduled before its leases are released, so another
+        worker never sees a feed that has just been fetched as due. A feed is
+        claimed at most once per run, even with ``all_feeds``.
+        """
+        claimed = set()
+        with self.leases.heartbeat():
+            while True:
+                now = datetime.now(timezone.utc)
+                feed_ids = self.leases.claim(now, due_only=not all_feeds, exclude=claimed)
+                if not feed_ids:
+                    break
+                claimed.update(feed_ids)
+                try:
+                    # Another worker may have fetched these feeds since the run loaded them
+                    feeds = Feed.query.options(joinedload(Feed.health), joinedload(Feed.websub))\
+                        .filter(Feed.id.in_(feed_ids)).populate_existing().all()
+                    self._collect(feeds, now, all_feeds)
+                finally:
+                    self.leases.release(feed_ids)
+        self.total_claimed = len(claimed)
+
+    def collect_pushes(self):
+        """Ingest the content WebSub hubs have pushed, without polling anything."""
+        self._reset_run()
+        started_at = self.run_started_at
+        run_start = time.monotonic()
+        try:
+            self.ingest_pushes()
+        except Exception as e:
+            logger.error(f"Database error while ingesting pushed content: {str(e)}")
+            self.db.session.rollback()
             raise
+        finally:
+            self.db.session.remove()
+        self._record_run(started_at, time.monotonic() - run_start, self.total_pushed,
+                         pushed=self.total_pushed)
+
+    def ingest_pushes(self):
+        """Store the entries of feed content pushed by WebSub hubs.
+
+        Deliveries queued by the ``/api/websub`` endpoint go through the same
+        parse, dedup and insert path as a poll, oldest first. Validators,
+        schedules and feed health are left alone.
+
+        A batch of deliveries is claimed by deleting it in the transaction
+        that stores its entries, so it leaves the queue exactly when it is
+        stored. On PostgreSQL the rows are picked with ``FOR UPDATE SKIP
+        LOCKED``, so collectors started by concurrent pushes take different
+        deliveries rather than ingesting the same one twice; SQLite's write
+        lock serialises the claims instead.
+        """
+        table = WebSubDelivery.__table__
+        while True:
+            claimed = select(table.c.id).order_by(table.c.id)\
+                .limit(self.PUSH_BATCH_SIZE)\
+                .with_for_update(skip_locked=True)
+            deliveries = self.db.session.execute(
+                delete(table).where(table.c.id.in_(claimed))
+                .returning(table.c.id, table.c.feed_id, table.c.body, table.c.content_type)
+            ).all()
+            if not deliveries:
+                self.db.session.commit()
+                break
+            feeds = {feed.id: feed for feed in Feed.query.filter(
+                Feed.id.in_({delivery.feed_id for delivery in deliveries}))}
+            # RETURNING order is not guaranteed
+            for delivery in sorted(deliveries, key=lambda delivery: delivery.id):
+                feed = feeds[delivery.feed_id]
+                if feed.active:
+                    now = datetime.now(timezone.utc)
+                    result = self.fetcher.parse_pushed(feed.id, feed.url, delivery.body,
+                                                       delivery.content_type, cutoff=self._cutoff(feed, now))
+                    self._handle_result(feed, result, now, source='push')
+                    self.total_pushed += 1
+            try:
+                self.db.session.commit()
+            except Exception as e:
+                # The batch goes back in the queue for the next run
+                logger.error(f"Error saving pushed content: {str(e)}")
+                self.db.session.rollback()
+                break
+
+    def replay(self):
+        """Run the parse, dedup and insert path over every response in the fetcher's archive.
+
+        Nothing is fetched: the fetcher must be a ReplayFetcher. Archived
+        responses are matched to feeds by URL and each feed's entries are
+        judged against the lookback window as it stood when the response was
+        fetched. A body identical to the feed's previous archived body counts as
+        unchanged, as it did live. Validators, cursors, schedules and feed
+        health are left alone. All archived runs are totalled as one run.
+        """
+        self._reset_run()
+        started_at = self.run_started_at
+        run_start = time.monotonic()
+        archived_runs = self.fetcher.replay_archive.runs()
+        unknown_urls = set()
+        last_hashes = {}
+        try:
+            feeds_by_url = {feed.url: feed for feed in Feed.query.all()}
+            for run_id, records in archived_runs:
+                feeds = {}
+                feed_requests = []
+                fetched_at = {}
+                for record in records:
+                    feed = feeds_by_url.get(record['url'])
+                    if feed is None:
+                        unknown_urls.add(record['url'])
+                        continue
+                    if feed.id in feeds:
+                        continue
+                    feeds[feed.id] = feed
+                    fetched_at[feed.id] = datetime.fromisoformat(record['fetched_at'])
+                    feed_requests.append(ReplayRequest(
+                        feed.id, record, content_hash=last_hashes.get(feed.id),
+                        cutoff=fetched_at[feed.id] - self.max_lookback))
+                    if record['body']:
+                        last_hashes[feed.id] = record['body']
+
+                for result in self.fetcher.fetch(feed_requests):
+                    feed = feeds[result.feed_id]
+                    as_of = fetched_at[feed.id]
+                    self._handle_result(feed, result, as_of, cutoff=as_of - self.max_lookback,
+                                        source='replay', advance_cursor=False)
+                    self._commit_feed(feed)
+
+        except Exception as e:
+            logger.error(f"Database error while replaying feeds: {str(e)}")
+            self.db.session.rollback()
+            raise
+        finally:
+            self.db.session.remove()
+
+        if unknown_urls:
+            logger.warning(f"Skipped responses of {len(unknown_urls)} feeds that are not in the database")
+        self._record_run(started_at, time.monotonic() - run_start, len(feeds_by_url),
+                         replayed_runs=len(archived_runs))
+
+    def _handle_result(self, feed, result, current_time, cutoff=None, source='poll', advance_cursor=True):
+        """Store the entries of one fetch result, or count why there are none.
+
+        Returns the per-outcome entry counts, empty when nothing was stored.
+        """
+        self.timings.append(result)
+        entries = result.entries
+        result.release()
+
+        counts = {}
+        store_start = time.perf_counter()
+        if result.error:
+            logger.warning(f"Error fetching {feed.name}: {result.error}")
+        elif result.status >= 400:
+            logger.warning(f"Error fetching {feed.name}: HTTP {result.status}")
+        elif result.not_modified:
+            self.total_not_modified += 1
+        elif result.unchanged:
+            self.total_unchanged += 1
+        else:
+            counts = self._store_entries(feed, entries, current_time, cutoff, advance_cursor)
+        self.metrics.append({
+            'run_started_at': self.run_started_at,
+            'feed_id': feed.id,
+            'source': source,
+            'worker': self.leases.worker_id if self.leases is not None else None,
+            'status': result.status,
+            'error': result.error[:500] if result.error else None,
+            'not_modified': result.not_modified,
+            'unchanged': result.unchanged,
+            'fetch_time': round(result.fetch_time, 4),
+            'parse_time': round(result.parse_time, 4),
+            'store_time': round(time.perf_counter() - store_start, 4),
+            'bytes': result.bytes,
+            'entries_parsed': len(entries),
+            'inserted': counts.get('inserted', 0),
+            'duplicates': counts.get('duplicates', 0),
+            'stale': counts.get('stale', 0),
+            'malformed': counts.get('malformed', 0),
+            'failed': counts.get('failed', 0),
+        })
+        return counts
+
+    def _commit_feed(self, feed):
+        try:
+            self.db.session.commit()
+        except Exception as e:
+            logger.error(f"Error saving {feed.name}: {str(e)}")
+            self.db.session.rollback()
+
+    def _save_metrics(self):
+        """Write the run's per-feed metrics and drop those past the retention period."""
+        try:
+            if self.metrics:
+                self.db.session.execute(FeedRunMetric.__table__.insert(), self.metrics)
+            self.db.session.execute(
+                FeedRunMetric.__table__.delete()
+                .where(FeedRunMetric.run_started_at < self.run_started_at - self.metrics_retention)
+            )
+            self.db.session.commit()
+        except Exception as e:
+            # Metrics are a diagnostic; losing one run's worth is not worth failing the run
+            logger.warning(f"Error saving feed metrics: {str(e)}")
+            self.db.session.rollback()
+        finally:
+            self.db.session.remove()
+
+    def _record_run(self, started_at, duration, feeds_total, **extra):
+        """Keep the stats of the run that just finished, save its metrics and log its totals."""
+        self._save_metrics()
+        self.runs += 1
+        self.last_run_stats = {
+            'run': self.runs,
+            'started_at': started_at.isoformat(),
+            'duration': round(duration, 3),
+            'feeds_active': feeds_total,
+            'feeds_fetched': len(self.timings),
+            'fetch_errors': sum(1 for result in self.timings if not result.ok),
+            'added': self.total_added,
+            'skipped': self.total_skipped,
+            'failed': self.total_failed,
+            'not_modified': self.total_not_modified,
+            'unchanged': self.total_unchanged,
+            **extra,
+            'peak_rss_mb': round(peak_rss_mb(), 1),
+            'db_pool': self.db.engine.pool.status(),
+            'date_parsing': timestamp_parser.stats()
+        }
 
         # Log the final totals
-        logger.warning(f"Articles added: {self.total_added}, skipped: {self.total_skipped}")
+        logger.warning(f"Articles added: {self.total_added}, skipped: {self.total_skipped}, "
+                       f"failed: {self.total_failed} "
+                       f"({len(self.timings)} of {feeds_total} feeds in {duration:.1f}s, "
+                       f"{self.total_not_modified} not modified, {self.total_unchanged} unchanged, "
+                       f"{self.total_circuit_open} backed off)")
+
+    def _reschedule(self, feeds):
+        """Work out when each fetched feed is next due, from its recent publication rate.
+
+        Feeds with an open circuit are not due again before it is time to probe them.
+        """
+        now = datetime.now(timezone.utc)
+        rates = self.scheduler.publication_rates([feed.id for feed in feeds], now)
+        for feed in feeds:
+            self.scheduler.reschedule(feed, rates.get(feed.id), now)
+            self.breaker.hold(feed)
+        self.db.session.commit()
+
+    def seconds_until_next_due(self, maximum):
+        """How long a daemon can sleep before the next feed is due, capped at ``maximum``."""
+        if self.next_due is None:
+            return 0
+        wait = (self.next_due - datetime.now(timezone.utc)).total_seconds()
+        return max(0, min(maximum, wait))
+
+    def _feed_request(self, feed, now):
+        return FeedRequest(
+            feed.id,
+            feed.url,
+            etag=feed.etag,
+            last_modified=feed.last_modified,
+            content_hash=feed.content_hash,
+            cutoff=self._cutoff(feed, now)
+        )
+
+    @staticmethod
+    def _save_validators(feed, result):
+        """Remember the response validators so the next run can send a conditional GET."""
+        if result.not_modified:
+            # A 304 may omit the validators, in which case the stored ones still apply
+            feed.etag = result.etag or feed.etag
+            feed.last_modified = result.last_modified or feed.last_modified
+        else:
+            feed.etag = result.etag
+            feed.last_modified = result.last_modified
+            feed.content_hash = result.content_hash
+
+    @staticmethod
+    def _clear_validators(feed):
+        """Forget the response validators so the next run downloads and stores the feed in full."""
+        feed.etag = None
+        feed.last_modified = None
+        feed.content_hash = None
+
+    def _build_article(self, feed, entry, published_dt, cutoff):
+        """Turn a parsed entry into an article row, or None if it was already seen."""
+        # Skip if article is older than the feed's cursor
+        entry_guid = self._entry_guid(entry)
+        if published_dt < cutoff or (entry_guid and entry_guid == feed.cursor_guid):
+            return None
+
+        # Get summary and content
+        raw_summary = entry.get('summary', '')
+        if not raw_summary and 'description' in entry:
+            raw_summary = entry['description']
+        raw_content = entry.get('content', '')
+        summary = html.unescape(raw_summary)
+        # Plaintext comes from the markup as published, before it is unescaped for storage
+        text = normalize_article(raw_summary, raw_content)
+
+        url = entry.get('link', '')
+        guid = entry.get('id')
+        identity = url_hash(url), guid_hash(feed.id, guid)
+        if identity == (None, None):
+            # Nothing to recognise it by on the next run
+            raise ValueError("entry has neither a link nor a GUID")
+        title = html.unescape(entry.get('title', 'No title'))
+        return {
+            'feed_id': feed.id,
+            'title': title,
+            'url': url,
+            'url_hash': identity[0],
+            'guid': guid,
+            'guid_hash': identity[1],
+            'published': published_dt,
+            'summary': summary,
+            'content': html.unescape(raw_content),
+            'author': entry.get('author', None),
+            **text,
+            'simhash': article_simhash(title, text['plaintext'])
+        }
+
+    def _store_entries(self, feed, entries, current_time, cutoff=None, advance_cursor=True):
+        """Store the new, recent entries of one parsed feed.
+
+        Articles are identified by the hash of their canonical URL and by the
+        hash of their GUID within the feed. Duplicates are filtered with a
+        single lookup on those hashes and the remaining rows are written with
+        one ``INSERT ... ON CONFLICT DO NOTHING`` per batch, so a feed costs a
+        couple of round-trips instead of two per entry. Returns how many
+        entries were inserted, duplicate, stale, malformed or failed to insert.
+
+        The feed's cursor only moves past entries that are settled: stored,
+        found already stored, or skipped for good. It stays before the oldest
+        entry whose insert failed, so the next run tries that entry again.
+        Without ``advance_cursor`` it is left where it is.
+        """
+        if cutoff is None:
+            cutoff = self._cutoff(feed, current_time)
+        counts = {'inserted': 0, 'duplicates': 0, 'stale': 0, 'malformed': 0, 'failed': 0}
+
+        rows = []
+        batch_keys = set()
+        # (published, guid, row) of each dated entry; row is None if nothing is inserted for it
+        dated = []
+        for entry in entries:
+            published_dt = None
+            try:
+                published_dt = self._parse_date(entry)
+                row = self._build_article(feed, entry, published_dt or current_time, cutoff)
+            except Exception as entry_error:
+                logger.warning(f"Skipping malformed entry in {feed.name}: {str(entry_error)}")
+                counts['malformed'] += 1
+                self.total_skipped += 1
+                row = None
+            else:
+                if row is None:
+                    counts['stale'] += 1
+                    self.total_skipped += 1
+                elif self._identity_keys(row) & (batch_keys | self._seen_keys):
+                    counts['duplicates'] += 1
+                    self.total_skipped += 1
+                    row = None
+                else:
+                    batch_keys |= self._identity_keys(row)
+                    rows.append(row)
+            if published_dt:
+                dated.append((published_dt, self._entry_guid(entry), row))
+
+        failed = []
+        if rows:
+            url_hashes = [row['url_hash'] for row in rows if row['url_hash']]
+            guid_hashes = [row['guid_hash'] for row in rows if row['guid_hash']]
+            existing = set()
+            for found_url_hash, found_guid_hash in self.db.session.query(Article.url_hash, Article.guid_hash)\
+                    .filter(or_(Article.url_hash.in_(url_hashes), Article.guid_hash.in_(guid_hashes))):
+                existing.update((found_url_hash, found_guid_hash))
+            new_rows = [row for row in rows if not self._identity_keys(row) & existing]
+            self.total_skipped += len(rows) - len(new_rows)
+
+            for start in range(0, len(new_rows), self.INSERT_BATCH_SIZE):
+                inserted, batch_failed = self._insert_articles(new_rows[start:start + self.INSERT_BATCH_SIZE])
+                counts['inserted'] += inserted
+                failed += batch_failed
+            counts['failed'] = len(failed)
+            # Whatever else was not inserted is already stored, found by the lookup or by the insert itself
+            counts['duplicates'] += len(rows) - counts['inserted'] - counts['failed']
+
+        failed_ids = {id(row) for row in failed}
+        oldest_failed = min((published for published, _, row in dated if id(row) in failed_ids), default=None)
+        settled = [(published, guid) for published, guid, row in dated
+                   if id(row) not in failed_ids and (oldest_failed is None or published < oldest_failed)]
+        if settled and advance_cursor:
+            self._advance_cursor(feed, *max(settled, key=lambda item: item[0]))
+        for row in failed:
+            batch_keys -= self._identity_keys(row)
+        self._seen_keys |= batch_keys
+        return counts
+
+    @staticmethod
+    def _identity_keys(row):
+        return {key for key in (row['url_hash'], row['guid_hash']) if key}
+
+    @staticmethod
+    def _entry_guid(entry):
+        return entry.get('id') or entry.get('link')
+
+    @staticmethod
+    def _advance_cursor(feed, newest, newest_guid):
+        """Move the feed's cursor to its newest dated entry. It never moves backwards."""
+        cursor = feed.cursor_published
+        if cursor and cursor.tzinfo is None:
+            cursor = cursor.replace(tzinfo=timezone.utc)
+        if cursor is None or newest > cursor:
+            feed.cursor_published = newest
+            feed.cursor_guid = newest_guid
+
+    def _insert_articles(self, rows):
+        """Insert one batch, falling back to row-by-row inserts if the batch fails.
+
+        Returns the number of articles inserted and the rows that could not be.
+        Rows neither inserted nor failed were already stored.
+        """
+        failed = []
+        try:
+            with self.db.session.begin_nested():
+                inserted = self._insert_and_index(rows)
+        except Exception as batch_error:
+            logger.warning(f"Batch insert failed, retrying row by row: {str(batch_error)}")
+            inserted = []
+            for row in rows:
+                try:
+                    with self.db.session.begin_nested():
+                        inserted += self._insert_and_index([row])
+                except Exception as row_error:
+                    logger.warning(f"Error storing {row['url']}: {str(row_error)}")
+                    failed.append(row)
+
+        self.total_added += len(inserted)
+        self.total_failed += len(failed)
+        self.total_skipped += len(rows) - len(inserted) - len(failed)
+        return len(inserted), failed
+
+    def _insert_and_index(self, rows):
+        """Insert articles and add the new ones to the near-duplicate band index.
+
+        With a body codec configured, summaries and content are written
+        compressed to ``article_bodies`` and left NULL in ``articles``, unless
+        compressing them would not save space.
+        """
+        article_rows = rows
+        compressed = {}
+        if self.body_codec:
+            article_rows = []
+            for row in rows:
+                blobs = compress_body(row['summary'], row['content'], self.body_codec)
+                if blobs:
+                    compressed[(row['url_hash'], row['guid_hash'])] = blobs
+                    row = {**row, 'summary': None, 'content': None}
+                article_rows.append(row)
+        inserted = insert_ignore_duplicates(self.db.session, Article, article_rows,
+                                            returning=['simhash', 'url_hash', 'guid_hash'])
+        band_rows = [
+            {'article_id': article_id, 'band': band, 'bucket': bucket}
+            for article_id, fingerprint, *_ in inserted if fingerprint is not None
+            for band, bucket in bands(fingerprint)
+        ]
+        if band_rows:
+            self.db.session.execute(ArticleSimhashBand.__table__.insert(), band_rows)
+        # RETURNING order is not guaranteed, so bodies are matched by identity hashes
+        body_rows = [
+            {'article_id': article_id, 'codec': self.body_codec, 'summary': blobs[0], 'content': blobs[1]}
+            for article_id, _, *keys in inserted
+            for blobs in [compressed.get(tuple(keys))] if blobs
+        ]
+        if body_rows:
+            self.db.session.execute(ArticleBody.__table__.insert(), body_rows)
+        return inserted
+
+    def report_timings(self):
+        """Log how long each feed took, slowest first."""
+        for result in sorted(self.timings, key=lambda r: r.fetch_time + r.parse_time, reverse=True):
+            logger.warning(result.timing_line())
 
 def main():
     """Main entry point for the feed collector."""
     parser = argparse.ArgumentParser(description='RSS Feed Collector')
     
     parser.add_argument('--interval', type=int, default=3600,
-                       help='Run interval in seconds (default: 3600 for 1 hour)')
+                       help='Maximum time between runs in seconds; feeds are polled as they fall due (default: 3600)')
     parser.add_argument('--cron', action='store_true',
                        help='Run once and exit (for cron jobs)')
+    parser.add_argument('--concurrency', type=int, default=16,
+                       help='Number of feeds to download in parallel (default: 16)')
+    parser.add_argument('--per-host', type=int, default=2,
+                       help='Maximum concurrent connections per host (default: 2)')
+    parser.add_argument('--timeout', type=int, default=30,
+                       help='Per-feed download timeout in seconds (default: 30)')
+    parser.add_argument('--total-timeout', type=int, default=600,
+                       help='Timeout for the whole run in seconds (default: 600)')
+    parser.add_argument('--parse-workers', type=int, default=None,
+                       help='Processes used to parse feeds, 0 to parse in-thread (default: up to 4)')
+    parser.add_argument('--stream-parse', action='store_true',
+                       help='Parse well-formed feeds with the streaming parser, stopping at the cutoff')
+    parser.add_argument('--max-lookback', type=int, default=None,
+                       help='Never ingest entries older than this many hours (default: FEED_MAX_LOOKBACK_HOURS)')
+    parser.add_argument('--all', action='store_true',
+                       help='Fetch every active feed, ignoring the polling schedule')
+    parser.add_argument('--timings', action='store_true',
+                       help='Report per-feed fetch and parse timings')
+    parser.add_argument('--stats-file',
+                       help='Write the stats of the last run to this JSON file')
+    parser.add_argument('--archive', metavar='DIR',
+                       help='Keep every fetched response in this archive directory')
+    parser.add_argument('--lease', action='store_true',
+                       help='Claim feeds through database leases, so several collectors can share the feed list')
+    parser.add_argument('--worker-id',
+                       help='Name this collector holds leases under (default: host:pid)')
+    parser.add_argument('--pushed', action='store_true',
+                       help='Ingest content pushed by WebSub hubs, then exit')
+    parser.add_argument('--replay', metavar='DIR',
+                       help='Ingest the responses in this archive directory instead of fetching, then exit')
     
     args = parser.parse_args()
     
+    stop = install_stop_handlers()
+    fetcher_options = dict(
+        concurrency=args.concurrency,
+        per_host=args.per_host,
+        timeout=args.timeout,
+        total_timeout=args.total_timeout,
+        parse_workers=args.parse_workers,
+        stream_parse=args.stream_parse
+    )
+    if args.replay:
+        fetcher = ReplayFetcher(FeedArchive(args.replay), **fetcher_options)
+    else:
+        archive = FeedArchive(args.archive) if args.archive else None
+        fetcher = FeedFetcher(archive=archive, **fetcher_options)
+    collector = FeedCollector(fetcher=fetcher, max_lookback_hours=args.max_lookback,
+                              lease=args.lease, worker_id=args.worker_id)
+    
     try:
-        while True:
-            collector = FeedCollector()
-            collector.collect_articles()
+        if args.pushed:
+            collector.collect_pushes()
+            if args.stats_file:
+                write_stats(args.stats_file, collector.last_run_stats)
+            return
+
+        if args.replay:
+            collector.replay()
+            if args.timings:
+                collector.report_timings()
+            if args.stats_file:
+                write_stats(args.stats_file, collector.last_run_stats)
+            return
+
+        while not stop.is_set():
+            collector.collect_articles(all_feeds=args.all)
+            if args.timings:
+                collector.report_timings()
+            if args.stats_file:
+                write_stats(args.stats_file, collector.last_run_stats)
             
             if args.cron:
                 logger.warning("Running in cron mode - exiting after single execution")
                 break
                 
-            time.sleep(args.interval)
+            # Sleep until the next feed falls due, but at least a little so an
+            # overdue feed that keeps failing cannot spin the loop
+            stop.wait(max(30, collector.seconds_until_next_due(args.interval)))
             
     except KeyboardInterrupt:
         pass
     except Exception as e:
         logger.error(f"Feed collection failed: {str(e)}")
         raise
+    finally:
+        collector.close()
+        fetcher.close()
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
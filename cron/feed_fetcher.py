@@ -0,0 +1,388 @@
+import gzip
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
+from urllib.parse import urlsplit
+
+from feed_stream_parser import GZIP_MAGIC, StreamParseError, stream_parse_feed
+
+logger = logging.getLogger(__name__)
+
+USER_AGENT = 'SeriousThreatIntelligence/1.0 (+feed collector)'
+
+# Entry fields copied out of feedparser's result. Everything else is dropped so
+# that only small, plain dicts cross the process boundary.
+ENTRY_FIELDS = (
+    'id', 'title', 'link', 'author', 'summary', 'description',
+    'published', 'updated', 'created',
+    'published_parsed', 'updated_parsed', 'created_parsed',
+)
+
+
+class FetchTimeout(Exception):
+    """Raised when a single feed exceeds its download deadline."""
+
+
+class FeedRequest:
+    """What the fetcher needs to know about one feed.
+
+    ``etag``, ``last_modified`` and ``content_hash`` come from the previous
+    fetch and make the request conditional. ``cutoff`` lets the streaming
+    parser stop once it reaches entries the collector would discard anyway.
+    """
+
+    def __init__(self, feed_id, url, etag=None, last_modified=None, content_hash=None, cutoff=None):
+        self.feed_id = feed_id
+        self.url = url
+        self.etag = etag
+        self.last_modified = last_modified
+        self.content_hash = content_hash
+        self.cutoff = cutoff
+
+
+class FetchResult:
+    """Outcome of fetching and parsing a single feed."""
+
+    def __init__(self, feed_id, url):
+        self.feed_id = feed_id
+        self.url = url
+        self.status = None
+        self.headers = {}
+        self.body = None
+        self.content_hash = None
+        # True when the server answered 304 or the body hash matched the last run
+        self.not_modified = False
+        self.unchanged = False
+        self.entries = []
+        self.entry_count = 0
+        self.truncated = False
+        # WebSub hubs and self URL advertised in the feed document
+        self.hubs = []
+        self.self_url = None
+        self.error = None
+        self.fetch_time = 0.0
+        self.parse_time = 0.0
+        self.bytes = 0
+
+    @property
+    def ok(self):
+        return self.error is None and self.status is not None and self.status < 400
+
+    @property
+    def needs_parse(self):
+        return self.ok and bool(self.body) and not (self.not_modified or self.unchanged)
+
+    @property
+    def etag(self):
+        return self.headers.get('ETag')
+
+    @property
+    def last_modified(self):
+        return self.headers.get('Last-Modified')
+
+    def release(self):
+        """Drop the body and entries once stored, keeping only the timings."""
+        self.body = None
+        self.entries = []
+
+    def timing_line(self):
+        """One-line summary used for the per-feed timing report."""
+        status = self.error or f"HTTP {self.status}"
+        if self.unchanged:
+            status += ' (unchanged)'
+        elif self.truncated:
+            status += ' (stopped early)'
+        return (f"{self.fetch_time:7.2f}s fetch {self.parse_time:6.2f}s parse "
+                f"{self.bytes:>9} B {self.entry_count:>4} entries  {status}  {self.url}")
+
+
+def parse_feed_body(body, url, content_type=None):
+    """Parse a raw feed document into plain entry dicts.
+
+    Runs inside the parse process pool, so it must stay a module-level function
+    and only return picklable builtins.
+    """
+    # Imported here so runs that never fall back to feedparser do not pay for it
+    import feedparser
+
+    start = time.perf_counter()
+    response_headers = {'content-location': url}
+    if content_type:
+        response_headers['content-type'] = content_type
+
+    parsed = feedparser.parse(body, response_headers=response_headers)
+
+    entries = []
+    for entry in parsed.entries:
+        item = {}
+        for field in ENTRY_FIELDS:
+            if field in entry:
+                value = entry[field]
+                item[field] = tuple(value) if field.endswith('_parsed') and value else value
+        if 'content' in entry and entry.content:
+            item['content'] = entry.content[0].get('value', '')
+        elif 'content_encoded' in entry:
+            item['content'] = entry.content_encoded
+        entries.append(item)
+
+    links = parsed.feed.get('links', [])
+    return {
+        'entries': entries,
+        'bozo': bool(parsed.get('bozo')),
+        'hubs': [link['href'] for link in links if link.get('rel') == 'hub' and link.get('href')],
+        'self_url': next((link['href'] for link in links
+                          if link.get('rel') == 'self' and link.get('href')), None),
+        'parse_time': time.perf_counter() - start,
+    }
+
+
+def parse_feed(body, url, content_type=None, cutoff=None, stream=False):
+    """Parse a feed body, trying the streaming parser first when ``stream`` is set.
+
+    Documents the streaming parser cannot handle fall back to feedparser.
+    """
+    if stream:
+        try:
+            return stream_parse_feed(body, cutoff=cutoff)
+        except StreamParseError as e:
+            logger.debug(f"Falling back to feedparser for {url}: {e}")
+    if body[:2] == GZIP_MAGIC:
+        body = gzip.decompress(body)
+    return parse_feed_body(body, url, content_type)
+
+
+class FeedFetcher:
+    """Fetches many feeds concurrently and parses them off the main thread.
+
+    Downloads run on a bounded thread pool. Each pool thread keeps its own
+    keep-alive ``requests.Session``. Requests are queued per host and handed
+    to the pool only while their host has fewer than ``per_host`` downloads
+    running, so no pool thread ever waits on a busy server while feeds for
+    other hosts could be fetched. Parsing is CPU bound, so bodies are
+    handed to a process pool (or parsed inline when ``parse_workers`` is 0).
+    With ``stream_parse`` well-formed feeds go through the streaming parser,
+    and with an ``archive`` every response is recorded for later replay.
+    """
+
+    def __init__(self, concurrency=16, per_host=2, timeout=30, total_timeout=600,
+                 parse_workers=None, max_bytes=20 * 1024 * 1024, stream_parse=False, archive=None):
+        self.concurrency = concurrency
+        self.archive = archive
+        self.stream_parse = stream_parse
+        self.per_host = per_host
+        self.timeout = timeout
+        self.total_timeout = total_timeout
+        self.max_bytes = max_bytes
+        if parse_workers is None:
+            parse_workers = min(4, os.cpu_count() or 1)
+
+        self._io_pool = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='feed-fetch')
+        self._parse_pool = ProcessPoolExecutor(max_workers=parse_workers) if parse_workers else None
+        self._local = threading.local()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._io_pool.shutdown(wait=False, cancel_futures=True)
+        if self._parse_pool:
+            self._parse_pool.shutdown(wait=False, cancel_futures=True)
+
+    def _session(self):
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            # Imported on first download; push ingestion and replays never need it
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=self.concurrency, pool_maxsize=self.per_host)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            session.headers['User-Agent'] = USER_AGENT
+            self._local.session = session
+        return session
+
+    @staticmethod
+    def _host(url):
+        return urlsplit(url).netloc.lower()
+
+    @staticmethod
+    def _conditional_headers(request):
+        headers = {}
+        if request.etag:
+            headers['If-None-Match'] = request.etag
+        if request.last_modified:
+            headers['If-Modified-Since'] = request.last_modified
+        return headers
+
+    def _parse_args(self, result, request):
+        return (result.body, result.url, result.headers.get('Content-Type'),
+                request.cutoff, self.stream_parse)
+
+    def _get(self, request, deadline):
+        """Download one feed, recording status, headers, body and timing.
+
+        ``deadline`` is a ``time.monotonic()`` value. Every socket read is
+        given only the time left before it, so a slow server cannot hold the
+        download past it by trickling bytes within one chunk.
+        """
+        url = request.url
+        result = FetchResult(request.feed_id, url)
+        start = time.monotonic()
+        try:
+            remaining = deadline - start
+            if remaining <= 0:
+                raise FetchTimeout(f"timed out after {self.timeout}s before starting")
+            response = self._session().get(
+                url,
+                headers=self._conditional_headers(request),
+                timeout=(min(10, remaining), remaining),
+                stream=True
+            )
+            with response:
+                result.status = response.status_code
+                result.headers = response.headers
+                chunks = []
+                size = 0
+                for chunk in response.iter_content(chunk_size=16 * 1024):
+                    chunks.append(chunk)
+                    size += len(chunk)
+                    if size > self.max_bytes:
+                        raise ValueError(f"body larger than {self.max_bytes} bytes")
+                    if time.monotonic() > deadline:
+                        raise FetchTimeout(f"timed out after {self.timeout}s")
+                result.body = b''.join(chunks)
+                result.bytes = size
+        except Exception as e:
+            result.error = f"{type(e).__name__}: {e}"
+        result.fetch_time = time.monotonic() - start
+        return result
+
+    def _download(self, request, deadline):
+        result = self._get(request, deadline)
+
+        if result.status == 304:
+            result.not_modified = True
+        elif result.ok and result.body:
+            # Servers without validators still often return byte-identical bodies
+            result.content_hash = hashlib.sha256(result.body).hexdigest()
+            result.unchanged = result.content_hash == request.content_hash
+
+        if self.archive is not None:
+            try:
+                self.archive.store(result)
+            except OSError as e:
+                logger.warning(f"Could not archive {result.url}: {str(e)}")
+
+        if self._parse_pool is None and result.needs_parse:
+            try:
+                self._apply_parsed(result, parse_feed(*self._parse_args(result, request)))
+            except Exception as e:
+                result.error = f"parse error: {e}"
+        return result
+
+    @staticmethod
+    def _apply_parsed(result, parsed):
+        result.entries = parsed['entries']
+        result.entry_count = len(result.entries)
+        result.truncated = parsed.get('truncated', False)
+        result.hubs = parsed.get('hubs', [])
+        result.self_url = parsed.get('self_url')
+        result.parse_time = parsed['parse_time']
+
+    def parse_pushed(self, feed_id, url, body, content_type=None, cutoff=None):
+        """A parsed FetchResult for a feed body that was pushed to us rather than fetched."""
+        result = FetchResult(feed_id, url)
+        result.status = 200
+        result.headers = {'Content-Type': content_type} if content_type else {}
+        result.body = body
+        result.bytes = len(body)
+        try:
+            self._apply_parsed(result, parse_feed(body, url, content_type, cutoff, self.stream_parse))
+        except Exception as e:
+            result.error = f"parse error: {e}"
+        return result
+
+    def fetch(self, feed_requests):
+        """Fetch FeedRequests, yielding a FetchResult per feed.
+
+        The stored validators are sent as conditional request headers, and a
+        304 or an identical body hash skips parsing entirely.
+
+        Results are yielded in completion order so the caller can store one feed
+        while the others are still downloading. Feeds that have not finished by
+        ``total_timeout`` are yielded with an error.
+        """
+        deadline = time.monotonic() + self.total_timeout
+        waiting = {}
+        for request in feed_requests:
+            waiting.setdefault(self._host(request.url), deque()).append(request)
+        running = Counter()
+        downloading = {}
+
+        def submit_ready():
+            # Each feed's timeout starts when it is handed to the pool, and no
+            # more are handed over than there are threads to run them at once
+            for host in list(waiting):
+                queue = waiting[host]
+                while queue and running[host] < self.per_host and len(downloading) < self.concurrency:
+                    request = queue.popleft()
+                    future = self._io_pool.submit(self._download, request, time.monotonic() + self.timeout)
+                    downloading[future] = request
+                    running[host] += 1
+                if not queue:
+                    del waiting[host]
+                if len(downloading) >= self.concurrency:
+                    return
+
+        submit_ready()
+        parsing = {}
+
+        while downloading or parsing:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            done, _ = wait(list(downloading) + list(parsing), timeout=remaining,
+                           return_when=FIRST_COMPLETED)
+            for future in done:
+                if future in downloading:
+                    request = downloading.pop(future)
+                    running[self._host(request.url)] -= 1
+                    submit_ready()
+                    result = future.result()
+                    if self._parse_pool is not None and result.needs_parse:
+                        parse_future = self._parse_pool.submit(
+                            parse_feed, *self._parse_args(result, request))
+                        parsing[parse_future] = result
+                        continue
+                    yield result
+                else:
+                    result = parsing.pop(future)
+                    try:
+                        self._apply_parsed(result, future.result())
+                    except Exception as e:
+                        result.error = f"parse error: {e}"
+                    yield result
+
+        for future, request in downloading.items():
+            future.cancel()
+            result = FetchResult(request.feed_id, request.url)
+            result.error = f"run timed out after {self.total_timeout}s"
+            yield result
+        for queue in waiting.values():
+            for request in queue:
+                result = FetchResult(request.feed_id, request.url)
+                result.error = f"run timed out after {self.total_timeout}s"
+                yield result
+        for future, result in parsing.items():
+            future.cancel()
+            result.error = f"parse timed out after {self.total_timeout}s"
+            yield result
@@ -0,0 +1,106 @@
+import logging
+from datetime import timezone, timedelta
+from email.utils import parsedate_to_datetime
+
+from db_helper import FeedHealth
+
+logger = logging.getLogger(__name__)
+
+# Statuses that mean "come back later" rather than "broken"
+THROTTLE_STATUSES = {429, 503}
+
+
+class CircuitBreaker:
+    """Stops fetching feeds that keep failing, and probes them again later.
+
+    Each fetch outcome is recorded in the feed's ``FeedHealth`` row. After
+    ``failure_threshold`` consecutive failures the circuit opens: the feed is
+    skipped until ``open_until``, which doubles with every further failure up
+    to ``max_backoff``. The first fetch after that is a probe; one success
+    closes the circuit. A ``Retry-After`` on 429 and 503 responses is honoured
+    when it asks for a longer wait.
+    """
+
+    def __init__(self, failure_threshold=3, base_backoff=timedelta(minutes=30),
+                 max_backoff=timedelta(hours=24)):
+        self.failure_threshold = failure_threshold
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(
+            failure_threshold=config['FEED_FAILURE_THRESHOLD'],
+            base_backoff=timedelta(minutes=config['FEED_BACKOFF_MINUTES']),
+            max_backoff=timedelta(hours=config['FEED_MAX_BACKOFF_HOURS'])
+        )
+
+    @staticmethod
+    def _as_utc(value):
+        if value is not None and value.tzinfo is None:
+            return value.replace(tzinfo=timezone.utc)
+        return value
+
+    def is_open(self, feed, now):
+        open_until = self._as_utc(feed.health.open_until) if feed.health else None
+        return open_until is not None and open_until > now
+
+    def closed_feeds(self, feeds, now):
+        return [feed for feed in feeds if not self.is_open(feed, now)]
+
+    def backoff(self, failures):
+        """How long the circuit stays open after ``failures`` consecutive failures."""
+        if failures < self.failure_threshold:
+            return None
+        doublings = min(failures - self.failure_threshold, 16)
+        return min(self.max_backoff, self.base_backoff * 2 ** doublings)
+
+    @staticmethod
+    def _retry_after(result, now):
+        value = result.headers.get('Retry-After') if result.headers else None
+        if not value:
+            return None
+        if value.strip().isdigit():
+            return timedelta(seconds=int(value))
+        try:
+            return parsedate_to_datetime(value) - now
+        except (TypeError, ValueError):
+            return None
+
+    def record(self, feed, result, now):
+        """Record a fetch result on the feed's health row and open or close its circuit."""
+        health = feed.health
+        if health is None:
+            health = feed.health = FeedHealth(consecutive_failures=0)
+
+        health.last_status = result.status
+        health.last_latency = round(result.fetch_time, 3)
+        health.last_attempt_at = now
+
+        if result.ok:
+            if health.open_until is not None:
+                logger.warning(f"{feed.name} recovered after {health.consecutive_failures} failed fetches")
+            health.consecutive_failures = 0
+            health.last_error = None
+            health.last_success_at = now
+            health.open_until = None
+            return
+
+        health.consecutive_failures = (health.consecutive_failures or 0) + 1
+        health.last_error = result.error or f"HTTP {result.status}"
+        backoff = self.backoff(health.consecutive_failures)
+        if result.status in THROTTLE_STATUSES:
+            retry_after = self._retry_after(result, now)
+            if retry_after and (backoff is None or retry_after > backoff):
+                backoff = min(retry_after, self.max_backoff)
+        if backoff:
+            health.open_until = now + backoff
+            logger.warning(f"{feed.name} failed {health.consecutive_failures} times in a row, "
+                           f"backing off for {backoff}")
+
+    def hold(self, feed):
+        """Keep a feed's next poll from falling inside an open circuit."""
+        open_until = self._as_utc(feed.health.open_until) if feed.health else None
+        next_poll_at = self._as_utc(feed.next_poll_at)
+        if open_until is not None and (next_poll_at is None or next_poll_at < open_until):
+            feed.next_poll_at = open_until
@@ -0,0 +1,134 @@
+import logging
+import os
+import socket
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone, timedelta
+
+from sqlalchemy import or_, select, update
+
+from db_helper import Feed
+
+logger = logging.getLogger(__name__)
+
+
+def default_worker_id():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class FeedLeases:
+    """Lets several collectors share the feed list without fetching a feed twice.
+
+    A worker claims a batch of due feeds by stamping them with its id and a
+    lease expiry in one ``UPDATE ... RETURNING``. On PostgreSQL the feeds are
+    picked with ``FOR UPDATE SKIP LOCKED``, so concurrent claims pass over
+    each other's rows instead of waiting. SQLite has no row locks, but it
+    runs each write statement under its database-wide write lock, which
+    makes the same conditional update just as exclusive. Feeds
+    whose lease has expired, because their worker died or stalled, can be
+    claimed by anyone. While a worker holds leases a heartbeat thread
+    renews them every third of the lease time.
+    """
+
+    def __init__(self, db, worker_id=None, lease_time=timedelta(minutes=10), batch_size=25):
+        self.db = db
+        # The heartbeat runs outside the app context, so keep the engine itself
+        self.engine = db.engine
+        self.worker_id = worker_id or default_worker_id()
+        self.lease_time = lease_time
+        self.batch_size = batch_size
+        self.held = set()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, db, config, worker_id=None):
+        return cls(
+            db,
+            worker_id=worker_id,
+            lease_time=timedelta(seconds=config['FEED_LEASE_SECONDS']),
+            batch_size=config['FEED_LEASE_BATCH']
+        )
+
+    def claim(self, now, due_only=True, exclude=()):
+        """Lease up to ``batch_size`` active feeds nobody else holds; returns their ids.
+
+        With ``due_only`` only feeds whose next poll time has passed are
+        taken, earliest first. ``exclude`` lists feeds not to claim again.
+        """
+        candidates = select(Feed.id).where(
+            Feed.active.is_(True),
+            or_(Feed.lease_expires_at.is_(None), Feed.lease_expires_at <= now)
+        )
+        if due_only:
+            candidates = candidates.where(or_(Feed.next_poll_at.is_(None), Feed.next_poll_at <= now))
+        if exclude:
+            candidates = candidates.where(Feed.id.notin_(exclude))
+        candidates = candidates.order_by(Feed.next_poll_at.asc().nullsfirst(), Feed.id)\
+            .limit(self.batch_size)\
+            .with_for_update(skip_locked=True)
+
+        stmt = update(Feed)\
+            .where(Feed.id.in_(candidates))\
+            .values(lease_owner=self.worker_id, lease_expires_at=now + self.lease_time)\
+            .returning(Feed.id)\
+            .execution_options(synchronize_session=False)
+        claimed = [row[0] for row in self.db.session.execute(stmt)]
+        self.db.session.commit()
+        with self._lock:
+            self.held.update(claimed)
+        return claimed
+
+    def renew(self, now=None):
+        """Push back the expiry of every lease this worker holds."""
+        with self._lock:
+            held = list(self.held)
+        if not held:
+            return 0
+        now = now or datetime.now(timezone.utc)
+        with self.engine.begin() as connection:
+            renewed = connection.execute(
+                update(Feed.__table__)
+                .where(Feed.id.in_(held), Feed.lease_owner == self.worker_id)
+                .values(lease_expires_at=now + self.lease_time)
+            ).rowcount
+        if renewed < len(held):
+            logger.warning(f"{self.worker_id} lost the lease on {len(held) - renewed} feeds")
+        return renewed
+
+    def release(self, feed_ids):
+        """Give up leases on ``feed_ids``. Leases already taken over are left alone."""
+        with self._lock:
+            self.held.difference_update(feed_ids)
+        try:
+            self.db.session.execute(
+                update(Feed)
+                .where(Feed.id.in_(feed_ids), Feed.lease_owner == self.worker_id)
+                .values(lease_owner=None, lease_expires_at=None)
+                .execution_options(synchronize_session=False)
+            )
+            self.db.session.commit()
+        except Exception as e:
+            # The leases expire on their own
+            logger.warning(f"Error releasing feed leases: {str(e)}")
+            self.db.session.rollback()
+
+    @contextmanager
+    def heartbeat(self):
+        """Renew held leases in a background thread for the duration of the block."""
+        stop = threading.Event()
+        interval = self.lease_time.total_seconds() / 3
+
+        def run():
+            while not stop.wait(interval):
+                try:
+                    self.renew()
+                except Exception as e:
+                    logger.warning(f"Error renewing feed leases: {str(e)}")
+
+        thread = threading.Thread(target=run, name='feed-lease-heartbeat', daemon=True)
+        thread.start()
+        try:
+            yield self
+        finally:
+            stop.set()
+            thread.join()
@@ -0,0 +1,104 @@
+import logging
+from datetime import timezone, timedelta
+
+from sqlalchemy import func
+
+from db_helper import Article
+
+logger = logging.getLogger(__name__)
+
+
+class FeedScheduler:
+    """Decides when each feed should next be polled.
+
+    A feed's publication rate is learned from its recent article history and
+    it is polled about twice per expected new article, clamped between the
+    configured minimum and maximum interval. Priority feeds are polled
+    ``priority_factor`` times more often, and feeds with an active WebSub
+    subscription only every ``push_poll_interval``.
+    """
+
+    def __init__(self, db, min_interval, max_interval, priority_factor=4, history_days=7,
+                 default_interval=timedelta(hours=1), push_poll_interval=timedelta(hours=12)):
+        self.db = db
+        self.push_poll_interval = push_poll_interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.priority_factor = priority_factor
+        self.history = timedelta(days=history_days)
+        self.default_interval = default_interval
+
+    @classmethod
+    def from_config(cls, db, config):
+        return cls(
+            db,
+            min_interval=timedelta(minutes=config['FEED_MIN_POLL_MINUTES']),
+            max_interval=timedelta(minutes=config['FEED_MAX_POLL_MINUTES']),
+            priority_factor=config['FEED_PRIORITY_FACTOR'],
+            history_days=config['FEED_SCHEDULE_HISTORY_DAYS'],
+            push_poll_interval=timedelta(hours=config['WEBSUB_POLL_HOURS'])
+        )
+
+    @staticmethod
+    def _as_utc(value):
+        if value is not None and value.tzinfo is None:
+            return value.replace(tzinfo=timezone.utc)
+        return value
+
+    def is_due(self, feed, now):
+        next_poll_at = self._as_utc(feed.next_poll_at)
+        return next_poll_at is None or next_poll_at <= now
+
+    def due_feeds(self, feeds, now):
+        return [feed for feed in feeds if self.is_due(feed, now)]
+
+    def next_due(self, feeds):
+        """Earliest time any of ``feeds`` becomes due, or None if one is due already."""
+        times = [self._as_utc(feed.next_poll_at) for feed in feeds]
+        if not times or any(t is None for t in times):
+            return None
+        return min(times)
+
+    def publication_rates(self, feed_ids, now):
+        """Articles per hour for each feed over the history window, in one query.
+
+        The rate is measured over the span actually covered by each feed's
+        history (at least a day), so newly added feeds are not underestimated.
+        """
+        if not feed_ids:
+            return {}
+        since = now - self.history
+        rows = self.db.session.query(Article.feed_id, func.count(Article.id), func.min(Article.published))\
+            .filter(Article.feed_id.in_(feed_ids), Article.published > since)\
+            .group_by(Article.feed_id)\
+            .all()
+
+        rates = {}
+        for feed_id, count, oldest in rows:
+            span = now - max(self._as_utc(oldest), since)
+            hours = max(span, timedelta(days=1)).total_seconds() / 3600
+            rates[feed_id] = count / hours
+        return rates
+
+    def interval_for(self, feed, rate):
+        if rate:
+            # Poll twice per expected article to keep detection latency low
+            interval = timedelta(hours=0.5 / rate)
+        elif feed.poll_interval:
+            # Nothing published recently: back off gradually towards the maximum
+            interval = timedelta(seconds=feed.poll_interval * 2)
+        else:
+            interval = self.default_interval
+
+        if feed.priority:
+            interval = interval / self.priority_factor
+        return max(self.min_interval, min(self.max_interval, interval))
+
+    def reschedule(self, feed, rate, now):
+        interval = self.interval_for(feed, rate)
+        feed.poll_interval = int(interval.total_seconds())
+        if feed.websub is not None and feed.websub.is_active(now):
+            # A hub pushes this feed's updates; polling is only a safety net
+            interval = max(interval, self.push_poll_interval)
+        feed.next_poll_at = now + interval
+        logger.debug(f"{feed.name}: {rate or 0:.2f} articles/h, next poll in {interval}")
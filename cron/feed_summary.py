@@ -5,9 +5,17 @@ import json
 import os
 from pathlib import Path
 import argparse
-from prompts import ARTICLE_SUMMARY_PROMPT, WEEKLY_SUMMARY_PROMPT
-from db_helper import get_db
-from app.models import Feed, Article, DailySummary
+import asyncio
+from prompts import ARTICLE_SUMMARY_PROMPT, WEEKLY_SUMMARY_PROMPT, ARTICLE_DIGEST_PROMPT, WEEKLY_FROM_DAILY_PROMPT
+import numpy as np
+from sqlalchemy import and_, func
+from db_helper import get_db, insert_ignore_duplicates
+from app.models import Feed, Article, ArticleBody, ArticleSimhashBand, ArticleDigest, DailySummary, DailySummaryArticle, SummaryBatch
+from near_duplicates import candidate_pairs, cluster
+from llm_client import ThrottledClient
+from llm_cache import ResponseCache
+from prompt_packing import estimate_tokens, pack, relevance_scores
+from worker import install_stop_handlers, peak_rss_mb, write_stats
 import time
 
 # Set up logging
@@ -21,89 +29,523 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Links to near-duplicates listed under each representative article
+MAX_ALSO_REPORTED = 5
+# Tokens a digest is expected to take, for planning which articles to digest
+EXPECTED_DIGEST_TOKENS = 150
+# Characters of an article's text sent to the digest stage
+MAX_DIGEST_INPUT_CHARS = 6000
+
 class ArticleSummarizer:
-    def __init__(self, api_key):
-        self.client = anthropic.Anthropic(
-            api_key=api_key
+    MODEL = "claude-3-5-sonnet-20241022"
+    SYSTEM_PROMPT = "You are a skilled journalist writing clear, informative summaries for a news digest email."
+    # Digests are extraction rather than writing: a smaller model does
+    DIGEST_MODEL = "claude-3-5-haiku-20241022"
+    DIGEST_SYSTEM_PROMPT = "You are a security analyst condensing news articles into compact, factual digests."
+
+    def __init__(self, api_key, base_url=None, concurrency=4, requests_per_minute=None,
+                 input_tokens_per_minute=None, max_retries=5, cache=None, digest_batch_size=10,
+                 prompt_token_budget=8000):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.concurrency = concurrency
+        self.requests_per_minute = requests_per_minute
+        self.input_tokens_per_minute = input_tokens_per_minute
+        self.max_retries = max_retries
+        # Optional ResponseCache: identical requests are answered from the database
+        self.cache = cache
+        self.digest_batch_size = max(1, digest_batch_size)
+        # Estimated input tokens of each category's summary prompt, articles packed to fit
+        self.prompt_token_budget = prompt_token_budget
+        self.last_stats = {}
+        # Category -> ids of the articles in each summary that parsed, for coverage
+        self.last_included = {}
+
+    @classmethod
+    def from_config(cls, api_key, config, base_url=None, cache=None):
+        return cls(
+            api_key,
+            base_url=base_url or config['ANTHROPIC_BASE_URL'],
+            concurrency=config['SUMMARY_CONCURRENCY'],
+            requests_per_minute=config['SUMMARY_REQUESTS_PER_MINUTE'],
+            input_tokens_per_minute=config['SUMMARY_INPUT_TOKENS_PER_MINUTE'],
+            max_retries=config['SUMMARY_MAX_RETRIES'],
+            cache=cache,
+            digest_batch_size=config['SUMMARY_DIGEST_BATCH_SIZE'],
+            prompt_token_budget=config['SUMMARY_PROMPT_TOKEN_BUDGET']
+        )
+
+    def generate_summaries(self, categorized_articles, period_days=1, duplicates=None, digests=None,
+                           daily_sections=None):
+        """Summarise every category concurrently; returns the summaries keyed by category.
+
+        The run takes about as long as the slowest category, within the
+        configured concurrency and rate limits.
+
+        ``digests`` maps article ids to their stored digests. When given,
+        the articles without one are digested first and their digests added
+        to it, and each category is summarised from the digests instead of
+        the article text.
+
+        ``daily_sections`` maps categories to ``(date, section)`` pairs of
+        the week's daily summaries. When given, each category's weekly
+        summary is written from its daily sections and the articles passed,
+        which should be those no daily covered.
+        """
+        return asyncio.run(self._generate_summaries(
+            categorized_articles, period_days, duplicates or {}, digests, daily_sections
+        ))
+
+    async def _generate_summaries(self, categorized_articles, period_days, duplicates, digests, daily_sections):
+        # A fresh client per run: its connections belong to this run's event loop
+        client = anthropic.AsyncAnthropic(api_key=self.api_key, base_url=self.base_url, max_retries=0)
+        throttled = ThrottledClient(
+            client,
+            concurrency=self.concurrency,
+            requests_per_minute=self.requests_per_minute,
+            input_tokens_per_minute=self.input_tokens_per_minute,
+            max_retries=self.max_retries
         )
+        if self.cache is not None:
+            cache_start = self.cache.stats()
+        self.digest_stats = {'digests_created': 0, 'digests_reused': 0, 'digests_failed': 0}
+        self.last_included = {}
+        self.packing_stats = {'articles_packed': 0, 'articles_dropped': 0, 'prompt_tokens_estimated': 0}
+        try:
+            summaries = await asyncio.gather(*(
+                self.summarise_category(throttled, articles, category, period_days, duplicates, digests,
+                                        daily_sections.get(category, []) if daily_sections is not None else None)
+                for category, articles in categorized_articles.items()
+            ))
+        finally:
+            await client.close()
+        self.last_stats = {**throttled.stats, 'throttled_seconds': round(throttled.stats['throttled_seconds'], 1),
+                           'prompt_token_budget': self.prompt_token_budget, **self.packing_stats}
+        if digests is not None:
+            self.last_stats.update(self.digest_stats)
+            logger.info(f"Article digests: {self.digest_stats['digests_created']} created, "
+                        f"{self.digest_stats['digests_reused']} reused, {self.digest_stats['digests_failed']} failed")
+        if self.cache is not None:
+            self.cache.evict()
+            self.last_stats.update(self._cache_stats(cache_start, self.cache.stats()))
+            logger.info(f"LLM cache: {self.last_stats['cache_hits']} hits, {self.last_stats['cache_misses']} misses")
+        return dict(zip(categorized_articles, summaries))
+
+    @staticmethod
+    def _cache_stats(before, after):
+        """Cache counters of this run alone; the cache outlives runs."""
+        hits = after['cache_hits'] - before['cache_hits']
+        misses = after['cache_misses'] - before['cache_misses']
+        return {
+            'cache_hits': hits,
+            'cache_misses': misses,
+            'cache_hit_rate': round(hits / (hits + misses), 3) if hits + misses else None,
+            'cache_tokens_saved': after['cache_tokens_saved'] - before['cache_tokens_saved'],
+        }
+
+    async def summarise_category(self, client, articles, category, period_days, duplicates, digests,
+                                 daily_sections=None):
+        """Digest the category's undigested articles if digests are in use, then summarise it."""
+        if digests is not None:
+            # Digest only the articles the prompt is likely to have room for
+            planned = self.prompt_articles(articles, category, period_days, duplicates, digests, daily_sections,
+                                           planning=True)
+            missing = [article for article in planned if article.id not in digests]
+            self.digest_stats['digests_reused'] += len(planned) - len(missing)
+            if missing:
+                await self.digest_articles(client, missing, digests)
+        return await self.generate_summary(client, articles, category, period_days, duplicates, digests,
+                                           daily_sections)
 
-    def generate_summary(self, articles, category, period_days=1):
+    def prompt_articles(self, articles, category, period_days=1, duplicates=None, digests=None,
+                        daily_sections=None, planning=False):
+        """The articles to put in a category's summary prompt, packed into the token budget.
+
+        Articles are ranked by relevance (see ``prompt_packing``) and taken
+        while their entries fit in what the budget leaves after the rest of
+        the prompt. When ``planning``, before the map stage, an article still
+        to be digested is costed as a digest of the expected size.
+        """
         if not articles:
-            logger.info(f"No articles found")
-            return {
-                "section_title": "No Summary Available",
-                "summary": "No articles to summarize for this category.",
-                "actionable_tasks": []
-            }
-        
-        article_texts = []
-        for article in articles[:20]:
-            article_text = f"""
+            return []
+        duplicates = duplicates or {}
+        planned_digest = {'digest': '', 'key_facts': [], 'entities': [], 'action': None}
+        token_counts = []
+        for article in articles:
+            if planning and digests is not None and article.id not in digests:
+                entry = self.format_article(article, duplicates, {article.id: planned_digest})
+                token_counts.append(estimate_tokens(entry) + EXPECTED_DIGEST_TOKENS)
+            else:
+                token_counts.append(estimate_tokens(self.format_article(article, duplicates, digests)))
+        overhead = estimate_tokens(self.SYSTEM_PROMPT) + estimate_tokens(
+            self.build_prompt([], category, period_days, daily_sections=daily_sections)
+        )
+        budget = max(0, self.prompt_token_budget - overhead)
+        scores = relevance_scores(
+            [(article.title, article.plaintext) for article in articles],
+            [len(duplicates.get(article.id, [])) for article in articles]
+        )
+        chosen = pack(scores, token_counts, budget)
+
+        if not planning:
+            used = sum(token_counts[index] for index in chosen)
+            self.packing_stats['articles_packed'] += len(chosen)
+            self.packing_stats['articles_dropped'] += len(articles) - len(chosen)
+            self.packing_stats['prompt_tokens_estimated'] += overhead + used
+            logger.info(f"Packed {len(chosen)} of {len(articles)} {category} articles into "
+                        f"{overhead + used} of {self.prompt_token_budget} estimated tokens "
+                        f"({len(articles) - len(chosen)} dropped)")
+        return [articles[index] for index in chosen]
+
+    async def digest_articles(self, client, articles, digests):
+        """The map stage: digest ``articles`` in batches and add what parsed to ``digests``.
+
+        An article whose digest could not be made is left out, so the
+        summary falls back to its text and the next run tries again.
+        """
+        batches = [articles[i:i + self.digest_batch_size]
+                   for i in range(0, len(articles), self.digest_batch_size)]
+        for batch_digests in await asyncio.gather(*(self.digest_batch(client, batch) for batch in batches)):
+            digests.update(batch_digests)
+            self.digest_stats['digests_created'] += len(batch_digests)
+        self.digest_stats['digests_failed'] += sum(1 for article in articles if article.id not in digests)
+
+    async def digest_batch(self, client, articles):
+        """Digest a few articles in one request; returns the digests that parsed, keyed by article id."""
+        article_texts = [f"""
+Article ID: {article.id}
+Title: {article.title}
+Text: {(article.plaintext or '')[:MAX_DIGEST_INPUT_CHARS]}
+            """ for article in articles]
+        try:
+            response = await client.create(
+                model=self.DIGEST_MODEL,
+                max_tokens=min(8192, 400 * len(articles)),
+                system=self.DIGEST_SYSTEM_PROMPT,
+                messages=[{"role": "user", "content": ARTICLE_DIGEST_PROMPT.format(articles=chr(10).join(article_texts))}],
+                temperature=0
+            )
+            items = json.loads(response.content[0].text)
+        except Exception as e:
+            logger.error(f"Error digesting {len(articles)} articles: {str(e)}")
+            return {}
+
+        wanted = {article.id for article in articles}
+        digests = {}
+        for item in items if isinstance(items, list) else []:
+            if not isinstance(item, dict) or not item.get('digest'):
+                continue
+            try:
+                article_id = int(item.get('id'))
+            except (TypeError, ValueError):
+                continue
+            if article_id in wanted:
+                digests[article_id] = {
+                    'digest': str(item['digest']),
+                    'key_facts': [str(fact) for fact in item.get('key_facts') or []],
+                    'entities': [str(entity) for entity in item.get('entities') or []],
+                    'action': str(item['action']) if item.get('action') else None
+                }
+        return digests
+
+    def format_article(self, article, duplicates=None, digests=None):
+        """An article's entry in a summary prompt: its digest if it has one, else its text."""
+        duplicates = duplicates or {}
+        digest = (digests or {}).get(article.id)
+        if digest is None:
+            body = f"Summary: {article.plaintext}"
+        else:
+            body = f"Digest: {digest['digest']}"
+            if digest['key_facts']:
+                body += f"\nKey facts: {'; '.join(digest['key_facts'])}"
+            if digest['entities']:
+                body += f"\nEntities: {', '.join(digest['entities'])}"
+            if digest['action']:
+                body += f"\nSuggested action: {digest['action']}"
+        article_text = f"""
 Title: {article.title}
 URL: {article.url}
 Author: {article.author or 'Unknown'}
-Summary: {article.summary}
+{body}
             """
-            article_texts.append(article_text)
+        also_reported = [duplicate.url for duplicate in duplicates.get(article.id, [])[:MAX_ALSO_REPORTED]]
+        if also_reported:
+            article_text = f"{article_text.rstrip()}\nAlso reported at: {', '.join(also_reported)}\n"
+        return article_text
+
+    def build_prompt(self, articles, category, period_days=1, duplicates=None, digests=None, daily_sections=None):
+        """The summary prompt of a category, with all of ``articles``; choose them with ``prompt_articles``."""
+        article_texts = [self.format_article(article, duplicates, digests) for article in articles]
+
+        if daily_sections is not None:
+            return WEEKLY_FROM_DAILY_PROMPT.format(
+                category=category,
+                daily_summaries=chr(10).join(self.format_daily_section(date, section)
+                                             for date, section in daily_sections) or 'None',
+                articles=chr(10).join(article_texts) or 'None'
+            )
         
         # Choose appropriate prompt based on period
         prompt = WEEKLY_SUMMARY_PROMPT if period_days >= 7 else ARTICLE_SUMMARY_PROMPT
-        prompt = prompt.format(
+        return prompt.format(
             category=category,
             articles=chr(10).join(article_texts)
         )
 
+    @staticmethod
+    def format_daily_section(date, section):
+        text = f"""
+Date: {date}
+Title: {section.get('section_title', '')}
+Summary: {section.get('summary', '')}
+            """
+        tasks = [task.get('task', '') for task in section.get('actionable_tasks') or [] if isinstance(task, dict)]
+        if tasks:
+            text = f"{text.rstrip()}\nTasks: {'; '.join(tasks)}\n"
+        return text
+
+    async def generate_summary(self, client, articles, category, period_days=1, duplicates=None, digests=None,
+                               daily_sections=None):
+        """Summarise a category's articles through a ThrottledClient.
+
+        ``duplicates`` maps an article id to the near-duplicate articles it
+        stands in for; their links are listed under the representative.
+        Articles with an entry in ``digests`` are given by their digest.
+        With ``daily_sections`` the weekly summary is written from them and
+        the articles.
+        """
+        if not articles and not daily_sections:
+            logger.info(f"No articles found")
+            return {
+                "section_title": "No Summary Available",
+                "summary": "No articles to summarize for this category.",
+                "actionable_tasks": []
+            }
+
+        included = self.prompt_articles(articles, category, period_days, duplicates, digests, daily_sections)
+        request = self.summary_request(
+            self.build_prompt(included, category, period_days, duplicates, digests, daily_sections)
+        )
+
         try:
 
-            response = self.client.messages.create(
-                model="claude-3-5-sonnet-20241022",
-                max_tokens=2000,
-                temperature=0,
-                system="You are a skilled journalist writing clear, informative summaries for a news digest email.",
-                messages=[{"role": "user", "content": prompt}]
-            )
-            
-            response_text = response.content[0].text
+            # The cache is read and written on a thread, as every category's summary runs at once
+            response_text = await asyncio.to_thread(self.cache.get, request) if self.cache is not None else None
+            usage = None
+            if response_text is None:
+                response = await client.create(**request)
+                response_text = response.content[0].text
+                usage = response.usage
+            else:
+                logger.info(f"Using cached summary response for {category}")
             
-            try:
-                summary_dict = json.loads(response_text)
-                logger.info(f"Successfully parsed summary for {category}")
-                return summary_dict
-            except json.JSONDecodeError as e:
-                logger.error(f"Failed to parse JSON from Claude response for {category}: {str(e)}")
-                logger.error(f"Raw text: {response_text[:200]}...")
-                return {
-                    "section_title": f"Error Processing {category}",
-                    "summary": "Error parsing AI-generated summary. Please check the original articles.",
-                    "actionable_tasks": []
-                }
+            summary_dict, parsed = self.parse_summary(category, response_text)
+            if parsed:
+                # Only answers that parsed are worth serving again
+                if usage is not None and self.cache is not None:
+                    await asyncio.to_thread(self.cache.put, request, response_text, usage)
+                self.last_included[category] = [article.id for article in included]
+            return summary_dict
 
         except Exception as e:
             logger.error(f"Error generating summary for {category}: {str(e)}")
+            return self.error_summary(category)
+
+    def summary_request(self, prompt):
+        """The Messages API request for a category's summary prompt."""
+        return dict(
+            model=self.MODEL,
+            max_tokens=2000,
+            system=self.SYSTEM_PROMPT,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=0
+        )
+
+    @staticmethod
+    def parse_summary(category, response_text):
+        """The summary in a response, and whether it parsed; a placeholder section if it did not."""
+        try:
+            summary_dict = json.loads(response_text)
+            logger.info(f"Successfully parsed summary for {category}")
+            return summary_dict, True
+        except json.JSONDecodeError as e:
+            logger.error(f"Failed to parse JSON from Claude response for {category}: {str(e)}")
+            logger.error(f"Raw text: {response_text[:200]}...")
             return {
-                "section_title": f"Error in {category}",
-                "summary": f"Error generating AI summary for {category}. Please check the original articles.",
+                "section_title": f"Error Processing {category}",
+                "summary": "Error parsing AI-generated summary. Please check the original articles.",
                 "actionable_tasks": []
+            }, False
+
+    @staticmethod
+    def error_summary(category):
+        return {
+            "section_title": f"Error in {category}",
+            "summary": f"Error generating AI summary for {category}. Please check the original articles.",
+            "actionable_tasks": []
+        }
+
+    def prepare_batch(self, categorized_articles, period_days=1, duplicates=None, digests=None,
+                      daily_sections=None):
+        """The summary requests of a run, for a Message Batch.
+
+        Returns the requests to submit, as dicts with the ``custom_id``,
+        ``category``, ``request`` and the ids of the articles it includes,
+        and the summaries already settled: categories without articles and
+        responses in the cache, with their entry in ``requests`` marked
+        ``cached``. There is no map stage: articles are given by their
+        stored digest when they have one, else by their text.
+        """
+        duplicates = duplicates or {}
+        self.packing_stats = {'articles_packed': 0, 'articles_dropped': 0, 'prompt_tokens_estimated': 0}
+        requests, settled = [], {}
+        cache_start = self.cache.stats() if self.cache is not None else None
+        for index, (category, articles) in enumerate(categorized_articles.items()):
+            sections = daily_sections.get(category, []) if daily_sections is not None else None
+            if not articles and not sections:
+                settled[category] = {
+                    "section_title": "No Summary Available",
+                    "summary": "No articles to summarize for this category.",
+                    "actionable_tasks": []
+                }
+                continue
+            included = self.prompt_articles(articles, category, period_days, duplicates, digests, sections)
+            request = self.summary_request(
+                self.build_prompt(included, category, period_days, duplicates, digests, sections)
+            )
+            entry = {
+                # Custom ids are limited to letters, digits, - and _
+                'custom_id': f"category-{index}",
+                'category': category,
+                'request': request,
+                'included': [article.id for article in included],
+                'cached': False
             }
+            cached = self.cache.get(request) if self.cache is not None else None
+            if cached is not None:
+                summary_dict, parsed = self.parse_summary(category, cached)
+                if parsed:
+                    settled[category] = summary_dict
+                    entry['cached'] = True
+            requests.append(entry)
+
+        self.last_stats = {
+            'batch_requests': sum(1 for entry in requests if not entry['cached']),
+            'prompt_token_budget': self.prompt_token_budget,
+            **self.packing_stats
+        }
+        if self.cache is not None:
+            self.last_stats.update(self._cache_stats(cache_start, self.cache.stats()))
+        return requests, settled
+
+    def batch_client(self):
+        return anthropic.Anthropic(api_key=self.api_key, base_url=self.base_url, max_retries=self.max_retries)
+
+    def submit_batch(self, requests):
+        """Submit summary requests as one Message Batch; returns its id."""
+        batch = self.batch_client().messages.batches.create(requests=[{
+            'custom_id': entry['custom_id'],
+            'params': entry['request']
+        } for entry in requests])
+        logger.info(f"Submitted {len(requests)} summary requests as Message Batch {batch.id}")
+        return batch.id
+
+    def batch_results(self, batch_id):
+        """A Message Batch and, once it has ended, its results.
+
+        The results map each custom id to ``(response text, usage)`` for a
+        request that succeeded, or to an error string.
+        """
+        client = self.batch_client()
+        batch = client.messages.batches.retrieve(batch_id)
+        if batch.processing_status != 'ended':
+            return batch, None
+        results = {}
+        for item in client.messages.batches.results(batch_id):
+            if item.result.type == 'succeeded':
+                results[item.custom_id] = (item.result.message.content[0].text, item.result.message.usage)
+            else:
+                error = getattr(item.result, 'error', None)
+                results[item.custom_id] = f"{item.result.type}: {error}" if error else item.result.type
+        return batch, results
 
 class FeedSummarizer:
-    def __init__(self, summarizer: ArticleSummarizer):
+    def __init__(self, summarizer: ArticleSummarizer, weekly_from_dailies=True):
         self.summarizer = summarizer
+        # Write weekly summaries from the week's daily summaries rather than all its articles
+        self.weekly_from_dailies = weekly_from_dailies
         self.app, self.db = get_db()
-        self.app.app_context().push()
+        self._app_context = self.app.app_context()
+        self._app_context.push()
+        self.runs = 0
+        self.last_run_stats = {}
+
+    def close(self):
+        """Release the database session and pop the app context."""
+        self.db.session.remove()
+        self._app_context.pop()
+
+    def run(self, summary_period=1, batch=None):
+        """Generate one summary and record the stats of the run.
+
+        With ``batch='submit'`` the summary is submitted as a Message Batch
+        instead, after storing the results of any batches that have ended;
+        with ``batch='collect'`` those results are all the run looks for.
+        """
+        started_at = datetime.now(timezone.utc)
+        run_start = time.monotonic()
+        self.summarizer.last_stats = {}
+        status = 'complete'
+        categories = 0
+        batches = None
+        try:
+            if batch is None:
+                categories = len(self.generate_daily_summary(summary_period=summary_period))
+            else:
+                batches = self.run_batches(summary_period, submit=batch == 'submit')
+        except Exception:
+            status = 'error'
+            raise
+        finally:
+            # Return the connection to the pool and drop the identity map between runs
+            self.db.session.remove()
+            self.runs += 1
+            self.last_run_stats = {
+                'run': self.runs,
+                'started_at': started_at.isoformat(),
+                'duration': round(time.monotonic() - run_start, 3),
+                'summary_period': summary_period,
+                'status': status,
+                'categories': categories,
+                'llm': self.summarizer.last_stats,
+                'peak_rss_mb': round(peak_rss_mb(), 1),
+                'db_pool': self.db.engine.pool.status()
+            }
+            if batches is not None:
+                self.last_run_stats['batches'] = batches
 
     def cleanup_old_articles(self):
         """Delete articles that are older than 10 days."""
         try:
             cutoff_date = datetime.now(timezone.utc) - timedelta(days=10)
-            old_articles = Article.query.filter(Article.published < cutoff_date).all()
+
+            # Not every database enforces the cascade, so clear the band index and bodies explicitly
+            old_ids = self.db.session.query(Article.id).filter(Article.published < cutoff_date)
+            ArticleSimhashBand.query.filter(ArticleSimhashBand.article_id.in_(old_ids))\
+                .delete(synchronize_session=False)
+            ArticleBody.query.filter(ArticleBody.article_id.in_(old_ids))\
+                .delete(synchronize_session=False)
+            ArticleDigest.query.filter(ArticleDigest.article_id.in_(old_ids))\
+                .delete(synchronize_session=False)
+            DailySummaryArticle.query.filter(DailySummaryArticle.article_id.in_(old_ids))\
+                .delete(synchronize_session=False)
             
-            if old_articles:
-                count = len(old_articles)
-                for article in old_articles:
-                    self.db.session.delete(article)
-                
-                self.db.session.commit()
+            # One bulk delete: deleting through the ORM would load each article's body first
+            count = Article.query.filter(Article.published < cutoff_date)\
+                .delete(synchronize_session=False)
+            # Commit even when nothing went: the deletes opened a write transaction
+            self.db.session.commit()
+            if count:
                 logger.info(f"Successfully deleted {count} articles older than 10 days")
             else:
                 logger.info("No articles found older than 10 days")
@@ -113,57 +555,203 @@ class FeedSummarizer:
             self.db.session.rollback()
             raise
 
+    def collapse_near_duplicates(self, articles, time_threshold):
+        """Keep one article per cluster of near-duplicates.
+
+        Candidate pairs come from the SimHash band index: only buckets shared
+        by two or more articles of the period are read. The earliest article of
+        each cluster is kept, and the rest are returned keyed by its id so the
+        summary can link to them.
+        """
+        period_ids = self.db.session.query(Article.id).filter(Article.published > time_threshold)
+        shared_buckets = self.db.session.query(ArticleSimhashBand.band, ArticleSimhashBand.bucket)\
+            .filter(ArticleSimhashBand.article_id.in_(period_ids))\
+            .group_by(ArticleSimhashBand.band, ArticleSimhashBand.bucket)\
+            .having(func.count() > 1)\
+            .subquery()
+        bucket_rows = self.db.session.query(
+            ArticleSimhashBand.band, ArticleSimhashBand.bucket, ArticleSimhashBand.article_id
+        ).join(shared_buckets, and_(
+            ArticleSimhashBand.band == shared_buckets.c.band,
+            ArticleSimhashBand.bucket == shared_buckets.c.bucket
+        )).filter(ArticleSimhashBand.article_id.in_(period_ids)).all()
+
+        by_id = {article.id: article for article in articles}
+        fingerprints = {article.id: article.simhash for article in articles if article.simhash is not None}
+        pairs = candidate_pairs(bucket_rows)
+        pairs = pairs[np.isin(pairs, list(fingerprints)).all(axis=1)]
+        clusters = cluster(fingerprints, pairs, self.app.config['NEAR_DUPLICATE_MAX_DISTANCE'])
+
+        duplicates = {}
+        for ids in clusters:
+            if len(ids) < 2:
+                continue
+            members = sorted((by_id[article_id] for article_id in ids), key=lambda a: (a.published, a.id))
+            duplicates[members[0].id] = members[1:]
+
+        dropped = {duplicate.id for members in duplicates.values() for duplicate in members}
+        if dropped:
+            logger.info(f"Collapsed {len(dropped) + len(duplicates)} near-duplicate articles into {len(duplicates)} stories")
+        return [article for article in articles if article.id not in dropped], duplicates
+
+    def load_digests(self, time_threshold):
+        """The stored digests of the period's articles, keyed by article id."""
+        rows = ArticleDigest.query.join(Article, Article.id == ArticleDigest.article_id)\
+            .filter(Article.published > time_threshold)\
+            .all()
+        return {row.article_id: {
+            'digest': row.digest,
+            'key_facts': row.key_facts,
+            'entities': row.entities,
+            'action': row.action
+        } for row in rows}
+
+    def store_digests(self, digests):
+        """Store new digests, keeping any that another run stored first."""
+        if not digests:
+            return
+        now = datetime.now(timezone.utc)
+        rows = [{
+            'article_id': article_id,
+            **digest,
+            'model': self.summarizer.DIGEST_MODEL,
+            'created_at': now
+        } for article_id, digest in digests.items()]
+        insert_ignore_duplicates(self.db.session, ArticleDigest, rows, index_elements=['article_id'])
+        self.db.session.commit()
+
+    def load_daily_summaries(self, since):
+        """The complete daily summaries generated since ``since``, the latest of each date, oldest first."""
+        rows = DailySummary.query.filter(
+            DailySummary.summary_type == 'daily',
+            DailySummary.status == 'complete',
+            DailySummary.generated_at > since.isoformat()
+        ).order_by(DailySummary.generated_at).all()
+        latest = {row.date: row for row in rows}
+        return [latest[date] for date in sorted(latest)]
+
+    @staticmethod
+    def daily_sections(dailies):
+        """The usable sections of ``dailies``, as ``(date, section)`` pairs keyed by category."""
+        sections = {}
+        for daily in dailies:
+            content = json.loads(daily.summary) if isinstance(daily.summary, str) else daily.summary
+            for category, section in content.items():
+                if not isinstance(section, dict) or not section.get('summary'):
+                    continue
+                # Failed and empty categories cover nothing
+                title = section.get('section_title', '')
+                if title.startswith('Error') or title == 'No Summary Available':
+                    continue
+                sections.setdefault(category, []).append((daily.date, section))
+        return sections
+
+    def uncovered_articles(self, time_threshold, summary_ids):
+        """The period's articles that none of the summaries ``summary_ids`` covered."""
+        covered = self.db.session.query(DailySummaryArticle.article_id)\
+            .filter(DailySummaryArticle.summary_id.in_(summary_ids))
+        return Article.query.join(Feed).filter(
+            Article.published > time_threshold,
+            ~Article.id.in_(covered)
+        ).order_by(Feed.category, Article.published.desc()).all()
+
+    def existing_summary(self, today, summary_period, summary_type):
+        """The complete summary of this type already generated today within the period, if any."""
+        period_ago = (datetime.now(timezone.utc) - timedelta(hours=24 * summary_period)).isoformat()
+        return DailySummary.query.filter(
+            DailySummary.date == today,
+            DailySummary.generated_at > period_ago,
+            DailySummary.status == 'complete',
+            DailySummary.summary_type == summary_type
+        ).first()
+
+    def period_articles(self, summary_period, summary_type):
+        """What a summary is written from: ``(categorized articles, duplicates, daily sections, period start)``.
+
+        Daily sections are None unless the weekly summary is written from
+        the daily ones, when the articles are those no daily covered.
+        """
+        time_threshold = datetime.now(timezone.utc) - timedelta(days=summary_period)
+        daily_sections = None
+        if summary_type == 'weekly' and self.weekly_from_dailies:
+            # Compose the week from its daily summaries and the articles none of them covered
+            dailies = self.load_daily_summaries(time_threshold)
+            daily_sections = self.daily_sections(dailies)
+            articles = self.uncovered_articles(time_threshold, [daily.id for daily in dailies])
+            logger.info(f"Writing the weekly summary from {len(dailies)} daily summaries "
+                        f"and {len(articles)} articles they did not cover")
+        else:
+            # Get articles from the specified period
+            articles = Article.query.join(Feed).filter(
+                Article.published > time_threshold
+            ).order_by(Feed.category, Article.published.desc()).all()
+        articles, duplicates = self.collapse_near_duplicates(articles, time_threshold)
+        
+        categorized_articles = {}
+        for article in articles:
+            category = article.feed.category
+            if category not in categorized_articles:
+                categorized_articles[category] = []
+            categorized_articles[category].append(article)
+        if daily_sections is not None:
+            categorized_articles = {
+                category: categorized_articles.get(category, [])
+                for category in sorted(set(categorized_articles) | set(daily_sections))
+            }
+        return categorized_articles, duplicates, daily_sections, time_threshold
+
+    @staticmethod
+    def covered_ids(included, duplicates):
+        """The ids of the included articles and of the near-duplicates they stand for."""
+        covered = set(included)
+        covered |= {duplicate.id for article_id in included for duplicate in duplicates.get(article_id, [])}
+        return covered
+
+    def store_summary(self, today, summary_type, summary_content, covered=()):
+        """Add a complete summary, with the articles it covered if it is a daily one."""
+        # Store everything as strings
+        new_summary = DailySummary(
+            date=today,
+            summary=json.dumps(summary_content, ensure_ascii=False),
+            generated_at=datetime.now(timezone.utc).isoformat(),
+            status='complete',
+            summary_type=summary_type
+        )
+        if summary_type == 'daily':
+            # The articles the summary covered, near-duplicates included, for the weekly summary
+            new_summary.covered_articles = [DailySummaryArticle(article_id=article_id)
+                                            for article_id in sorted(covered)]
+        self.db.session.add(new_summary)
+        return new_summary
+
     def generate_daily_summary(self, summary_period=1) -> dict:
         try:
             # Clean up old articles before generating new summary
             self.cleanup_old_articles()
             
             today = datetime.now(timezone.utc).date().isoformat()
-            period_ago = (datetime.now(timezone.utc) - timedelta(hours=24 * summary_period)).isoformat()
             current_summary_type = 'weekly' if summary_period >= 7 else 'daily'
             
             # Check for existing summary in the last period, including summary_type
-            existing_summary = DailySummary.query.filter(
-                DailySummary.date == today,
-                DailySummary.generated_at > period_ago,
-                DailySummary.status == 'complete',
-                DailySummary.summary_type == current_summary_type
-            ).first()
-            
+            existing_summary = self.existing_summary(today, summary_period, current_summary_type)
             if existing_summary:
                 return json.loads(existing_summary.summary)
             
-            # Get articles from the specified period
-            time_threshold = datetime.now(timezone.utc) - timedelta(days=summary_period)
-            articles = Article.query.join(Feed).filter(
-                Article.published > time_threshold
-            ).order_by(Feed.category, Article.published.desc()).all()
+            categorized_articles, duplicates, daily_sections, time_threshold = \
+                self.period_articles(summary_period, current_summary_type)
             
-            categorized_articles = {}
-            for article in articles:
-                category = article.feed.category
-                if category not in categorized_articles:
-                    categorized_articles[category] = []
-                categorized_articles[category].append(article)
-            
-            summary_content = {}
-            for category, articles in categorized_articles.items():
-                summary_content[category] = self.summarizer.generate_summary(
-                    articles, category, period_days=summary_period
-                )
-            
-            current_time = datetime.now(timezone.utc).isoformat()
-            
-            # Store everything as strings
-            new_summary = DailySummary(
-                date=today,
-                summary=json.dumps(summary_content, ensure_ascii=False),
-                generated_at=current_time,
-                status='complete',
-                summary_type=current_summary_type
+            # Each article is digested once, by the first run that includes it
+            digests = self.load_digests(time_threshold)
+            stored = set(digests)
+            summary_content = self.summarizer.generate_summaries(
+                categorized_articles, period_days=summary_period, duplicates=duplicates, digests=digests,
+                daily_sections=daily_sections
             )
+            self.store_digests({article_id: digest for article_id, digest in digests.items()
+                                if article_id not in stored})
             
-            self.db.session.add(new_summary)
+            included = [article_id for ids in self.summarizer.last_included.values() for article_id in ids]
+            self.store_summary(today, current_summary_type, summary_content, self.covered_ids(included, duplicates))
             self.db.session.commit()
             
             return summary_content
@@ -173,6 +761,128 @@ class FeedSummarizer:
             self.db.session.rollback()
             raise
 
+    def run_batches(self, summary_period=1, submit=True):
+        """Collect the Message Batches that have ended, then submit this period's summary if it is due."""
+        collected = self.collect_summary_batches()
+        submitted = self.submit_summary_batch(summary_period) if submit else None
+        return {
+            'collected': collected,
+            'submitted': submitted,
+            'pending': SummaryBatch.query.filter_by(status='submitted').count()
+        }
+
+    def submit_summary_batch(self, summary_period=1):
+        """Submit this period's summary as a Message Batch; returns the batch id, or None if none was needed.
+
+        Everything the results need is stored with the batch, so they can be
+        collected by a later process. Categories that need no request (no
+        articles, or a cached response) are settled at once, and when none
+        needs one the summary is stored straight away.
+        """
+        try:
+            self.cleanup_old_articles()
+
+            today = datetime.now(timezone.utc).date().isoformat()
+            summary_type = 'weekly' if summary_period >= 7 else 'daily'
+            if self.existing_summary(today, summary_period, summary_type):
+                logger.info(f"The {summary_type} summary for {today} already exists")
+                return None
+            pending = SummaryBatch.query.filter_by(date=today, summary_type=summary_type, status='submitted').first()
+            if pending:
+                logger.info(f"The {summary_type} summary for {today} is waiting on Message Batch {pending.batch_id}")
+                return None
+
+            categorized_articles, duplicates, daily_sections, time_threshold = \
+                self.period_articles(summary_period, summary_type)
+            requests, settled = self.summarizer.prepare_batch(
+                categorized_articles, period_days=summary_period, duplicates=duplicates,
+                digests=self.load_digests(time_threshold), daily_sections=daily_sections
+            )
+            batch = SummaryBatch(
+                date=today,
+                summary_type=summary_type,
+                status='submitted',
+                requests={entry['custom_id']: {
+                    'category': entry['category'],
+                    'key': ResponseCache.key(entry['request']),
+                    'covered': sorted(self.covered_ids(entry['included'], duplicates)),
+                    'cached': entry['cached']
+                } for entry in requests},
+                presets=settled,
+                submitted_at=datetime.now(timezone.utc)
+            )
+            self.db.session.add(batch)
+            to_submit = [entry for entry in requests if not entry['cached']]
+            if to_submit:
+                batch.batch_id = self.summarizer.submit_batch(to_submit)
+            else:
+                self.finish_batch(batch, {})
+            self.db.session.commit()
+            return batch.batch_id
+
+        except Exception as e:
+            logger.error(f"Error submitting summary batch: {str(e)}")
+            self.db.session.rollback()
+            raise
+
+    def collect_summary_batches(self):
+        """Store the summaries of submitted batches that have ended; returns how many were collected."""
+        collected = 0
+        for batch in SummaryBatch.query.filter_by(status='submitted').order_by(SummaryBatch.submitted_at).all():
+            try:
+                message_batch, results = self.summarizer.batch_results(batch.batch_id)
+            except Exception as e:
+                logger.error(f"Error checking Message Batch {batch.batch_id}: {str(e)}")
+                continue
+            batch.request_counts = message_batch.request_counts.model_dump()
+            if results is None:
+                logger.info(f"Message Batch {batch.batch_id} is still {message_batch.processing_status}")
+            else:
+                self.finish_batch(batch, results)
+                collected += 1
+            self.db.session.commit()
+        return collected
+
+    def finish_batch(self, batch, results):
+        """Store the summary of a batch from its results, or mark it failed if no category succeeded."""
+        summary_content = dict(batch.presets)
+        covered = set()
+        succeeded = 0
+        for custom_id, entry in batch.requests.items():
+            category = entry['category']
+            if entry['cached']:
+                succeeded += 1
+                covered.update(entry['covered'])
+                continue
+            result = results.get(custom_id, 'missing from the results')
+            if isinstance(result, str):
+                logger.error(f"Batch request for {category} failed: {result}")
+                summary_content[category] = self.summarizer.error_summary(category)
+                continue
+            response_text, usage = result
+            summary_content[category], parsed = self.summarizer.parse_summary(category, response_text)
+            if parsed:
+                succeeded += 1
+                covered.update(entry['covered'])
+                if self.summarizer.cache is not None:
+                    self.summarizer.cache.store(entry['key'], self.summarizer.MODEL, response_text, usage)
+
+        batch.collected_at = datetime.now(timezone.utc)
+        if batch.requests and not succeeded:
+            # Leave the period without a summary, so the next submission tries again
+            batch.status = 'failed'
+            batch.error = 'No category summary succeeded'
+            logger.error(f"Message Batch {batch.batch_id} failed: no category summary succeeded")
+            return
+        summary = self.store_summary(batch.date, batch.summary_type,
+                                     {category: summary_content[category] for category in sorted(summary_content)},
+                                     covered)
+        self.db.session.flush()
+        batch.summary_id = summary.id
+        batch.status = 'collected'
+        source = f"Message Batch {batch.batch_id}" if batch.batch_id else 'cached responses'
+        logger.info(f"Stored the {batch.summary_type} summary for {batch.date} from {source}")
+
 def main():
     """Main entry point for generating the daily feed summary."""
     parser = argparse.ArgumentParser(description='RSS Feed Summarizer')
@@ -185,31 +895,56 @@ def main():
                        help='Run once and exit (for cron jobs)')
     parser.add_argument('--summary_period', type=int, choices=[1, 7], default=1,
                        help='Period to summarize in days (1 or 7, default: 1)')
+    parser.add_argument('--stats-file',
+                       help='Write the stats of the last run to this JSON file')
+    parser.add_argument('--base-url',
+                       help='Messages API base URL, e.g. a local fake server (default: ANTHROPIC_BASE_URL)')
+    parser.add_argument('--concurrency', type=int, default=None,
+                       help='Categories summarised at once (default: SUMMARY_CONCURRENCY)')
+    parser.add_argument('--weekly-from-articles', action='store_true',
+                       help='Write the weekly summary from all the week\'s articles instead of its daily summaries')
+    parser.add_argument('--batch', action='store_true',
+                       help='Submit the summary as a Message Batch, after storing the results of finished batches')
+    parser.add_argument('--collect-batches', action='store_true',
+                       help='Only store the results of finished Message Batches')
+    parser.add_argument('--bypass-cache', action='store_true',
+                       help='Ask the API even for requests with a cached response; fresh responses are still cached')
     
     args = parser.parse_args()
     
+    api_key = os.getenv('CLAUDE_API_KEY') or args.api_key
+    if not api_key:
+        raise ValueError("API key not found in CLAUDE_API_KEY environment variable or --api-key argument")
+
+    stop = install_stop_handlers()
+    app, db = get_db()
+    cache = ResponseCache.from_config(db, app.config, bypass=args.bypass_cache)
+    summarizer = ArticleSummarizer.from_config(api_key, app.config, base_url=args.base_url, cache=cache)
+    if args.concurrency:
+        summarizer.concurrency = args.concurrency
+    feed_summarizer = FeedSummarizer(summarizer, weekly_from_dailies=not args.weekly_from_articles)
+    
     try:
-        while True:
-            api_key = os.getenv('CLAUDE_API_KEY') or args.api_key
-            if not api_key:
-                raise ValueError("API key not found in CLAUDE_API_KEY environment variable or --api-key argument")
- 
-            summarizer = ArticleSummarizer(api_key=api_key)
-            feed_summarizer = FeedSummarizer(summarizer)
-            summary = feed_summarizer.generate_daily_summary(summary_period=args.summary_period)
+        while not stop.is_set():
+            feed_summarizer.run(summary_period=args.summary_period,
+                                batch='collect' if args.collect_batches else 'submit' if args.batch else None)
+            if args.stats_file:
+                write_stats(args.stats_file, feed_summarizer.last_run_stats)
             
             if args.cron:
                 logger.info("Running in cron mode - exiting after single execution")
                 break
                 
             logger.info(f"Sleeping for {args.interval} seconds...")
-            time.sleep(args.interval)
+            stop.wait(args.interval)
             
     except KeyboardInterrupt:
         logger.info("Summary generation stopped by user")
     except Exception as e:
         logger.error(f"Summary generation failed: {str(e)}")
         raise
+    finally:
+        feed_summarizer.close()
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
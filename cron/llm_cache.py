@@ -0,0 +1,126 @@
+import hashlib
+import json
+import logging
+from datetime import datetime, timezone, timedelta
+
+from sqlalchemy import delete, func, insert, select, update
+
+from db_helper import LLMResponse
+
+logger = logging.getLogger(__name__)
+
+
+class ResponseCache:
+    """Persistent cache of Messages API responses, keyed by the request.
+
+    The key is a SHA-256 of the whole request: model, system prompt,
+    messages and parameters, so a different prompt, article set or setting
+    is never served an old answer. Entries live for ``ttl``. When the
+    cached responses grow past ``max_bytes``, the least recently used are
+    dropped. With ``bypass`` nothing is read from the cache but fresh
+    responses still replace what is there.
+
+    Reads and writes go through their own connections, never the caller's
+    session, so a cached response survives a run that later fails.
+    """
+
+    def __init__(self, db, ttl=timedelta(hours=72), max_bytes=50 * 1024 * 1024, bypass=False):
+        self.db = db
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.bypass = bypass
+        self.hits = 0
+        self.misses = 0
+        self.tokens_saved = 0
+
+    @classmethod
+    def from_config(cls, db, config, bypass=False):
+        return cls(
+            db,
+            ttl=timedelta(hours=config['LLM_CACHE_TTL_HOURS']),
+            max_bytes=config['LLM_CACHE_MAX_MB'] * 1024 * 1024,
+            bypass=bypass
+        )
+
+    @staticmethod
+    def key(request):
+        canonical = json.dumps(request, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+    def get(self, request):
+        """The cached response text for ``request``, or None."""
+        if self.bypass:
+            self.misses += 1
+            return None
+        key = self.key(request)
+        now = datetime.now(timezone.utc)
+        table = LLMResponse.__table__
+        with self.db.engine.begin() as connection:
+            row = connection.execute(
+                select(table.c.response, table.c.input_tokens, table.c.output_tokens)
+                .where(table.c.key == key, table.c.created_at > now - self.ttl)
+            ).first()
+            if row is None:
+                self.misses += 1
+                return None
+            connection.execute(
+                update(table).where(table.c.key == key)
+                .values(hits=table.c.hits + 1, last_used_at=now)
+            )
+        self.hits += 1
+        self.tokens_saved += (row.input_tokens or 0) + (row.output_tokens or 0)
+        return row.response
+
+    def put(self, request, response_text, usage=None):
+        """Store a response, replacing any earlier one for the same request."""
+        self.store(self.key(request), request.get('model', ''), response_text, usage)
+
+    def store(self, key, model, response_text, usage=None):
+        """``put`` by the request's key, for responses that arrive after the request is gone."""
+        now = datetime.now(timezone.utc)
+        table = LLMResponse.__table__
+        try:
+            with self.db.engine.begin() as connection:
+                connection.execute(delete(table).where(table.c.key == key))
+                connection.execute(insert(table).values(
+                    key=key,
+                    model=model,
+                    response=response_text,
+                    input_tokens=getattr(usage, 'input_tokens', None),
+                    output_tokens=getattr(usage, 'output_tokens', None),
+                    size=len(response_text.encode('utf-8')),
+                    created_at=now,
+                    last_used_at=now,
+                    hits=0
+                ))
+        except Exception as e:
+            # Usually another process caching the same response first; either copy will do
+            logger.warning(f"Could not cache LLM response: {str(e)}")
+
+    def evict(self):
+        """Drop expired entries, then the least recently used until under ``max_bytes``."""
+        now = datetime.now(timezone.utc)
+        table = LLMResponse.__table__
+        with self.db.engine.begin() as connection:
+            expired = connection.execute(delete(table).where(table.c.created_at <= now - self.ttl)).rowcount
+            total = connection.execute(select(func.coalesce(func.sum(table.c.size), 0))).scalar()
+            evicted = []
+            if total > self.max_bytes:
+                for key, size in connection.execute(
+                        select(table.c.key, table.c.size).order_by(table.c.last_used_at)).all():
+                    if total <= self.max_bytes:
+                        break
+                    evicted.append(key)
+                    total -= size
+                connection.execute(delete(table).where(table.c.key.in_(evicted)))
+        if expired or evicted:
+            logger.info(f"Evicted {expired} expired and {len(evicted)} least recently used LLM responses")
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'cache_hits': self.hits,
+            'cache_misses': self.misses,
+            'cache_hit_rate': round(self.hits / lookups, 3) if lookups else None,
+            'cache_tokens_saved': self.tokens_saved,
+        }
@@ -0,0 +1,168 @@
+import asyncio
+import inspect
+import logging
+import random
+import time
+from datetime import datetime, timezone
+
+import anthropic
+
+logger = logging.getLogger(__name__)
+
+# Rate limited and overloaded: worth waiting out, unlike any other error status
+RETRY_STATUSES = (429, 529)
+
+
+def _seconds_until(value, now):
+    """Seconds from ``now`` until an RFC 3339 timestamp header, or None if unparseable."""
+    try:
+        reset = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except (AttributeError, ValueError):
+        return None
+    return max(0.0, (reset - now).total_seconds())
+
+
+def _header_int(headers, name):
+    value = headers.get(name)
+    return int(value) if value and value.isdigit() else None
+
+
+class TokenBucket:
+    """Hands out ``per_minute`` units a minute, refilled continuously.
+
+    The server has the final say: ``sync`` lowers the balance to what a
+    response reports as remaining, and when nothing remains every caller is
+    held until the server has some to give again. Without ``per_minute``
+    only the server's limits apply.
+    """
+
+    def __init__(self, per_minute=None):
+        self.capacity = per_minute or None
+        self.tokens = float(per_minute or 0)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.lock = asyncio.Lock()
+
+    def _refill(self, now):
+        if self.capacity:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.capacity / 60)
+        self.updated = now
+
+    async def acquire(self, amount=1):
+        """Wait until ``amount`` units are available and take them. Returns the seconds waited."""
+        waited = 0.0
+        # Waiters queue on the lock, so they are served in order
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                wait = self.blocked_until - now
+                if wait <= 0:
+                    if not self.capacity:
+                        return waited
+                    amount = min(amount, self.capacity)
+                    if self.tokens >= amount:
+                        self.tokens -= amount
+                        return waited
+                    wait = (amount - self.tokens) * 60 / self.capacity
+                await asyncio.sleep(wait)
+                waited += wait
+
+    def sync(self, remaining, reset_in, limit=None):
+        """Take in the remaining count, reset time and limit a response reported.
+
+        The reset is when the server's bucket is full again, but it refills
+        continuously: with nothing left, wait for one unit to come back.
+        """
+        now = time.monotonic()
+        self._refill(now)
+        if remaining is not None and self.capacity:
+            self.tokens = min(self.tokens, remaining)
+        if remaining == 0 and reset_in:
+            self.hold(min(reset_in, 60 / limit) if limit else reset_in)
+
+    def hold(self, seconds):
+        """Let nobody through for ``seconds``."""
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+
+class ThrottledClient:
+    """Sends Messages API requests concurrently, within the account's rate limits.
+
+    At most ``concurrency`` requests are in flight. Each one first takes a
+    request and its estimated input tokens from two token buckets, which
+    follow the ``anthropic-ratelimit-*`` headers of every response. A 429 or
+    529 is retried up to ``max_retries`` times after an exponential backoff
+    with full jitter, never sooner than the ``retry-after`` header asks, and
+    a 429 holds back every other request for that long too. The wrapped
+    client should be created with ``max_retries=0`` so it does not retry on
+    its own.
+    """
+
+    def __init__(self, client, concurrency=4, requests_per_minute=None, input_tokens_per_minute=None,
+                 max_retries=5, base_delay=1.0, max_delay=60.0):
+        self.client = client
+        self.semaphore = asyncio.Semaphore(max(1, concurrency))
+        self.requests = TokenBucket(requests_per_minute)
+        self.input_tokens = TokenBucket(input_tokens_per_minute)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.stats = {'requests': 0, 'retries': 0, 'throttled_seconds': 0.0, 'input_tokens': 0, 'output_tokens': 0}
+
+    @staticmethod
+    def estimate_input_tokens(request):
+        """A rough count of a request's input tokens: about four characters per token."""
+        chars = len(request.get('system') or '')
+        for message in request.get('messages', []):
+            content = message.get('content')
+            chars += len(content) if isinstance(content, str) else len(str(content))
+        return chars // 4 + 1
+
+    async def create(self, **request):
+        """``messages.create`` with throttling and retries; returns the parsed Message."""
+        estimate = self.estimate_input_tokens(request)
+        async with self.semaphore:
+            for attempt in range(self.max_retries + 1):
+                self.stats['throttled_seconds'] += await self.requests.acquire()
+                self.stats['throttled_seconds'] += await self.input_tokens.acquire(estimate)
+                self.stats['requests'] += 1
+                try:
+                    response = await self.client.messages.with_raw_response.create(**request)
+                except anthropic.APIStatusError as e:
+                    if e.status_code not in RETRY_STATUSES or attempt == self.max_retries:
+                        raise
+                    self._observe(e.response.headers)
+                    delay = self._backoff(attempt, e.response.headers)
+                    if e.status_code == 429:
+                        self.requests.hold(delay)
+                    self.stats['retries'] += 1
+                    logger.warning(f"Messages API answered {e.status_code}, retrying in {delay:.1f}s "
+                                   f"(attempt {attempt + 1} of {self.max_retries})")
+                    await asyncio.sleep(delay)
+                    continue
+                self._observe(response.headers)
+                message = response.parse()
+                # Newer SDK releases parse asynchronously
+                if inspect.isawaitable(message):
+                    message = await message
+                self.stats['input_tokens'] += message.usage.input_tokens
+                self.stats['output_tokens'] += message.usage.output_tokens
+                return message
+
+    def _backoff(self, attempt, headers):
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        try:
+            retry_after = float(headers.get('retry-after') or 0)
+        except ValueError:
+            retry_after = 0
+        return max(delay, min(retry_after, self.max_delay))
+
+    def _observe(self, headers):
+        now = datetime.now(timezone.utc)
+        for bucket, name in ((self.requests, 'requests'), (self.input_tokens, 'input-tokens')):
+            bucket.sync(
+                _header_int(headers, f'anthropic-ratelimit-{name}-remaining'),
+                _seconds_until(headers.get(f'anthropic-ratelimit-{name}-reset'), now),
+                _header_int(headers, f'anthropic-ratelimit-{name}-limit')
+            )
@@ -105,4 +105,88 @@ If there aren't enough articles to summarize, return:
 }}
 
 Return only the JSON with no additional text or formatting. The JSON should be minified with no unnecessary whitespace or newlines.
-'''
\ No newline at end of file
+'''
+
+ARTICLE_DIGEST_PROMPT = '''Please read these articles and write a compact digest of each one for a security team. The digests replace the articles when the daily and weekly summaries are written, so keep everything a summary would need and nothing else.
+
+For each article:
+1. Say in one or two sentences what happened
+2. List the key facts: dates, numbers, versions, CVE identifiers, names and short quotes
+3. List the entities involved: organisations, products, threat actors and malware
+4. Suggest one action a security team could take, only if the article supports one
+
+Use British English. Don't tell me about any problems.
+
+Articles to digest:
+{articles}
+
+Return exactly one JSON array with one object per article, in this format:
+[
+    {{
+        "id": 123,
+        "digest": "What happened, in one or two sentences",
+        "key_facts": ["A specific fact"],
+        "entities": ["An organisation, product or actor"],
+        "action": "A short suggested action, or null"
+    }}
+]
+
+Use the article ID given with each article. Return only the JSON with no additional text or formatting. The JSON should be minified with no unnecessary whitespace or newlines.
+'''
+
+WEEKLY_FROM_DAILY_PROMPT = '''Please write a summary of the past week's {category} news from these daily summaries, and from the articles the daily summaries did not cover. Create a comprehensive summary that:
+1. Identifies major themes and significant developments across the week
+2. Highlights key patterns and emerging trends
+3. Shows how different stories evolved over the week
+4. Identifies any shifts in focus or priorities
+5. Connects related stories into broader narratives
+6. Preserves critical details (dates, numbers, names, quotes)
+7. Organizes the week's information in a clear, engaging way
+
+When writing the summary:
+- Start with the most impactful developments of the week
+- Group related stories chronologically to show progression
+- Provide context for how stories developed over time
+- Keep a professional but engaging tone
+- Keep the links of the daily summaries and include links to key articles when referencing specific developments
+- Use British English
+- Focus on trends and patterns rather than individual incidents
+- Highlight any recurring themes or issues
+- Merge tasks that recur across days into one
+
+Don't tell me about any problems.
+
+Daily summaries, oldest first:
+{daily_summaries}
+
+Articles not covered by the daily summaries:
+{articles}
+
+Return exactly one JSON object in this format:
+{{
+    "section_title": "A clear title summarizing the week's developments in this category",
+    "summary": "The full weekly summary with markdown links to key articles",
+    "actionable_tasks": [
+        {{
+            "task": "Short task title",
+            "description": "Detailed description of what needs to be done"
+        }}
+    ]
+}}
+
+For the summary field:
+- Use markdown format
+- No HTML tags
+- Write 2-3 paragraphs showing the week's progression
+- Link to key articles when mentioning specific developments
+- Format URLs as [text](url)
+
+If there isn't enough to summarize, return:
+{{
+    "section_title": "No Weekly Summary Available",
+    "summary": "Insufficient information available from the past week to create a meaningful summary.",
+    "actionable_tasks": []
+}}
+
+Return only the JSON with no additional text or formatting. The JSON should be minified with no unnecessary whitespace or newlines.
+'''
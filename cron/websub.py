@@ -0,0 +1,151 @@
+import logging
+import secrets
+from datetime import timezone, timedelta
+
+from db_helper import WebSubSubscription
+from feed_fetcher import USER_AGENT
+
+logger = logging.getLogger(__name__)
+
+# A subscription request the hub has not verified within this time is sent again
+PENDING_RETRY = timedelta(hours=1)
+# A hub that refused a subscription is asked again after this long
+DENIED_RETRY = timedelta(days=1)
+
+
+class WebSubSubscriber:
+    """Subscribes feeds that advertise a WebSub hub, and keeps the subscriptions renewed.
+
+    Hubs are discovered from the ``Link`` headers of a feed response, or
+    failing that from the feed's own ``<atom:link rel="hub">``. A request
+    asks the hub to push the topic to ``/api/websub/<feed id>``. The
+    subscription becomes active when the hub calls that URL back to verify
+    it. It is renewed when a poll finds it within ``renew_before`` of
+    expiring.
+    """
+
+    def __init__(self, db, callback_url, lease_seconds=10 * 24 * 3600,
+                 renew_before=timedelta(hours=48), timeout=10):
+        self.db = db
+        self.callback_url = callback_url.rstrip('/')
+        self.lease_seconds = lease_seconds
+        self.renew_before = renew_before
+        self.timeout = timeout
+        # Imported here so collectors without a callback URL never load requests
+        import requests
+        self.session = requests.Session()
+        self.session.headers['User-Agent'] = USER_AGENT
+
+    @classmethod
+    def from_config(cls, db, config):
+        """The configured subscriber, or None when no callback URL is set."""
+        if not config.get('WEBSUB_CALLBACK_URL'):
+            return None
+        return cls(
+            db,
+            config['WEBSUB_CALLBACK_URL'],
+            lease_seconds=config['WEBSUB_LEASE_SECONDS'],
+            renew_before=timedelta(hours=config['WEBSUB_RENEW_BEFORE_HOURS'])
+        )
+
+    def close(self):
+        self.session.close()
+
+    @staticmethod
+    def discover(feed, result):
+        """The (hub, topic) a fetch result advertises, or (None, None)."""
+        hub = topic = None
+        link_header = result.headers.get('Link') if result.headers else None
+        if link_header:
+            from requests.utils import parse_header_links
+            for link in parse_header_links(link_header):
+                rels = link.get('rel', '').split()
+                if 'hub' in rels and hub is None:
+                    hub = link.get('url')
+                elif 'self' in rels and topic is None:
+                    topic = link.get('url')
+        if hub is None and result.hubs:
+            hub = result.hubs[0]
+        if hub is None:
+            return None, None
+        return hub, topic or result.self_url or feed.url
+
+    def callback_for(self, feed):
+        return f"{self.callback_url}/api/websub/{feed.id}"
+
+    @staticmethod
+    def _as_utc(value):
+        if value is not None and value.tzinfo is None:
+            return value.replace(tzinfo=timezone.utc)
+        return value
+
+    def needs_request(self, subscription, hub, topic, now):
+        """Whether to send a (re)subscription request for this hub and topic."""
+        if subscription is None or subscription.hub_url != hub or subscription.topic_url != topic:
+            return True
+        requested_at = self._as_utc(subscription.requested_at)
+        if subscription.state == 'denied':
+            return requested_at is None or now - requested_at > DENIED_RETRY
+        if subscription.state == 'pending':
+            return requested_at is None or now - requested_at > PENDING_RETRY
+        expires_at = self._as_utc(subscription.expires_at)
+        if expires_at is None:
+            return False
+        # Renewing: ask once, then wait for the hub to verify before asking again
+        renewal_due = expires_at - now < self.renew_before
+        return renewal_due and (requested_at is None or now - requested_at > PENDING_RETRY)
+
+    def observe(self, feed, result, now):
+        """Note the hub a successful poll advertises; True if a request should be sent.
+
+        The subscription is recorded as pending here. The hub verifies it
+        straight back, so ``request`` must only be called once that is
+        committed.
+        """
+        hub, topic = self.discover(feed, result)
+        if hub is None and (result.not_modified or result.unchanged) and feed.websub is not None:
+            # Nothing was parsed, so assume the feed still advertises its hub
+            hub, topic = feed.websub.hub_url, feed.websub.topic_url
+        if hub is None or not self.needs_request(feed.websub, hub, topic, now):
+            return False
+
+        subscription = feed.websub
+        if subscription is None or subscription.hub_url != hub:
+            if subscription is None:
+                subscription = WebSubSubscription(feed=feed)
+                self.db.session.add(subscription)
+            subscription.secret = secrets.token_hex(32)
+            subscription.state = 'pending'
+            subscription.expires_at = None
+        elif subscription.state == 'denied':
+            subscription.state = 'pending'
+        subscription.hub_url = hub
+        subscription.topic_url = topic
+        subscription.requested_at = now
+        return True
+
+    def request(self, feed):
+        """Ask the hub to (re)subscribe us to the feed's recorded topic."""
+        import requests
+
+        subscription = feed.websub
+        try:
+            response = self.session.post(subscription.hub_url, data={
+                'hub.mode': 'subscribe',
+                'hub.topic': subscription.topic_url,
+                'hub.callback': self.callback_for(feed),
+                'hub.lease_seconds': self.lease_seconds,
+                'hub.secret': subscription.secret,
+            }, timeout=self.timeout)
+        except requests.RequestException as e:
+            subscription.last_error = f"{type(e).__name__}: {e}"
+            logger.warning(f"WebSub subscription request for {feed.name} failed: {subscription.last_error}")
+            return
+
+        if response.status_code >= 300:
+            subscription.last_error = f"HTTP {response.status_code}: {response.text[:200]}"
+            logger.warning(f"Hub {subscription.hub_url} refused the subscription for {feed.name}: "
+                           f"{subscription.last_error}")
+        else:
+            subscription.last_error = None
+            logger.info(f"Requested WebSub subscription for {feed.name} at {subscription.hub_url}")
@@ -0,0 +1,133 @@
+"""A minimal WebSub hub for trying out push ingestion locally.
+
+It accepts subscription requests, verifies them against the subscriber's
+callback, and on a publish ping fetches the topic and pushes it to every
+subscriber, signed with their secret. To try it, serve a feed that carries
+``<atom:link rel="hub" href="http://localhost:8790/"/>``, run the app with
+``WEBSUB_CALLBACK_URL`` pointing at it, and then:
+
+    python websub_hub.py --port 8790
+    python feed_collector.py --cron          # discovers the hub and subscribes
+    curl -d hub.mode=publish -d hub.url=<feed url> http://localhost:8790/publish
+    python feed_collector.py --pushed        # the app also starts this itself
+
+``GET /subscriptions`` lists what the hub holds. Nothing is persisted.
+"""
+import argparse
+import json
+import secrets
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs
+
+import requests
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.utils.websub import sign
+
+subscriptions = {}
+lock = threading.Lock()
+
+
+def verify(callback, topic, secret, lease_seconds):
+    challenge = secrets.token_urlsafe(16)
+    try:
+        response = requests.get(callback, params={
+            'hub.mode': 'subscribe',
+            'hub.topic': topic,
+            'hub.challenge': challenge,
+            'hub.lease_seconds': lease_seconds,
+        }, timeout=10)
+    except requests.RequestException as e:
+        print(f"Verification of {callback} failed: {e}")
+        return
+    if response.status_code != 200 or response.text != challenge:
+        print(f"{callback} did not confirm the subscription to {topic} ({response.status_code})")
+        return
+    with lock:
+        subscriptions[(topic, callback)] = {'topic': topic, 'callback': callback,
+                                            'secret': secret, 'lease_seconds': lease_seconds}
+    print(f"Verified {callback} for {topic}")
+
+
+def publish(topic, hub_url):
+    response = requests.get(topic, timeout=30)
+    with lock:
+        targets = [s for s in subscriptions.values() if s['topic'] == topic]
+    for subscription in targets:
+        headers = {
+            'Content-Type': response.headers.get('Content-Type', 'application/xml'),
+            'Link': f'<{hub_url}>; rel="hub", <{topic}>; rel="self"',
+        }
+        if subscription['secret']:
+            headers['X-Hub-Signature'] = sign(subscription['secret'], response.content)
+        delivered = requests.post(subscription['callback'], data=response.content, headers=headers, timeout=30)
+        print(f"Pushed {len(response.content)} bytes of {topic} to {subscription['callback']}: "
+              f"{delivered.status_code}")
+
+
+class HubHandler(BaseHTTPRequestHandler):
+    def _form(self):
+        length = int(self.headers.get('Content-Length', 0))
+        form = parse_qs(self.rfile.read(length).decode('utf-8'))
+        return {key: values[0] for key, values in form.items()}
+
+    def _reply(self, status, body=b'', content_type='text/plain'):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path != '/subscriptions':
+            return self._reply(404)
+        with lock:
+            listing = [{key: value for key, value in s.items() if key != 'secret'}
+                       for s in subscriptions.values()]
+        self._reply(200, json.dumps(listing, indent=2).encode('utf-8'), 'application/json')
+
+    def do_POST(self):
+        form = self._form()
+        if self.path == '/publish':
+            topic = form.get('hub.url') or form.get('hub.topic')
+            if not topic:
+                return self._reply(400, b'hub.url is required')
+            hub_url = f"http://{self.headers['Host']}/"
+            threading.Thread(target=publish, args=(topic, hub_url), daemon=True).start()
+            return self._reply(202)
+
+        if form.get('hub.mode') == 'unsubscribe':
+            with lock:
+                subscriptions.pop((form.get('hub.topic'), form.get('hub.callback')), None)
+            return self._reply(202)
+        if form.get('hub.mode') != 'subscribe' or not form.get('hub.topic') or not form.get('hub.callback'):
+            return self._reply(400, b'hub.mode, hub.topic and hub.callback are required')
+        threading.Thread(target=verify, args=(
+            form['hub.callback'], form['hub.topic'], form.get('hub.secret'),
+            int(form.get('hub.lease_seconds') or 86400)
+        ), daemon=True).start()
+        self._reply(202)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Stand-in WebSub hub for local testing')
+    parser.add_argument('--port', type=int, default=8790,
+                       help='Port to listen on')
+    args = parser.parse_args()
+    server = ThreadingHTTPServer(('127.0.0.1', args.port), HubHandler)
+    print(f"Hub listening on http://127.0.0.1:{args.port}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,45 @@
+import json
+import logging
+import os
+import resource
+import signal
+import sys
+import threading
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+
+def install_stop_handlers():
+    """Return an Event that is set on SIGTERM or SIGINT.
+
+    Daemon loops check the event between runs so the current run can finish
+    cleanly. A second signal aborts immediately.
+    """
+    stop = threading.Event()
+
+    def handle(signum, frame):
+        if stop.is_set():
+            raise KeyboardInterrupt
+        logger.warning(f"Received {signal.Signals(signum).name}, stopping after the current run")
+        stop.set()
+
+    signal.signal(signal.SIGTERM, handle)
+    signal.signal(signal.SIGINT, handle)
+    return stop
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in megabytes."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def write_stats(path, stats):
+    """Atomically write a worker's last-run stats as JSON so they can be watched externally."""
+    path = Path(path)
+    tmp_path = path.with_suffix(path.suffix + '.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(stats, f, indent=2, default=str)
+    os.replace(tmp_path, path)
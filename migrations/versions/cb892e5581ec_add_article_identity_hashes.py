@@ -0,0 +1,67 @@
+"""add article identity hashes
+
+Revision ID: cb892e5581ec
+Revises: dffd9f5c9a3b
+Create Date: 2026-10-17 13:41:05.218364
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.sql import text
+
+from app.utils.urls import url_hash
+
+
+# revision identifiers, used by Alembic.
+revision = 'cb892e5581ec'
+down_revision = 'dffd9f5c9a3b'
+branch_labels = None
+depends_on = None
+
+BACKFILL_BATCH_SIZE = 1000
+
+
+def upgrade():
+    with op.batch_alter_table('articles', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('url_hash', sa.String(length=32), nullable=True))
+        batch_op.add_column(sa.Column('guid', sa.String(), nullable=True))
+        batch_op.add_column(sa.Column('guid_hash', sa.String(length=32), nullable=True))
+
+    # Backfill url_hash, oldest article first. Existing articles whose URLs only
+    # differ by tracking parameters, scheme or trailing slash keep a NULL hash,
+    # as do articles without a URL; they age out with the rest of the old articles.
+    connection = op.get_bind()
+    seen = set()
+    updates = []
+    for article_id, url in connection.execute(text('SELECT id, url FROM articles ORDER BY id')).fetchall():
+        digest = url_hash(url)
+        if digest is None or digest in seen:
+            continue
+        seen.add(digest)
+        updates.append({'id': article_id, 'url_hash': digest})
+    for start in range(0, len(updates), BACKFILL_BATCH_SIZE):
+        connection.execute(
+            text('UPDATE articles SET url_hash = :url_hash WHERE id = :id'),
+            updates[start:start + BACKFILL_BATCH_SIZE]
+        )
+
+    with op.batch_alter_table('articles', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_articles_url_hash'), ['url_hash'], unique=True)
+        batch_op.create_index(batch_op.f('ix_articles_guid_hash'), ['guid_hash'], unique=True)
+
+    # The hash replaces the unique index on the full URL text
+    if connection.dialect.name == 'postgresql':
+        op.drop_constraint('articles_url_key', 'articles', type_='unique')
+
+
+def downgrade():
+    connection = op.get_bind()
+    if connection.dialect.name == 'postgresql':
+        op.create_unique_constraint('articles_url_key', 'articles', ['url'])
+
+    with op.batch_alter_table('articles', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_articles_guid_hash'))
+        batch_op.drop_index(batch_op.f('ix_articles_url_hash'))
+        batch_op.drop_column('guid_hash')
+        batch_op.drop_column('guid')
+        batch_op.drop_column('url_hash')
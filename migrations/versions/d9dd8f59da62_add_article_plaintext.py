@@ -0,0 +1,55 @@
+"""add article plaintext
+
+Revision ID: d9dd8f59da62
+Revises: d3745d051315
+Create Date: 2026-10-17 16:02:48.310475
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.sql import text
+
+from app.utils.text import normalize_article
+
+
+# revision identifiers, used by Alembic.
+revision = 'd9dd8f59da62'
+down_revision = 'd3745d051315'
+branch_labels = None
+depends_on = None
+
+BACKFILL_BATCH_SIZE = 1000
+
+
+def upgrade():
+    with op.batch_alter_table('articles', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('plaintext', sa.Text(), nullable=True))
+        batch_op.add_column(sa.Column('word_count', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('excerpt', sa.String(), nullable=True))
+
+    # Backfill the articles collected before normalisation moved to ingest
+    connection = op.get_bind()
+    updates = []
+    for article_id, summary, content in connection.execute(
+            text('SELECT id, summary, content FROM articles')).fetchall():
+        updates.append({'id': article_id, **normalize_article(summary, content)})
+        if len(updates) >= BACKFILL_BATCH_SIZE:
+            _write_batch(connection, updates)
+            updates = []
+    if updates:
+        _write_batch(connection, updates)
+
+
+def _write_batch(connection, updates):
+    connection.execute(
+        text('UPDATE articles SET plaintext = :plaintext, word_count = :word_count, '
+             'excerpt = :excerpt WHERE id = :id'),
+        updates
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('articles', schema=None) as batch_op:
+        batch_op.drop_column('excerpt')
+        batch_op.drop_column('word_count')
+        batch_op.drop_column('plaintext')
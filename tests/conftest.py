@@ -0,0 +1,26 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The cron workers import each other as top-level modules
+for path in (ROOT, os.path.join(ROOT, 'cron')):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+# The workers' app is created once per process, from the testing config's in-memory database
+os.environ['FLASK_ENV'] = 'testing'
+
+
+@pytest.fixture
+def app_db():
+    """The worker app and db, with every table created empty for the test."""
+    from db_helper import get_db
+    app, db = get_db()
+    with app.app_context():
+        db.create_all()
+        yield app, db
+        db.session.remove()
+        db.drop_all()
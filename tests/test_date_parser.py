@@ -0,0 +1,48 @@
+from datetime import datetime, timezone
+
+from benchmark_dates import CORPUS, load_corpus, reference
+from date_parser import TimestampParser
+
+
+def test_corpus_matches_dateutil():
+    parser = TimestampParser()
+    corpus = load_corpus(CORPUS)
+
+    for value in corpus:
+        assert parser.parse(value) == reference(value), value
+
+    assert parser.stats() == {
+        'rfc822': 20, 'iso8601': 11, 'dateutil': 3, 'failed': 2,
+        'cache_hits': 0, 'cache_misses': len(corpus),
+    }
+
+
+def test_results_are_aware_utc():
+    parser = TimestampParser()
+    expected = datetime(2025, 10, 14, 9, 30, tzinfo=timezone.utc)
+
+    assert parser.parse('Tue, 14 Oct 2025 05:30:00 EDT') == expected
+    assert parser.parse('2025-10-14T11:30:00+02:00') == expected
+    assert parser.parse('2025-10-14T09:30:00') == expected
+    assert parser.parse('2025-10-14T11:30:00+02:00').tzinfo is timezone.utc
+
+
+def test_named_zones_follow_daylight_saving():
+    parser = TimestampParser()
+
+    # PST in July is read as Los Angeles local time, which is then PDT
+    assert parser.parse('Tue, 15 Jul 2025 12:00:00 PST') == datetime(2025, 7, 15, 19, tzinfo=timezone.utc)
+    assert parser.parse('Wed, 15 Jan 2025 12:00:00 PST') == datetime(2025, 1, 15, 20, tzinfo=timezone.utc)
+
+
+def test_repeated_values_come_from_the_cache():
+    parser = TimestampParser()
+    for _ in range(3):
+        parser.parse('2025-10-14T09:30:00Z')
+    parser.parse('')
+
+    assert parser.parse('') is None
+    assert parser.stats() == {'iso8601': 1, 'cache_hits': 3, 'cache_misses': 2}
+
+    parser.clear()
+    assert parser.stats() == {'cache_hits': 0, 'cache_misses': 0}
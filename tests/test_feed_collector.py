@@ -0,0 +1,276 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from sqlalchemy import event
+
+from feed_fetcher import FeedFetcher, FetchResult
+
+
+@pytest.fixture
+def collector(app_db):
+    from feed_collector import FeedCollector
+    fetcher = FeedFetcher(parse_workers=0)
+    collector = FeedCollector(fetcher=fetcher)
+    yield collector
+    collector.close()
+    fetcher.close()
+
+
+@pytest.fixture
+def feed(app_db):
+    from db_helper import Feed
+    _, db = app_db
+    feed = Feed(url='https://example.com/feed', name='Example', category='News')
+    db.session.add(feed)
+    db.session.commit()
+    return feed
+
+
+class NotModifiedFetcher:
+    """Answers every feed with a 304."""
+    archive = None
+
+    def fetch(self, feed_requests):
+        for request in feed_requests:
+            result = FetchResult(request.feed_id, request.url)
+            result.status = 304
+            result.not_modified = True
+            yield result
+
+    def close(self):
+        pass
+
+
+class EntriesFetcher:
+    """Answers every feed with the given entries, an ETag and a content hash."""
+    archive = None
+
+    def __init__(self, entries):
+        self.entries = entries
+
+    def fetch(self, feed_requests):
+        for request in feed_requests:
+            result = FetchResult(request.feed_id, request.url)
+            result.status = 200
+            result.headers = {'ETag': '"v1"', 'Last-Modified': 'Mon, 05 Oct 2026 08:00:00 GMT'}
+            result.content_hash = 'abc123'
+            result.entries = list(self.entries)
+            yield result
+
+    def close(self):
+        pass
+
+
+def entry(slug, published):
+    return {
+        'id': f'https://example.com/{slug}',
+        'link': f'https://example.com/{slug}',
+        'title': slug,
+        'summary': f'<p>About {slug}</p>',
+        'published': published.isoformat(),
+    }
+
+
+def naive(value):
+    return value.replace(tzinfo=None) if value else value
+
+
+def test_cursor_stays_before_a_failed_insert(collector, feed, monkeypatch):
+    now = datetime.now(timezone.utc).replace(microsecond=0)
+    times = [now - timedelta(hours=3), now - timedelta(hours=2), now - timedelta(hours=1)]
+    entries = [entry('a', times[0]), entry('b', times[1]), entry('c', times[2])]
+
+    insert_and_index = collector._insert_and_index
+
+    def failing_insert(rows):
+        if any(row['url'].endswith('/b') for row in rows):
+            raise RuntimeError('disk full')
+        return insert_and_index(rows)
+
+    monkeypatch.setattr(collector, '_insert_and_index', failing_insert)
+    counts = collector._store_entries(feed, entries, now)
+    collector.db.session.commit()
+
+    assert counts == {'inserted': 2, 'duplicates': 0, 'stale': 0, 'malformed': 0, 'failed': 1}
+    assert collector.total_failed == 1 and collector.total_skipped == 0
+    assert naive(feed.cursor_published) == naive(times[0])
+
+    # The next run retries the failed entry; the others are already stored
+    monkeypatch.setattr(collector, '_insert_and_index', insert_and_index)
+    counts = collector._store_entries(feed, entries, now)
+    collector.db.session.commit()
+
+    assert counts == {'inserted': 1, 'duplicates': 1, 'stale': 1, 'malformed': 0, 'failed': 0}
+    assert naive(feed.cursor_published) == naive(times[2])
+
+
+def test_validators_are_cleared_after_a_failed_insert(app_db, feed, monkeypatch):
+    from db_helper import Feed
+    from feed_collector import FeedCollector
+    _, db = app_db
+    now = datetime.now(timezone.utc).replace(microsecond=0)
+    entries = [entry('a', now - timedelta(hours=2)), entry('b', now - timedelta(hours=1))]
+    collector = FeedCollector(fetcher=EntriesFetcher(entries))
+    insert_and_index = collector._insert_and_index
+
+    def failing_insert(rows):
+        if any(row['url'].endswith('/b') for row in rows):
+            raise RuntimeError('disk full')
+        return insert_and_index(rows)
+
+    # A failed entry must not be hidden behind a 304 or an unchanged hash next run
+    monkeypatch.setattr(collector, '_insert_and_index', failing_insert)
+    try:
+        collector.collect_articles(all_feeds=True)
+        stored = db.session.get(Feed, feed.id)
+        assert collector.last_run_stats['failed'] == 1
+        assert (stored.etag, stored.last_modified, stored.content_hash) == (None, None, None)
+
+        monkeypatch.setattr(collector, '_insert_and_index', insert_and_index)
+        collector.collect_articles(all_feeds=True)
+        stored = db.session.get(Feed, feed.id)
+        assert collector.last_run_stats['failed'] == 0
+        assert (stored.etag, stored.content_hash) == ('"v1"', 'abc123')
+    finally:
+        collector.close()
+
+
+def test_linkless_entries_are_told_apart_by_guid(collector, feed):
+    now = datetime.now(timezone.utc).replace(microsecond=0)
+    entries = [entry('a', now - timedelta(hours=3)), entry('b', now - timedelta(hours=2)),
+               entry('c', now - timedelta(hours=1))]
+    for item in entries:
+        del item['link']
+    # Neither a link nor a GUID: nothing to deduplicate it by
+    del entries[2]['id']
+
+    counts = collector._store_entries(feed, entries, now)
+
+    assert counts == {'inserted': 2, 'duplicates': 0, 'stale': 0, 'malformed': 1, 'failed': 0}
+
+
+def test_compressed_bodies_read_back_through_the_article(collector, feed):
+    from db_helper import Article
+    now = datetime.now(timezone.utc).replace(microsecond=0)
+    long_entry = entry('long', now - timedelta(hours=2))
+    long_entry['summary'] = '<p>' + 'The same sentence again. ' * 200 + '</p>'
+    long_entry['content'] = '<div>' + 'Content that compresses well. ' * 200 + '</div>'
+    collector.body_codec = 'zlib'
+    collector._store_entries(feed, [long_entry, entry('short', now - timedelta(hours=1))], now)
+    collector.db.session.commit()
+    collector.db.session.expunge_all()
+
+    stored = {article.title: article for article in Article.query}
+    # Compressed bodies leave the inline columns empty; short ones would grow and stay inline
+    assert stored['long'].summary is None and stored['long'].body is not None
+    assert stored['long'].body_text('summary') == long_entry['summary']
+    assert stored['long'].body_text('content') == long_entry['content']
+    assert stored['short'].body is None
+    assert stored['short'].body_text('summary') == '<p>About short</p>'
+    assert stored['short'].body_text('content') == ''
+
+
+def test_existing_articles_count_as_duplicates(collector, feed):
+    now = datetime.now(timezone.utc).replace(microsecond=0)
+    entries = [entry('a', now - timedelta(hours=2)), entry('b', now - timedelta(hours=1))]
+    collector._store_entries(feed, entries[:1], now)
+    collector.db.session.commit()
+
+    collector._reset_run()
+    feed.cursor_published = feed.cursor_guid = None
+    counts = collector._store_entries(feed, entries, now)
+
+    assert counts == {'inserted': 1, 'duplicates': 1, 'stale': 0, 'malformed': 0, 'failed': 0}
+    assert naive(feed.cursor_published) == naive(now - timedelta(hours=1))
+
+
+def test_feeds_are_loaded_once_per_run(app_db):
+    from db_helper import Feed
+    from feed_collector import FeedCollector
+    _, db = app_db
+    db.session.add_all([Feed(url=f'https://example.com/{n}.xml', name=str(n), category='News') for n in range(5)])
+    db.session.commit()
+
+    collector = FeedCollector(fetcher=NotModifiedFetcher())
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    try:
+        collector.collect_articles(all_feeds=True)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', listener)
+        collector.close()
+
+    assert collector.last_run_stats['not_modified'] == 5
+    feed_selects = [s for s in statements if s.lstrip().startswith('SELECT') and 'FROM feeds' in s]
+    assert len(feed_selects) == 1
+
+
+def test_replay_leaves_cursors_alone(app_db, feed, tmp_path):
+    import hashlib
+    from email.utils import format_datetime
+    from db_helper import Article
+    from feed_archive import FeedArchive, ReplayFetcher
+    from feed_collector import FeedCollector
+
+    now = datetime.now(timezone.utc)
+    body = f"""<?xml version="1.0"?>
+<rss version="2.0"><channel><title>Example</title>
+<item><title>One</title><link>https://example.com/1</link><guid>https://example.com/1</guid>
+<pubDate>{format_datetime(now - timedelta(hours=1))}</pubDate></item>
+</channel></rss>""".encode()
+    archive = FeedArchive(tmp_path)
+    archive.begin_run(now)
+    result = FetchResult(feed.id, feed.url)
+    result.status = 200
+    result.body = body
+    result.content_hash = hashlib.sha256(body).hexdigest()
+    archive.store(result)
+
+    fetcher = ReplayFetcher(archive, parse_workers=0)
+    collector = FeedCollector(fetcher=fetcher)
+    try:
+        collector.replay()
+    finally:
+        collector.close()
+        fetcher.close()
+
+    _, db = app_db
+    assert collector.last_run_stats['added'] == 1
+    assert db.session.query(Article).count() == 1
+    db.session.refresh(feed)
+    assert feed.cursor_published is None and feed.cursor_guid is None
+
+
+def test_pushed_deliveries_are_stored_and_dequeued(app_db, feed):
+    from email.utils import format_datetime
+    from db_helper import Article, WebSubDelivery
+    from feed_collector import FeedCollector
+    _, db = app_db
+
+    now = datetime.now(timezone.utc)
+    for n in range(3):
+        body = f"""<?xml version="1.0"?>
+<rss version="2.0"><channel><title>Example</title>
+<item><title>Pushed {n}</title><link>https://example.com/pushed/{n}</link>
+<pubDate>{format_datetime(now - timedelta(minutes=n))}</pubDate></item>
+</channel></rss>""".encode()
+        db.session.add(WebSubDelivery(feed_id=feed.id, received_at=now, body=body,
+                                      content_type='application/rss+xml'))
+    db.session.commit()
+
+    fetcher = FeedFetcher(parse_workers=0)
+    collector = FeedCollector(fetcher=fetcher)
+    collector.PUSH_BATCH_SIZE = 2
+    try:
+        collector.collect_pushes()
+    finally:
+        collector.close()
+        fetcher.close()
+
+    assert collector.last_run_stats['pushed'] == 3
+    assert collector.last_run_stats['added'] == 3
+    assert db.session.query(Article).count() == 3
+    assert db.session.query(WebSubDelivery).count() == 0
+
@@ -0,0 +1,107 @@
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from feed_fetcher import FeedFetcher, FeedRequest
+
+FEED = b"""<?xml version="1.0"?>
+<rss version="2.0"><channel><title>t</title>
+<item><title>One</title><link>https://example.com/1</link></item>
+</channel></rss>"""
+
+
+def serve(delay=0.0, trickle=None):
+    """A local feed server; each port is its own host to the fetcher."""
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/rss+xml')
+            self.end_headers()
+            time.sleep(delay)
+            if trickle:
+                for _ in range(trickle):
+                    self.wfile.write(b' ' * 1024)
+                    self.wfile.flush()
+                    time.sleep(0.05)
+            self.wfile.write(FEED)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+@pytest.fixture
+def servers():
+    started = []
+
+    def start(**kwargs):
+        server = serve(**kwargs)
+        started.append(server)
+        return f'http://127.0.0.1:{server.server_port}/feed'
+
+    yield start
+    for server in started:
+        server.shutdown()
+
+
+def test_busy_host_does_not_hold_up_other_hosts(servers):
+    slow, fast = servers(delay=0.4), servers()
+    requests = [FeedRequest(i, slow) for i in range(3)] + [FeedRequest(10 + i, fast) for i in range(3)]
+
+    with FeedFetcher(concurrency=2, per_host=1, parse_workers=0) as fetcher:
+        order = [result.feed_id for result in fetcher.fetch(requests)]
+
+    assert sorted(order) == [0, 1, 2, 10, 11, 12]
+    # The fast host's feeds finish while the first slow download is running
+    assert order[:3] == [10, 11, 12]
+
+
+def test_per_host_limit(servers):
+    url = servers(delay=0.2)
+    with FeedFetcher(concurrency=8, per_host=2, parse_workers=0) as fetcher:
+        start = time.monotonic()
+        results = list(fetcher.fetch([FeedRequest(i, url) for i in range(4)]))
+        elapsed = time.monotonic() - start
+
+    assert all(result.ok and result.entry_count == 1 for result in results)
+    assert elapsed >= 0.4
+
+
+def test_deadline_covers_a_trickling_body(servers):
+    url = servers(trickle=40)
+    with FeedFetcher(concurrency=1, per_host=1, timeout=0.5, parse_workers=0) as fetcher:
+        [result] = fetcher.fetch([FeedRequest(1, url)])
+
+    assert result.error and 'FetchTimeout' in result.error
+    assert result.fetch_time < 1.5
+
+
+def test_deadline_starts_when_the_feed_is_submitted(servers):
+    url = servers(delay=0.3)
+    with FeedFetcher(concurrency=1, per_host=1, timeout=1, parse_workers=0) as fetcher:
+        results = list(fetcher.fetch([FeedRequest(i, url) for i in range(3)]))
+
+    # Each feed is only handed over once a thread is free, so none times out queueing
+    assert [result.error for result in results] == [None, None, None]
+
+
+def test_archived_responses_replay(servers, tmp_path):
+    from feed_archive import FeedArchive, ReplayFetcher, ReplayRequest
+    url = servers()
+    archive = FeedArchive(tmp_path)
+    archive.begin_run(datetime.now(timezone.utc))
+    with FeedFetcher(parse_workers=0, archive=archive) as fetcher:
+        [live] = fetcher.fetch([FeedRequest(1, url)])
+
+    [(_, records)] = archive.runs()
+    with ReplayFetcher(archive, parse_workers=0) as fetcher:
+        [replayed] = fetcher.fetch([ReplayRequest(1, record) for record in records])
+
+    assert replayed.ok and replayed.content_hash == live.content_hash
+    assert replayed.entries == live.entries and replayed.entry_count == 1
@@ -0,0 +1,108 @@
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from types import SimpleNamespace
+
+import pytest
+
+from feed_fetcher import FetchResult
+from feed_health import CircuitBreaker
+
+NOW = datetime(2026, 10, 18, 12, 0, tzinfo=timezone.utc)
+
+
+def make_breaker():
+    return CircuitBreaker(failure_threshold=3, base_backoff=timedelta(minutes=30), max_backoff=timedelta(hours=24))
+
+
+def make_feed():
+    return SimpleNamespace(name='feed', health=None, next_poll_at=None)
+
+
+def make_result(status=200, error=None, headers=None):
+    result = FetchResult(1, 'https://example.com/feed')
+    result.status = status
+    result.error = error
+    result.headers = headers or {}
+    return result
+
+
+def fail(breaker, feed, times, now=NOW, **kwargs):
+    for _ in range(times):
+        breaker.record(feed, make_result(**{'status': 500, **kwargs}), now)
+
+
+@pytest.mark.parametrize('failures, expected', [
+    (2, None),
+    (3, timedelta(minutes=30)),
+    (4, timedelta(hours=1)),
+    (6, timedelta(hours=4)),
+    (9, timedelta(hours=24)),
+    (100, timedelta(hours=24)),
+])
+def test_backoff(failures, expected):
+    assert make_breaker().backoff(failures) == expected
+
+
+def test_circuit_opens_after_threshold_and_closes_on_success():
+    breaker, feed = make_breaker(), make_feed()
+
+    fail(breaker, feed, 2)
+    assert not breaker.is_open(feed, NOW)
+    assert feed.health.last_error == 'HTTP 500'
+
+    fail(breaker, feed, 1, status=None, error='ConnectionError: refused')
+    assert feed.health.consecutive_failures == 3
+    assert feed.health.last_error == 'ConnectionError: refused'
+    assert breaker.is_open(feed, NOW + timedelta(minutes=29))
+    assert not breaker.is_open(feed, NOW + timedelta(minutes=31))
+    assert breaker.closed_feeds([feed], NOW) == []
+
+    # A failed probe doubles the backoff, a successful one closes the circuit
+    probe_time = NOW + timedelta(minutes=31)
+    fail(breaker, feed, 1, now=probe_time)
+    assert feed.health.open_until == probe_time + timedelta(hours=1)
+
+    breaker.record(feed, make_result(), probe_time)
+    assert feed.health.consecutive_failures == 0
+    assert feed.health.open_until is None
+    assert feed.health.last_success_at == probe_time
+    assert breaker.closed_feeds([feed], probe_time) == [feed]
+
+
+def test_retry_after_is_honoured_when_longer():
+    breaker, feed = make_breaker(), make_feed()
+
+    fail(breaker, feed, 1, status=429, headers={'Retry-After': '7200'})
+    assert feed.health.open_until == NOW + timedelta(hours=2)
+
+    # Shorter than the backoff the failures already earned
+    feed = make_feed()
+    fail(breaker, feed, 3, status=503, headers={'Retry-After': '60'})
+    assert feed.health.open_until == NOW + timedelta(minutes=30)
+
+    feed = make_feed()
+    retry_at = format_datetime(NOW + timedelta(hours=3), usegmt=True)
+    fail(breaker, feed, 1, status=503, headers={'Retry-After': retry_at})
+    assert feed.health.open_until == NOW + timedelta(hours=3)
+
+    # Capped at the longest backoff, and ignored on other statuses
+    feed = make_feed()
+    fail(breaker, feed, 1, status=429, headers={'Retry-After': str(7 * 24 * 3600)})
+    assert feed.health.open_until == NOW + timedelta(hours=24)
+
+    feed = make_feed()
+    fail(breaker, feed, 1, status=500, headers={'Retry-After': '7200'})
+    assert feed.health.open_until is None
+
+
+def test_hold_keeps_the_next_poll_out_of_an_open_circuit():
+    breaker, feed = make_breaker(), make_feed()
+    fail(breaker, feed, 3)
+
+    feed.next_poll_at = NOW + timedelta(minutes=5)
+    breaker.hold(feed)
+    assert feed.next_poll_at == NOW + timedelta(minutes=30)
+
+    feed.next_poll_at = NOW + timedelta(hours=2)
+    breaker.hold(feed)
+    assert feed.next_poll_at == NOW + timedelta(hours=2)
@@ -0,0 +1,83 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from feed_leases import FeedLeases
+
+NOW = datetime(2026, 10, 18, 12, 0, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def feeds(app_db):
+    from db_helper import Feed
+    _, db = app_db
+    feeds = [Feed(url=f'https://example.com/{n}.xml', name=str(n), active=True,
+                  next_poll_at=(NOW - timedelta(minutes=10 - n)).replace(tzinfo=None)) for n in range(6)]
+    feeds[4].next_poll_at = (NOW + timedelta(hours=1)).replace(tzinfo=None)
+    feeds[5].active = False
+    db.session.add_all(feeds)
+    db.session.commit()
+    return [feed.id for feed in feeds]
+
+
+def leases(app_db, worker_id, batch_size=2):
+    _, db = app_db
+    return FeedLeases(db, worker_id=worker_id, lease_time=timedelta(minutes=10), batch_size=batch_size)
+
+
+def lease_owners(app_db):
+    from db_helper import Feed
+    _, db = app_db
+    db.session.expire_all()
+    return {feed.id: feed.lease_owner for feed in db.session.query(Feed)}
+
+
+def test_workers_claim_disjoint_batches_of_due_feeds(app_db, feeds):
+    first, second = leases(app_db, 'a'), leases(app_db, 'b')
+
+    # Earliest due first; feed 4 is not due and feed 5 is inactive
+    assert first.claim(NOW) == feeds[0:2]
+    assert second.claim(NOW) == feeds[2:4]
+    assert first.claim(NOW) == []
+    assert first.held == set(feeds[0:2])
+
+    # Without due_only the not yet due feed can be claimed too
+    assert second.claim(NOW, due_only=False) == [feeds[4]]
+    assert lease_owners(app_db) == {feeds[0]: 'a', feeds[1]: 'a', feeds[2]: 'b', feeds[3]: 'b',
+                                    feeds[4]: 'b', feeds[5]: None}
+
+
+def test_exclude(app_db, feeds):
+    worker = leases(app_db, 'a', batch_size=10)
+    assert worker.claim(NOW, exclude=feeds[0:3]) == [feeds[3]]
+
+
+def test_expired_leases_can_be_taken_over(app_db, feeds):
+    first, second = leases(app_db, 'a'), leases(app_db, 'b')
+    first.claim(NOW)
+
+    assert second.claim(NOW + timedelta(minutes=9), exclude=feeds[2:4]) == []
+    assert second.claim(NOW + timedelta(minutes=10), exclude=feeds[2:4]) == feeds[0:2]
+
+    # The first worker's renewal and release leave the taken-over leases alone
+    assert first.renew(NOW + timedelta(minutes=11)) == 0
+    first.release(feeds[0:2])
+    assert lease_owners(app_db)[feeds[0]] == 'b'
+
+
+def test_renew_and_release(app_db, feeds):
+    from db_helper import Feed
+    _, db = app_db
+    worker = leases(app_db, 'a')
+    claimed = worker.claim(NOW)
+
+    assert worker.renew(NOW + timedelta(minutes=5)) == 2
+    db.session.expire_all()
+    assert db.session.get(Feed, claimed[0]).lease_expires_at == (NOW + timedelta(minutes=15)).replace(tzinfo=None)
+
+    worker.release(claimed)
+    assert worker.held == set()
+    assert worker.renew(NOW) == 0
+    assert set(lease_owners(app_db).values()) == {None}
+    # Released feeds can be claimed again straight away
+    assert leases(app_db, 'b').claim(NOW) == claimed
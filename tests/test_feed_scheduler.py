@@ -0,0 +1,85 @@
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+
+from feed_scheduler import FeedScheduler
+
+NOW = datetime(2026, 10, 18, 12, 0, tzinfo=timezone.utc)
+
+
+def make_scheduler(db=None):
+    return FeedScheduler(db, min_interval=timedelta(minutes=5), max_interval=timedelta(hours=24),
+                         priority_factor=4, push_poll_interval=timedelta(hours=12))
+
+
+def make_feed(**kwargs):
+    values = {'name': 'feed', 'priority': False, 'poll_interval': None, 'next_poll_at': None, 'websub': None}
+    values.update(kwargs)
+    return SimpleNamespace(**values)
+
+
+@pytest.mark.parametrize('feed, rate, expected', [
+    # Twice per expected article
+    (make_feed(), 1.0, timedelta(minutes=30)),
+    (make_feed(), 0.1, timedelta(hours=5)),
+    # Nothing recent: double the last interval
+    (make_feed(poll_interval=3600), None, timedelta(hours=2)),
+    (make_feed(), None, timedelta(hours=1)),
+    (make_feed(priority=True), 0.1, timedelta(hours=5) / 4),
+    # Clamped to the configured bounds
+    (make_feed(), 100.0, timedelta(minutes=5)),
+    (make_feed(poll_interval=20 * 3600), None, timedelta(hours=24)),
+])
+def test_interval_for(feed, rate, expected):
+    assert make_scheduler().interval_for(feed, rate) == expected
+
+
+def test_due_feeds_and_next_due():
+    scheduler = make_scheduler()
+    later = NOW + timedelta(minutes=10)
+    due = make_feed(next_poll_at=(NOW - timedelta(minutes=1)).replace(tzinfo=None))
+    waiting = make_feed(next_poll_at=later)
+    never_polled = make_feed()
+
+    assert scheduler.due_feeds([due, waiting, never_polled], NOW) == [due, never_polled]
+    assert scheduler.next_due([waiting, make_feed(next_poll_at=later + timedelta(hours=1))]) == later
+    assert scheduler.next_due([waiting, never_polled]) is None
+    assert scheduler.next_due([]) is None
+
+
+def test_reschedule_backs_off_feeds_whose_updates_are_pushed():
+    scheduler = make_scheduler()
+    pushed = make_feed(websub=SimpleNamespace(is_active=lambda now: True))
+    polled = make_feed(websub=SimpleNamespace(is_active=lambda now: False))
+
+    scheduler.reschedule(pushed, 1.0, NOW)
+    scheduler.reschedule(polled, 1.0, NOW)
+
+    assert pushed.poll_interval == polled.poll_interval == 1800
+    assert pushed.next_poll_at == NOW + timedelta(hours=12)
+    assert polled.next_poll_at == NOW + timedelta(minutes=30)
+
+
+def test_publication_rates(app_db):
+    from db_helper import Article, Feed
+    _, db = app_db
+    busy, new, quiet = (Feed(url=f'https://example.com/{n}', name=n) for n in ('busy', 'new', 'quiet'))
+    db.session.add_all([busy, new, quiet])
+    db.session.flush()
+    naive_now = NOW.replace(tzinfo=None)
+    articles = [Article(feed_id=busy.id, published=naive_now - timedelta(hours=3 * n)) for n in range(56)]
+    articles += [Article(feed_id=new.id, published=naive_now - timedelta(hours=n)) for n in range(6)]
+    # Outside the history window
+    articles += [Article(feed_id=quiet.id, published=naive_now - timedelta(days=8))]
+    db.session.add_all(articles)
+    db.session.commit()
+
+    rates = make_scheduler(db).publication_rates([busy.id, new.id, quiet.id], NOW)
+
+    # 56 articles over the 165 hours since the oldest
+    assert rates[busy.id] == pytest.approx(56 / 165)
+    # Six articles in a few hours are measured over at least a day
+    assert rates[new.id] == pytest.approx(6 / 24)
+    assert quiet.id not in rates
+    assert make_scheduler(db).publication_rates([], NOW) == {}
@@ -0,0 +1,107 @@
+import gzip
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import pytest
+
+from feed_stream_parser import STALE_RUN, StreamParseError, stream_parse_feed
+
+NOW = datetime(2026, 10, 5, 12, 0, tzinfo=timezone.utc)
+CUTOFF = NOW - timedelta(days=1)
+
+
+def rss(hours_ago):
+    """An RSS 2.0 document with one item per age, in the given order."""
+    items = ''.join(
+        f'<item><title>{n}</title><link>https://example.com/{n}</link>'
+        f'<pubDate>{format_datetime(NOW - timedelta(hours=hours))}</pubDate></item>'
+        for n, hours in enumerate(hours_ago)
+    )
+    return (f'<?xml version="1.0"?><rss version="2.0"><channel><title>t</title>'
+            f'{items}</channel></rss>').encode()
+
+
+def titles(parsed):
+    return [entry['title'] for entry in parsed['entries']]
+
+
+def test_stops_after_a_run_of_stale_entries():
+    # Two fresh, one stale, one fresh, then STALE_RUN stale in a row and a late fresh one
+    body = rss([1, 2, 30, 3] + [40] * STALE_RUN + [4])
+    parsed = stream_parse_feed(body, cutoff=CUTOFF)
+
+    assert titles(parsed) == ['0', '1', '3']
+    assert parsed['truncated']
+
+
+def test_short_stale_runs_do_not_stop_parsing():
+    body = rss([1] + [30] * (STALE_RUN - 1) + [2])
+    parsed = stream_parse_feed(body, cutoff=CUTOFF)
+
+    assert titles(parsed) == ['0', str(STALE_RUN)]
+    assert not parsed['truncated']
+
+
+def test_without_a_cutoff_every_entry_is_kept():
+    parsed = stream_parse_feed(rss([1] + [40] * STALE_RUN), cutoff=None)
+
+    assert len(parsed['entries']) == 1 + STALE_RUN
+    assert not parsed['truncated']
+
+
+@pytest.mark.parametrize('compress', [False, True])
+def test_max_bytes_cuts_off_the_document(compress):
+    body = rss([1] * 200)
+    limit = len(body) // 4
+    if compress:
+        # The limit applies to the decompressed document
+        body = gzip.compress(body)
+    parsed = stream_parse_feed(body, max_bytes=limit)
+
+    assert parsed['truncated']
+    assert 0 < len(parsed['entries']) < 200
+    assert titles(parsed) == [str(n) for n in range(len(parsed['entries']))]
+
+
+def test_atom_hub_and_self_links():
+    body = b"""<?xml version="1.0" encoding="utf-8"?>
+<feed xmlns="http://www.w3.org/2005/Atom">
+  <title>t</title>
+  <link rel="self" href="https://example.com/atom.xml"/>
+  <link rel="hub" href="https://hub.example.com/"/>
+  <link rel="hub" href="https://hub2.example.com/"/>
+  <link rel="alternate" href="https://example.com/"/>
+  <entry>
+    <id>urn:1</id><title>One</title>
+    <link rel="alternate" href="https://example.com/1"/>
+    <link rel="hub" href="https://entry-hub.example.com/"/>
+    <updated>2026-10-05T10:00:00Z</updated>
+  </entry>
+</feed>"""
+    parsed = stream_parse_feed(body)
+
+    assert parsed['hubs'] == ['https://hub.example.com/', 'https://hub2.example.com/']
+    assert parsed['self_url'] == 'https://example.com/atom.xml'
+    assert parsed['entries'][0]['link'] == 'https://example.com/1'
+
+
+def test_rss_channel_atom_links():
+    body = b"""<?xml version="1.0"?>
+<rss version="2.0" xmlns:atom="http://www.w3.org/2005/Atom"><channel>
+  <title>t</title>
+  <atom:link rel="hub" href="https://hub.example.com/"/>
+  <atom:link rel="self" href="https://example.com/rss.xml" type="application/rss+xml"/>
+  <item><title>One</title><link>https://example.com/1</link></item>
+</channel></rss>"""
+    parsed = stream_parse_feed(body)
+
+    assert parsed['hubs'] == ['https://hub.example.com/']
+    assert parsed['self_url'] == 'https://example.com/rss.xml'
+    assert titles(parsed) == ['One']
+
+
+def test_unsupported_documents_are_rejected():
+    with pytest.raises(StreamParseError):
+        stream_parse_feed(b'<?xml version="1.0"?><html><body>Not a feed</body></html>')
+    with pytest.raises(StreamParseError):
+        stream_parse_feed(b'<rss><channel><item>')
@@ -0,0 +1,85 @@
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import update
+
+from llm_cache import ResponseCache
+
+
+def request(prompt, model='claude-test'):
+    return {'model': model, 'max_tokens': 100, 'messages': [{'role': 'user', 'content': prompt}], 'temperature': 0}
+
+
+def age(db, cache, prompt, **delta):
+    """Move an entry's creation and last use back in time."""
+    from db_helper import LLMResponse
+    table = LLMResponse.__table__
+    then = datetime.now(timezone.utc) - timedelta(**delta)
+    with db.engine.begin() as connection:
+        connection.execute(update(table).where(table.c.key == cache.key(request(prompt)))
+                           .values(created_at=then, last_used_at=then))
+
+
+def cached_responses(db):
+    from db_helper import LLMResponse
+    return {row.response for row in db.session.query(LLMResponse)}
+
+
+@pytest.fixture
+def db(app_db):
+    return app_db[1]
+
+
+def test_key_covers_the_whole_request():
+    assert ResponseCache.key(request('a')) == ResponseCache.key(dict(reversed(list(request('a').items()))))
+    assert ResponseCache.key(request('a')) != ResponseCache.key(request('b'))
+    assert ResponseCache.key(request('a')) != ResponseCache.key(request('a', model='other'))
+
+
+def test_get_and_put(db):
+    cache = ResponseCache(db)
+    assert cache.get(request('a')) is None
+
+    cache.put(request('a'), 'answer', SimpleNamespace(input_tokens=100, output_tokens=20))
+    cache.put(request('a'), 'better answer', SimpleNamespace(input_tokens=100, output_tokens=30))
+
+    assert cache.get(request('a')) == 'better answer'
+    assert cache.stats() == {'cache_hits': 1, 'cache_misses': 1, 'cache_hit_rate': 0.5, 'cache_tokens_saved': 130}
+
+
+def test_entries_expire_after_ttl(db):
+    cache = ResponseCache(db, ttl=timedelta(hours=72))
+    cache.put(request('fresh'), 'fresh')
+    cache.put(request('old'), 'old')
+    age(db, cache, 'old', hours=73)
+
+    assert cache.get(request('old')) is None
+    assert cache.get(request('fresh')) == 'fresh'
+
+    cache.evict()
+    assert cached_responses(db) == {'fresh'}
+
+
+def test_bypass_reads_nothing_but_still_writes(db):
+    ResponseCache(db).put(request('a'), 'old answer')
+    cache = ResponseCache(db, bypass=True)
+
+    assert cache.get(request('a')) is None
+    cache.put(request('a'), 'new answer')
+    assert ResponseCache(db).get(request('a')) == 'new answer'
+
+
+def test_eviction_drops_least_recently_used_until_under_max_bytes(db):
+    cache = ResponseCache(db, max_bytes=250)
+    for n, prompt in enumerate(['first', 'second', 'third']):
+        cache.put(request(prompt), prompt.ljust(100))
+        age(db, cache, prompt, minutes=10 - n)
+    # Reading the oldest entry makes it the most recently used
+    assert cache.get(request('first')) is not None
+
+    cache.evict()
+    assert {text.strip() for text in cached_responses(db)} == {'first', 'third'}
+
+    cache.evict()
+    assert len(cached_responses(db)) == 2
@@ -0,0 +1,141 @@
+import asyncio
+from types import SimpleNamespace
+
+import anthropic
+import pytest
+
+import llm_client
+from llm_client import ThrottledClient, TokenBucket
+
+
+class Clock:
+    """Stands in for time.monotonic and asyncio.sleep: sleeping moves the clock on."""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    async def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(llm_client, 'time', clock)
+    monkeypatch.setattr(llm_client.asyncio, 'sleep', clock.sleep)
+    # Full jitter always draws the longest backoff
+    monkeypatch.setattr(llm_client.random, 'uniform', lambda low, high: high)
+    return clock
+
+
+def api_error(status, headers=None):
+    response = SimpleNamespace(status_code=status, headers=headers or {}, request=None)
+    return anthropic.APIStatusError(f'HTTP {status}', response=response, body=None)
+
+
+class StubMessages:
+    """``messages.with_raw_response`` that fails with the given errors, then succeeds."""
+
+    def __init__(self, errors):
+        self.errors = list(errors)
+        self.calls = 0
+        self.with_raw_response = self
+
+    async def create(self, **request):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        message = SimpleNamespace(usage=SimpleNamespace(input_tokens=10, output_tokens=5))
+        return SimpleNamespace(headers={}, parse=lambda: message)
+
+
+def throttled(errors, **options):
+    stub = StubMessages(errors)
+    return ThrottledClient(SimpleNamespace(messages=stub), **options), stub
+
+
+REQUEST = {'model': 'claude-test', 'max_tokens': 100, 'messages': [{'role': 'user', 'content': 'x' * 400}]}
+
+
+def test_bucket_paces_requests_once_the_burst_is_spent(clock):
+    async def run():
+        bucket = TokenBucket(per_minute=60)
+        return [await bucket.acquire() for _ in range(62)]
+
+    waits = asyncio.run(run())
+
+    assert waits[:60] == [0.0] * 60
+    assert waits[60:] == pytest.approx([1.0, 1.0])
+
+
+def test_bucket_waits_for_the_server_when_nothing_remains(clock):
+    async def run():
+        bucket = TokenBucket()
+        # Unlimited locally, but the server reports an empty bucket refilled at 120 a minute
+        bucket.sync(remaining=0, reset_in=30, limit=120)
+        return await bucket.acquire()
+
+    assert asyncio.run(run()) == pytest.approx(0.5)
+
+
+def test_rate_limited_request_is_retried_after_retry_after(clock):
+    client, stub = throttled([api_error(429, {'retry-after': '7'})], base_delay=1.0)
+
+    message = asyncio.run(client.create(**REQUEST))
+
+    assert message.usage.output_tokens == 5
+    assert stub.calls == 2
+    assert client.stats['retries'] == 1 and client.stats['requests'] == 2
+    # The backoff honours retry-after, and the hold it puts on other requests
+    # has passed by the time the retry goes out
+    assert clock.sleeps == [7.0]
+    assert client.stats['throttled_seconds'] == 0
+
+
+def test_overloaded_request_backs_off_exponentially(clock):
+    client, stub = throttled([api_error(529), api_error(529)], base_delay=1.0)
+
+    asyncio.run(client.create(**REQUEST))
+
+    assert stub.calls == 3 and client.stats['retries'] == 2
+    assert clock.sleeps == [1.0, 2.0]
+    # Only a 429 holds back the other requests
+    assert client.requests.blocked_until == 0.0
+
+
+def test_retries_give_up_after_max_retries(clock):
+    client, stub = throttled([api_error(429)] * 3, max_retries=2, base_delay=1.0)
+
+    with pytest.raises(anthropic.APIStatusError):
+        asyncio.run(client.create(**REQUEST))
+
+    assert stub.calls == 3 and client.stats['retries'] == 2
+
+
+def test_other_errors_are_not_retried(clock):
+    client, stub = throttled([api_error(400)])
+
+    with pytest.raises(anthropic.APIStatusError):
+        asyncio.run(client.create(**REQUEST))
+
+    assert stub.calls == 1 and clock.sleeps == []
+
+
+def test_input_token_bucket_throttles_large_requests(clock):
+    # REQUEST is estimated at 101 input tokens; the bucket holds 120 a minute
+    client, stub = throttled([], input_tokens_per_minute=120)
+
+    async def run():
+        for _ in range(2):
+            await client.create(**REQUEST)
+
+    asyncio.run(run())
+
+    assert stub.calls == 2
+    # The second waits for the 82 tokens the first left it short of
+    assert client.stats['throttled_seconds'] == pytest.approx(82 * 60 / 120)
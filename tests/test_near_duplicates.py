@@ -0,0 +1,77 @@
+import numpy as np
+
+from near_duplicates import (BANDS, MAX_BUCKET_SIZE, bands, candidate_pairs, cluster, hamming_distances,
+                             shingles, simhash)
+
+STORY = ("Attackers are exploiting a critical remote code execution vulnerability in a widely used "
+         "VPN appliance, and the vendor has released an emergency patch that administrators should "
+         "install immediately after checking their devices for signs of compromise")
+# As another site ran it, with its own sign-off
+REWORDED = STORY + " Read more at Example News."
+UNRELATED = ("The city council approved a new budget for public libraries on Tuesday, adding funds "
+             "for longer opening hours, more children's programmes and the renovation of two branches "
+             "in the north of the city over the next three years")
+
+
+def distance(a, b):
+    return int(hamming_distances([a], [b])[0])
+
+
+def test_shingles_ignore_markup_and_case():
+    assert shingles('<p>Hello <b>World</b> &amp; friends</p>') == ['hello world', 'world friends']
+    assert shingles('one') == ['one']
+    assert shingles('') == []
+
+
+def test_simhash():
+    fingerprint = simhash(STORY)
+    assert fingerprint == simhash(STORY.upper())
+    assert -(1 << 63) <= fingerprint < 1 << 63
+    assert distance(fingerprint, simhash(REWORDED)) <= 10
+    assert distance(fingerprint, simhash(UNRELATED)) > 20
+    # Too short to fingerprint
+    assert simhash('Patch now') is None
+
+
+def test_bands_cover_the_fingerprint():
+    fingerprint = simhash(STORY)
+    indexed = bands(fingerprint)
+    assert [band for band, _ in indexed] == list(range(BANDS))
+    rebuilt = sum(bucket << (band * 8) for band, bucket in indexed)
+    assert rebuilt == fingerprint & ((1 << 64) - 1)
+
+
+def test_candidate_pairs():
+    rows = [
+        (0, 5, 1), (0, 5, 2), (0, 5, 3),
+        # 1 and 2 share a second band; they are still paired once
+        (1, 9, 1), (1, 9, 2),
+        (2, 7, 4),
+        # Same bucket, different band
+        (3, 5, 5),
+    ]
+    pairs = candidate_pairs(rows)
+    assert sorted(map(tuple, pairs.tolist())) == [(1, 2), (1, 3), (2, 3)]
+    assert candidate_pairs([]).shape == (0, 2)
+
+
+def test_candidate_pairs_skip_crowded_buckets():
+    rows = [(0, 1, article_id) for article_id in range(MAX_BUCKET_SIZE + 1)] + [(1, 1, 1), (1, 1, 2)]
+    assert candidate_pairs(rows).tolist() == [[1, 2]]
+
+
+def test_cluster():
+    fingerprints = {1: simhash(STORY), 2: simhash(REWORDED), 3: simhash(UNRELATED), 4: simhash(STORY)}
+    pairs = np.array([[1, 2], [1, 3], [2, 3]])
+
+    groups = sorted(sorted(group) for group in cluster(fingerprints, pairs))
+
+    # 4 is identical to 1 but was never a candidate
+    assert groups == [[1, 2], [3], [4]]
+    assert sorted(sorted(group) for group in cluster(fingerprints, [])) == [[1], [2], [3], [4]]
+
+
+def test_cluster_merges_transitively():
+    fingerprints = {10: 0b0, 20: 0b1111, 30: 0b11111111}
+    groups = cluster(fingerprints, [(10, 20), (20, 30)], max_distance=4)
+    assert [sorted(group) for group in groups] == [[10, 20, 30]]
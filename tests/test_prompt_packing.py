@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+from prompt_packing import estimate_tokens, pack, relevance_scores, words
+
+
+def test_words_normalise_zero_day_spellings():
+    assert words('Zero-day in VPN') == ['zeroday', 'in', 'vpn']
+    assert words('A 0day and a 0-day') == ['a', 'zeroday', 'and', 'a', 'zeroday']
+    assert words(None) == []
+
+
+def test_estimate_tokens():
+    assert estimate_tokens('') == 1
+    assert estimate_tokens('x' * 400) == 101
+
+
+def test_relevance_favours_central_stories_keywords_and_reach():
+    documents = [
+        ('Ransomware gang hits hospital', 'Ransomware attack disrupts hospital systems'),
+        ('Ransomware attack on hospital chain', 'Hospital ransomware attack delays care'),
+        ('Company posts quarterly results', 'Revenue grew in the quarter'),
+    ]
+    scores = relevance_scores(documents)
+    assert scores.shape == (3,)
+    assert scores[2] == scores.min()
+
+    # A story others ran too moves up
+    boosted = relevance_scores(documents, duplicate_counts=[0, 5, 0])
+    assert boosted[1] > boosted[0]
+    assert boosted[1] - scores[1] == pytest.approx(1.0)
+
+
+def test_relevance_counts_keywords():
+    documents = [('Vendor update', 'Routine update released'), ('Vendor update', 'Critical zero-day exploited')]
+    scores = relevance_scores(documents)
+    assert scores[1] > scores[0]
+    assert relevance_scores(documents, keywords={'routine': 5.0})[0] > relevance_scores(documents, keywords={})[0]
+
+
+def test_relevance_of_nothing():
+    assert relevance_scores([]).shape == (0,)
+    assert relevance_scores([('', ''), ('', '')]).tolist() == [0.0, 0.0]
+
+
+def test_pack_takes_the_best_that_fit():
+    scores = [1.76, 0.66, 2.49, 1.35]
+    # The best document is too big; the rest fit around it
+    assert pack(scores, [100, 50, 400, 100], 250) == [0, 1, 3]
+    # Once the next best does not fit, a smaller, worse one still can
+    assert pack(scores, [100, 50, 100, 100], 250) == [0, 1, 2]
+    assert pack(scores, [100, 50, 100, 100], 1000) == [0, 1, 2, 3]
+
+
+def test_pack_falls_back_to_the_best_over_budget():
+    assert pack([1.76, 0.66, 2.49, 1.35], [900, 50, 400, 100], 10) == [2]
+    assert pack([], [], 10) == []
+
+
+def test_pack_breaks_ties_by_position():
+    assert pack(np.array([1.0, 1.0, 1.0]), [100, 100, 100], 200) == [0, 1]
@@ -0,0 +1,156 @@
+import json
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+
+CATEGORIES = ('News', 'Security')
+
+
+class StubBatches:
+    """``messages.batches`` of a Message Batches API whose batches end when told to.
+
+    Each request of an ended batch gets the outcome set for its category:
+    ``succeeded`` with a JSON summary, or ``errored``/``expired``.
+    """
+
+    def __init__(self):
+        self.created = {}
+        self.ended = set()
+        self.outcomes = {}
+
+    def create(self, requests):
+        batch_id = f'msgbatch_{len(self.created) + 1}'
+        self.created[batch_id] = requests
+        return SimpleNamespace(id=batch_id)
+
+    def retrieve(self, batch_id):
+        status = 'ended' if batch_id in self.ended else 'in_progress'
+        counts = {'processing': 0 if status == 'ended' else len(self.created[batch_id])}
+        return SimpleNamespace(id=batch_id, processing_status=status,
+                               request_counts=SimpleNamespace(model_dump=lambda: counts))
+
+    def results(self, batch_id):
+        for request in self.created[batch_id]:
+            # Custom ids number the categories in order
+            category = CATEGORIES[int(request['custom_id'].split('-')[1])]
+            outcome = self.outcomes.get(category, 'succeeded')
+            if outcome == 'succeeded':
+                text = json.dumps({'section_title': category, 'summary': f'All about {category}',
+                                   'actionable_tasks': []})
+                message = SimpleNamespace(content=[SimpleNamespace(text=text)],
+                                          usage=SimpleNamespace(input_tokens=100, output_tokens=20))
+                result = SimpleNamespace(type='succeeded', message=message)
+            else:
+                result = SimpleNamespace(type=outcome, error=None)
+            yield SimpleNamespace(custom_id=request['custom_id'], result=result)
+
+
+@pytest.fixture
+def batches(app_db, monkeypatch):
+    """A FeedSummarizer with an article in each category, talking to StubBatches."""
+    from db_helper import Article, Feed
+    from feed_summary import ArticleSummarizer, FeedSummarizer
+    from llm_cache import ResponseCache
+    _, db = app_db
+    now = datetime.now(timezone.utc)
+    for n, category in enumerate(CATEGORIES):
+        feed = Feed(url=f'https://example.com/{n}.xml', name=category, category=category)
+        db.session.add(Article(feed=feed, title=f'{category} story', url=f'https://example.com/{n}',
+                               published=now - timedelta(hours=1), plaintext=f'What happened in {category}.'))
+    db.session.commit()
+
+    stub = StubBatches()
+    summarizer = ArticleSummarizer('test-key', cache=ResponseCache(db))
+    monkeypatch.setattr(summarizer, 'batch_client',
+                        lambda: SimpleNamespace(messages=SimpleNamespace(batches=stub)))
+    feed_summarizer = FeedSummarizer(summarizer)
+    yield feed_summarizer, stub
+    feed_summarizer.close()
+
+
+def stored_batches():
+    from db_helper import SummaryBatch
+    return SummaryBatch.query.order_by(SummaryBatch.id).all()
+
+
+def test_batch_is_submitted_then_collected(batches):
+    from db_helper import DailySummary, LLMResponse
+    summarizer, stub = batches
+
+    assert summarizer.run_batches() == {'collected': 0, 'submitted': 'msgbatch_1', 'pending': 1}
+    [batch] = stored_batches()
+    assert batch.status == 'submitted' and len(stub.created['msgbatch_1']) == 2
+    # Nothing to collect while the batch is running, and nothing is submitted twice
+    assert summarizer.run_batches() == {'collected': 0, 'submitted': None, 'pending': 1}
+
+    stub.ended.add('msgbatch_1')
+    assert summarizer.run_batches(submit=False) == {'collected': 1, 'submitted': None, 'pending': 0}
+    [batch] = stored_batches()
+    assert batch.status == 'collected' and batch.collected_at is not None
+    summary = summarizer.db.session.get(DailySummary, batch.summary_id)
+    content = json.loads(summary.summary)
+    assert [content[category]['summary'] for category in CATEGORIES] == ['All about News', 'All about Security']
+    assert len(summary.covered_articles) == 2
+    # The responses are cached for a synchronous run of the same prompts
+    assert LLMResponse.query.count() == 2
+
+    # The summary exists now, so the next submission has nothing to do
+    assert summarizer.run_batches()['submitted'] is None
+
+
+@pytest.mark.parametrize('outcome', ['expired', 'errored'])
+def test_batch_with_no_successful_request_fails_and_is_resubmitted(batches, outcome):
+    from db_helper import DailySummary
+    summarizer, stub = batches
+    summarizer.run_batches()
+    stub.outcomes = {category: outcome for category in CATEGORIES}
+    stub.ended.add('msgbatch_1')
+
+    # The failed batch leaves the period without a summary, so a new batch is submitted
+    assert summarizer.run_batches() == {'collected': 1, 'submitted': 'msgbatch_2', 'pending': 1}
+    failed, resubmitted = stored_batches()
+    assert failed.status == 'failed' and failed.error and failed.summary_id is None
+    assert resubmitted.status == 'submitted'
+    assert DailySummary.query.count() == 0
+
+    stub.outcomes = {}
+    stub.ended.add('msgbatch_2')
+    summarizer.run_batches(submit=False)
+    assert stored_batches()[1].status == 'collected'
+    assert DailySummary.query.count() == 1
+
+
+def test_partly_failed_batch_stores_placeholders_for_the_failed_categories(batches):
+    from db_helper import DailySummary
+    summarizer, stub = batches
+    summarizer.run_batches()
+    stub.outcomes = {'Security': 'expired'}
+    stub.ended.add('msgbatch_1')
+
+    summarizer.run_batches(submit=False)
+
+    [batch] = stored_batches()
+    assert batch.status == 'collected'
+    content = json.loads(summarizer.db.session.get(DailySummary, batch.summary_id).summary)
+    assert content['News']['summary'] == 'All about News'
+    assert content['Security'] == summarizer.summarizer.error_summary('Security')
+    # Only the article of the category that succeeded counts as covered
+    assert len(summarizer.db.session.get(DailySummary, batch.summary_id).covered_articles) == 1
+
+
+def test_cached_responses_settle_the_summary_without_a_batch(batches):
+    from db_helper import DailySummary, DailySummaryArticle
+    summarizer, stub = batches
+    summarizer.run_batches()
+    stub.ended.add('msgbatch_1')
+    summarizer.run_batches(submit=False)
+    DailySummaryArticle.query.delete()
+    DailySummary.query.delete()
+    summarizer.db.session.commit()
+
+    # Every prompt is answered from the cache, so no batch is created
+    assert summarizer.run_batches()['submitted'] is None
+    assert len(stub.created) == 1
+    assert stored_batches()[-1].status == 'collected'
+    assert DailySummary.query.count() == 1
@@ -0,0 +1,57 @@
+import pytest
+
+from app.utils.urls import canonicalize_url, guid_hash, url_hash
+
+
+@pytest.mark.parametrize('url, expected', [
+    ('https://example.com/post', 'https://example.com/post'),
+    # Scheme, host case, www. and default ports do not matter
+    ('http://WWW.Example.com/post', 'https://example.com/post'),
+    ('https://example.com:443/post', 'https://example.com/post'),
+    ('http://example.com:80/post', 'https://example.com/post'),
+    ('https://example.com./post', 'https://example.com/post'),
+    # Other ports do
+    ('https://example.com:8443/post', 'https://example.com:8443/post'),
+    # Trailing slashes and fragments are dropped
+    ('https://example.com/post/', 'https://example.com/post'),
+    ('https://example.com/post#comments', 'https://example.com/post'),
+    # Tracking parameters are dropped and the rest of the query sorted
+    ('https://example.com/post?utm_source=rss&utm_medium=feed', 'https://example.com/post'),
+    ('https://example.com/post?fbclid=abc&id=7&UTM_Campaign=x', 'https://example.com/post?id=7'),
+    ('https://example.com/post?b=2&a=1&a=0', 'https://example.com/post?a=0&a=1&b=2'),
+    ('https://example.com/post?flag=', 'https://example.com/post?flag='),
+    # Path case is significant
+    ('https://example.com/Post', 'https://example.com/Post'),
+])
+def test_canonicalize_url(url, expected):
+    assert canonicalize_url(url) == expected
+
+
+@pytest.mark.parametrize('url', ['', None, '   '])
+def test_canonicalize_empty_url(url):
+    assert canonicalize_url(url) == ''
+
+
+def test_canonicalize_unparseable_url_is_kept():
+    assert canonicalize_url(' https://example.com:port/post ') == 'https://example.com:port/post'
+
+
+def test_url_hash():
+    assert url_hash('http://www.example.com/post/?utm_source=rss') == url_hash('https://example.com/post')
+    assert url_hash('https://example.com/post') != url_hash('https://example.com/other')
+    assert len(url_hash('https://example.com/post')) == 32
+
+
+@pytest.mark.parametrize('url', ['', None, '   '])
+def test_url_hash_of_empty_url(url):
+    # Linkless entries must not collide on one shared hash
+    assert url_hash(url) is None
+
+
+def test_guid_hash():
+    assert guid_hash(1, 'tag:example.com,2025:1') == guid_hash(1, ' tag:example.com,2025:1\n')
+    # GUIDs are only unique within their feed
+    assert guid_hash(1, 'tag:example.com,2025:1') != guid_hash(2, 'tag:example.com,2025:1')
+    assert len(guid_hash(1, 'abc')) == 32
+    assert guid_hash(1, None) is None
+    assert guid_hash(1, '') is None
@@ -0,0 +1,219 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.utils.websub import sign, verify_signature
+
+BODY = b'<feed xmlns="http://www.w3.org/2005/Atom"></feed>'
+TOPIC = 'https://example.com/feed'
+
+
+@pytest.mark.parametrize('algorithm', ['sha1', 'sha256', 'sha384', 'sha512'])
+def test_verify_signature(algorithm):
+    header = sign('secret', BODY, algorithm)
+    assert verify_signature('secret', header, BODY)
+    assert verify_signature('secret', header.upper().replace(algorithm.upper(), algorithm), BODY)
+    assert not verify_signature('other secret', header, BODY)
+    assert not verify_signature('secret', header, BODY + b' ')
+
+
+@pytest.mark.parametrize('header', [None, '', 'sha256', 'md5=' + 'a' * 32, 'sha256=not-hex'])
+def test_verify_signature_rejects_bad_headers(header):
+    assert not verify_signature('secret', header, BODY)
+
+
+def test_verify_signature_needs_a_secret():
+    assert not verify_signature('', sign('', BODY), BODY)
+
+
+@pytest.fixture
+def web_app():
+    from app import create_app
+    from app.extensions import db
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def subscription(web_app):
+    from app.extensions import db
+    from app.models import Feed, WebSubSubscription
+    feed = Feed(url=TOPIC, name='Example')
+    subscription = WebSubSubscription(feed=feed, hub_url='https://hub.example.com/', topic_url=TOPIC,
+                                      secret='secret', state='pending',
+                                      requested_at=datetime.now(timezone.utc).replace(tzinfo=None))
+    db.session.add(feed)
+    db.session.commit()
+    return subscription
+
+
+def verify(web_app, subscription, **params):
+    query = {'hub.mode': 'subscribe', 'hub.topic': TOPIC, 'hub.challenge': 'abc123', **params}
+    return web_app.test_client().get(f'/api/websub/{subscription.feed_id}', query_string=query)
+
+
+def test_verification_of_a_pending_subscription(web_app, subscription):
+    response = verify(web_app, subscription, **{'hub.lease_seconds': '3600'})
+
+    assert response.status_code == 200 and response.get_data() == b'abc123'
+    assert subscription.state == 'verified'
+    assert subscription.expires_at - subscription.verified_at == timedelta(hours=1)
+
+
+def test_verification_without_a_lease_gets_the_configured_one(web_app, subscription):
+    assert verify(web_app, subscription).status_code == 200
+    assert subscription.expires_at - subscription.verified_at == \
+        timedelta(seconds=web_app.config['WEBSUB_LEASE_SECONDS'])
+
+
+def test_unrequested_verification_is_refused(web_app, subscription):
+    from app.extensions import db
+    assert verify(web_app, subscription).status_code == 200
+    expires_at = subscription.expires_at
+
+    # Nothing has been requested since
+    assert verify(web_app, subscription, **{'hub.lease_seconds': '60'}).status_code == 404
+    assert subscription.expires_at == expires_at
+
+    # A renewal request makes the next verification welcome
+    subscription.requested_at = subscription.verified_at + timedelta(seconds=1)
+    db.session.commit()
+    assert verify(web_app, subscription, **{'hub.lease_seconds': '60'}).status_code == 200
+    assert subscription.expires_at == subscription.verified_at + timedelta(seconds=60)
+
+
+def test_verification_of_a_denied_subscription_is_refused(web_app, subscription):
+    response = verify(web_app, subscription, **{'hub.mode': 'denied', 'hub.reason': 'not allowed'})
+    assert response.status_code == 200
+    assert subscription.state == 'denied' and subscription.last_error == 'not allowed'
+
+    assert verify(web_app, subscription).status_code == 404
+    assert subscription.state == 'denied'
+
+
+def test_verification_of_another_topic_is_refused(web_app, subscription):
+    assert verify(web_app, subscription, **{'hub.topic': 'https://example.com/other'}).status_code == 404
+    assert subscription.state == 'pending'
+
+
+def test_retried_denied_subscription_is_pending_again():
+    from types import SimpleNamespace
+    from app.models import WebSubSubscription
+    from feed_fetcher import FetchResult
+    from websub import DENIED_RETRY, WebSubSubscriber
+
+    now = datetime.now(timezone.utc)
+    denied = WebSubSubscription(hub_url='https://hub.example.com/', topic_url=TOPIC, secret='secret',
+                                state='denied', requested_at=now - DENIED_RETRY - timedelta(minutes=1))
+    feed = SimpleNamespace(id=1, url=TOPIC, websub=denied)
+    result = FetchResult(1, TOPIC)
+    result.status = 200
+    result.hubs = ['https://hub.example.com/']
+    result.self_url = TOPIC
+
+    subscriber = WebSubSubscriber(None, 'https://collector.example.com/')
+    assert subscriber.observe(feed, result, now)
+    assert denied.state == 'pending' and denied.awaiting_verification()
+    subscriber.close()
+
+
+class FakeProcess:
+    """Stands in for a collector process; ``returncode`` None means still running."""
+
+    def __init__(self, on_exit):
+        self.on_exit = on_exit
+        self.returncode = None
+
+    def poll(self):
+        return self.returncode
+
+    def exit(self, returncode=0):
+        self.returncode = returncode
+        self.on_exit(self)
+
+
+@pytest.fixture
+def ingest_starts(web_app, subscription, monkeypatch):
+    """A verified subscription; collector starts are recorded instead of run."""
+    import sys
+    from app.extensions import db
+    subscription.state = 'verified'
+    db.session.commit()
+    routes = sys.modules['app.blueprints.api.routes']
+    starts = []
+
+    def start_script(script_path, args, on_exit=None):
+        starts.append(FakeProcess(on_exit))
+        return starts[-1]
+
+    monkeypatch.setattr(routes, 'start_script', start_script)
+    monkeypatch.setattr(routes, '_push_ingest', None)
+    return starts
+
+
+def push(web_app, subscription, body, chunked=False):
+    import io
+    headers = {'X-Hub-Signature': sign('secret', body), 'Content-Type': 'application/atom+xml'}
+    if chunked:
+        # No Content-Length; the server terminates the stream, as for chunked requests
+        environ = {'wsgi.input_terminated': True, 'CONTENT_LENGTH': ''}
+        return web_app.test_client().post(f'/api/websub/{subscription.feed_id}', headers=headers,
+                                          input_stream=io.BytesIO(body), environ_overrides=environ)
+    return web_app.test_client().post(f'/api/websub/{subscription.feed_id}', headers=headers, data=body)
+
+
+@pytest.mark.parametrize('chunked', [False, True])
+def test_push_is_queued(web_app, subscription, ingest_starts, chunked):
+    from app.models import WebSubDelivery
+    assert push(web_app, subscription, BODY, chunked).status_code == 202
+    assert [delivery.body for delivery in WebSubDelivery.query] == [BODY]
+    assert len(ingest_starts) == 1
+
+
+@pytest.mark.parametrize('chunked', [False, True])
+def test_oversized_push_is_refused(web_app, subscription, ingest_starts, chunked):
+    from app.models import WebSubDelivery
+    web_app.config['WEBSUB_MAX_PUSH_BYTES'] = len(BODY) - 1
+    assert push(web_app, subscription, BODY, chunked).status_code == 413
+    assert WebSubDelivery.query.count() == 0 and ingest_starts == []
+
+
+def test_pushes_share_a_running_collector(web_app, subscription, ingest_starts):
+    assert push(web_app, subscription, BODY).status_code == 202
+    assert push(web_app, subscription, BODY).status_code == 202
+    assert len(ingest_starts) == 1
+
+    # Once it has exited the next push starts another
+    ingest_starts[0].returncode = 0
+    assert push(web_app, subscription, BODY).status_code == 202
+    assert len(ingest_starts) == 2
+
+
+def test_push_queued_while_the_collector_exits_is_not_stranded(web_app, subscription, ingest_starts):
+    from app.extensions import db
+    from app.models import WebSubDelivery
+    assert push(web_app, subscription, BODY).status_code == 202
+    # The collector drained the queue and is exiting when another push arrives
+    WebSubDelivery.query.delete()
+    db.session.commit()
+    assert push(web_app, subscription, BODY).status_code == 202
+    assert len(ingest_starts) == 1
+
+    ingest_starts[0].exit()
+    assert len(ingest_starts) == 2
+
+    # Nothing left to ingest: the collector is not started again
+    WebSubDelivery.query.delete()
+    db.session.commit()
+    ingest_starts[1].exit()
+    assert len(ingest_starts) == 2
+
+
+def test_failed_collector_is_not_restarted_on_exit(web_app, subscription, ingest_starts):
+    assert push(web_app, subscription, BODY).status_code == 202
+    ingest_starts[0].exit(returncode=1)
+    assert len(ingest_starts) == 1